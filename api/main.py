@@ -1,9 +1,10 @@
 import os
 import sys
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException, Query
-from pydantic import BaseModel
-import numpy as np
-from typing import Optional
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel, Field
+from typing import List, Optional
 
 # Add the project root to the Python path
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
@@ -11,11 +12,42 @@ sys.path.insert(0, project_root)
 
 from services.data_pipeline_service import DataPipelineService
 from models.model_trainer import FinancialModel
+from models.registry import ModelRegistry, load_inference_model
+from models.inference import InferenceScheduler, QueueFullError
+from services.training_jobs import TrainingJobManager
+from services.prediction_cache import PredictionCache
+from services.forecast import forecast_batch, shocked_windows
+from infrastructure.metrics import metrics
+from infrastructure.shared_weights import SharedWeightStore
+
+# Set by api/serve.py: workers map each model's weights from one shared copy instead of loading their own.
+shared_weights = SharedWeightStore.from_env()
+model_registry = ModelRegistry(max_models=int(os.getenv("MODEL_REGISTRY_MAX_MODELS", 8)),
+                               loader=shared_weights.load if shared_weights else load_inference_model)
+inference_scheduler = InferenceScheduler(
+    max_batch_size=int(os.getenv("INFERENCE_MAX_BATCH_SIZE", 32)),
+    max_wait_ms=float(os.getenv("INFERENCE_MAX_WAIT_MS", 5)),
+    max_queue_depth=int(os.getenv("INFERENCE_MAX_QUEUE_DEPTH", 1024))
+)
+prediction_cache = PredictionCache(max_entries=int(os.getenv("PREDICTION_CACHE_MAX_ENTRIES", 4096)))
+training_jobs = TrainingJobManager(max_workers=int(os.getenv("TRAINING_WORKERS", 1)),
+                                   finished_ttl=float(os.getenv("TRAINING_JOB_TTL_SECONDS", 3600)))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Comma-separated tickers whose models are loaded before the first request, e.g. "IBM,MSFT".
+    preload_tickers = [t.strip() for t in os.getenv("PRELOAD_TICKERS", "").split(",") if t.strip()]
+    if preload_tickers:
+        loaded = model_registry.preload(preload_tickers)
+        print(f"Preloaded models for: {', '.join(loaded) or 'none'}")
+    yield
+    training_jobs.shutdown(wait=False)
 
 app = FastAPI(
     title="Financial Prediction API",
     description="An API to train a model and get financial predictions. Can use live or local data.",
-    version="1.3.0"
+    version="1.3.0",
+    lifespan=lifespan
 )
 
 class TickerRequest(BaseModel):
@@ -24,32 +56,40 @@ class TickerRequest(BaseModel):
     window_size: int = 10
     use_local_data: bool = False
     local_data_path: Optional[str] = None
+    streaming: bool = False
+    epochs: int = Field(20, ge=1)
+
+class ForecastRequest(BaseModel):
+    tickers: List[str] = ["IBM"]
+    interval: str = "60min"
+    window_size: int = 10
+    steps: int = Field(5, ge=1, le=int(os.getenv("FORECAST_MAX_STEPS", 500)))
+    # Relative moves of the last bar's prices, one forecast path per shock; 0.0 is the unchanged data.
+    shocks: List[float] = [0.0]
+    use_local_data: bool = False
+    local_data_path: Optional[str] = None
 
-@app.post("/train", tags=["Model Training"])
+@app.post("/train", tags=["Model Training"], status_code=202)
 def train_model_endpoint(request: TickerRequest):
     try:
-        api_key = os.getenv("ALPHA_VANTAGE_API_KEY")
-        pipeline = DataPipelineService(api_key, request.use_local_data, request.local_data_path)
-        features, targets, _ = pipeline.run(request.ticker, request.interval, request.window_size)
-        
-        if features.size == 0:
-            raise ValueError("Feature set is empty. Cannot train model.")
-
-        input_shape = (features.shape[1], features.shape[2])
-        model_trainer = FinancialModel(ticker=request.ticker)
-        model_trainer.build(input_shape)
-        model_trainer.train(features, targets)
-        model_path = model_trainer.save()
-        
+        job = training_jobs.submit(request.model_dump())
         return {
-            "message": f"Model for {request.ticker} trained and saved successfully.",
-            "model_path": model_path
+            "message": f"Training job for {request.ticker} is {job['status']}.",
+            "job_id": job["job_id"],
+            "status": job["status"]
         }
     except Exception as e:
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/train/{job_id}", tags=["Model Training"])
+def get_training_job(job_id: str):
+    try:
+        return training_jobs.status(job_id)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
 @app.get("/predict", tags=["Prediction"])
 def get_prediction(
     ticker: str = Query("IBM", description="The stock ticker symbol to predict."),
@@ -58,19 +98,27 @@ def get_prediction(
     use_local_data: bool = Query(False, description="Set to true to use local sample data."),
     local_data_path: Optional[str] = Query(None, description="Path to local CSV file.")
 ):
-    try:
-        model_trainer = FinancialModel.load(ticker)
+    def fetch():
         api_key = os.getenv("ALPHA_VANTAGE_API_KEY")
         pipeline = DataPipelineService(api_key, use_local_data, local_data_path)
-        features, _, _ = pipeline.run(ticker, interval, window_size)
-        
-        if features.size == 0:
-            raise ValueError("Feature set is empty, cannot make a prediction.")
+        # Built with the feature config and scaler saved with this version of the model.
+        feature_spec = FinancialModel.load_feature_spec(ticker, model_version=model_version)
+        feature_set = pipeline.run_features(ticker, interval, window_size, feature_spec)
+        # The feature set's version changes when its last bar is revised, not only when a bar is added.
+        input_key = (feature_set.last_timestamp, feature_set.manifest["generation"], feature_set.version)
+        return input_key, feature_set.last_window()
 
-        last_sequence = features[-1]
-        prediction_input = np.expand_dims(last_sequence, axis=0)
-        prediction = model_trainer.model.predict(prediction_input)
-        predicted_value = float(prediction[0][0])
+    def infer(prediction_input):
+        prediction = inference_scheduler.predict(ticker, model_trainer, prediction_input[0])
+        return float(prediction[0])
+
+    try:
+        # The model, its feature spec and the cache key all come from the same save.
+        model_trainer, model_version = model_registry.get_versioned(ticker)
+        # Served from the cache until the next bar is due or the model is retrained.
+        predicted_value = prediction_cache.get_or_compute(
+            ticker, interval, window_size, model_version, fetch, infer,
+            source=local_data_path if use_local_data else None)
 
         return {
             "ticker": ticker,
@@ -78,11 +126,64 @@ def get_prediction(
         }
     except FileNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e))
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/forecast", tags=["Prediction"])
+def get_forecast(request: ForecastRequest):
+    try:
+        api_key = os.getenv("ALPHA_VANTAGE_API_KEY")
+        pipeline = DataPipelineService(api_key, request.use_local_data, request.local_data_path)
+        tickers = list(dict.fromkeys(request.tickers))
+        jobs, scalers, last_bars, columns = [], [], [], None
+        for ticker in tickers:
+            model, model_version = model_registry.get_versioned(ticker)
+            feature_set = pipeline.run_features(ticker, request.interval, request.window_size,
+                                                FinancialModel.load_feature_spec(ticker, model_version=model_version))
+            if columns is not None and feature_set.columns != columns:
+                # The only client error: tickers whose models were trained on different features can't be batched.
+                raise HTTPException(status_code=400,
+                                    detail=f"The features of {ticker} do not match those of {tickers[0]}.")
+            columns = feature_set.columns
+            scaler = feature_set.scaler()
+            jobs.append((model, shocked_windows(feature_set.last_window(), request.shocks, columns, scaler)))
+            scalers.append(scaler)
+            last_bars.append(feature_set.index[-1].isoformat())
+
+        # All tickers and scenarios are forecast together: one batched step per forecast bar.
+        paths = forecast_batch(jobs, request.steps, columns, scalers=scalers)
+        return {
+            "interval": request.interval,
+            "steps": request.steps,
+            "forecasts": {
+                ticker: {
+                    "last_bar": last_bar,
+                    "scenarios": [{"shock": shock, "path": path.tolist()} for shock, path in zip(request.shocks, ticker_paths)]
+                }
+                for ticker, last_bar, ticker_paths in zip(tickers, last_bars, paths)
+            }
+        }
+    except HTTPException:
+        raise
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/predict/stats", tags=["Prediction"])
+def get_inference_stats():
+    return dict(inference_scheduler.stats(), prediction_cache=prediction_cache.stats())
+
+@app.get("/metrics", tags=["Monitoring"], response_class=PlainTextResponse)
+def get_metrics():
+    return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
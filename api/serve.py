@@ -0,0 +1,63 @@
+import argparse
+import os
+import sys
+from typing import List, Optional
+
+# Add the project root to the Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from models.model_trainer import FinancialModel
+from infrastructure.shared_weights import SharedWeightStore
+
+
+def saved_tickers(models_dir: Optional[str] = None) -> List[str]:
+    """Returns the tickers with a saved model, or none if the models directory does not exist yet."""
+    models_dir = os.path.dirname(FinancialModel.model_path("_", models_dir))
+    suffix = "_model.keras"
+    if not os.path.isdir(models_dir):
+        # A fresh deployment has no models yet; the workers publish them as they are trained.
+        return []
+    return sorted(name[:-len(suffix)] for name in os.listdir(models_dir) if name.endswith(suffix))
+
+
+def publish_models(store: SharedWeightStore, tickers: List[str]) -> List[str]:
+    """
+    Publishes the weights of the given tickers' saved models before any worker starts.
+
+    Returns:
+        The tickers that were published. Tickers without a saved model are skipped.
+    """
+    published = []
+    for ticker in tickers:
+        try:
+            store.publish(ticker)
+            published.append(ticker)
+        except FileNotFoundError as e:
+            print(f"Skipping {ticker}: {e}")
+    return published
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Serve the API from several worker processes that share one copy of each model's weights.")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", 4)))
+    parser.add_argument("--weights-dir", default=os.getenv("SHARED_WEIGHTS_DIR"),
+                        help="Where the shared weights are kept. Defaults to a directory on /dev/shm.")
+    parser.add_argument("--tickers", help="Comma-separated tickers to publish up front. Defaults to every saved model.")
+    args = parser.parse_args()
+
+    store = SharedWeightStore(args.weights_dir)
+    tickers = [t.strip() for t in args.tickers.split(",") if t.strip()] if args.tickers else saved_tickers()
+    published = publish_models(store, tickers)
+    print(f"Shared weights in {store.root} for: {', '.join(published) or 'none'}")
+
+    # Workers inherit the environment, so they load models through the shared store. Models trained later
+    # are published by the training job, or by the first worker to request them.
+    os.environ["SHARED_WEIGHTS_DIR"] = store.root
+    os.environ.setdefault("PRELOAD_TICKERS", ",".join(published))
+
+    import uvicorn
+    uvicorn.run("api.main:app", host=args.host, port=args.port, workers=args.workers)
@@ -0,0 +1,413 @@
+"""
+Load-tests the API end to end: a uvicorn server backed by the fake Alpha Vantage server, under a
+configurable mix of concurrent /predict and /train requests.
+
+Usage:
+    python -m benchmarks.load_test --tickers 4 --concurrency 16 --duration 30 --output load_results.json
+    python -m benchmarks.load_test --mix predict=0.9,train=0.1 --workers 2 --shared-weights
+    python -m benchmarks.load_test --thresholds benchmarks/load_thresholds.json
+
+Before the timed run, a model is trained for every ticker. A /train request is timed end to end, from
+submitting the job until it finishes. At most --max-train-jobs are in flight at once; a client that
+draws /train while they are all taken sends a /predict instead and the train draw is counted as
+skipped, so training never crowds out the prediction traffic. The report holds p50/p95/p99 latency,
+throughput and error counts for each endpoint, and the peak memory of the server and all its worker
+and training processes, sampled from /proc. With --thresholds, any limit the run breaks is reported
+and the exit code is 1. With --update-thresholds, the thresholds file is rewritten from this run.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import requests
+
+# Add the project root to the Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from infrastructure.fake_alpha_vantage import FakeAlphaVantageServer
+
+DEFAULT_THRESHOLDS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "load_thresholds.json")
+ENDPOINTS = ("predict", "train")
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    """Parses a traffic mix such as 'predict=0.9,train=0.1' into normalized weights."""
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in ENDPOINTS:
+            raise ValueError(f"Unknown endpoint '{name.strip()}' in mix; expected one of {', '.join(ENDPOINTS)}.")
+        weights[name.strip()] = float(weight or 1)
+    total = sum(weights.values())
+    if total <= 0:
+        raise ValueError("The traffic mix needs a positive weight.")
+    return {name: weight / total for name, weight in weights.items()}
+
+
+def summarize(latencies: List[float], errors: int, duration: float) -> Dict[str, Any]:
+    """Latency percentiles in milliseconds and throughput in successful requests per second."""
+    summary = {"requests": len(latencies) + errors, "errors": errors,
+               "throughput_rps": len(latencies) / duration if duration else 0.0}
+    if latencies:
+        p50, p95, p99 = np.percentile(np.asarray(latencies) * 1000, [50, 95, 99])
+        summary.update(p50_ms=float(p50), p95_ms=float(p95), p99_ms=float(p99), max_ms=max(latencies) * 1000)
+    return summary
+
+
+def process_tree(pid: int) -> List[int]:
+    """Returns a process and all its descendants, read from /proc."""
+    children: Dict[int, List[int]] = {}
+    for name in os.listdir("/proc"):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{name}/stat") as f:
+                # The command name may contain spaces, so the fields are counted from its closing paren.
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(name))
+    tree, pending = [], [pid]
+    while pending:
+        current = pending.pop()
+        tree.append(current)
+        pending.extend(children.get(current, []))
+    return tree
+
+
+def memory_kb(pid: int) -> Dict[str, int]:
+    """A process's resident (RSS) and proportional (PSS, shared pages split between sharers) memory in kB."""
+    usage = {"rss_kb": 0, "pss_kb": 0}
+    for path, fields in ((f"/proc/{pid}/status", {"VmRSS:": "rss_kb"}), (f"/proc/{pid}/smaps_rollup", {"Pss:": "pss_kb"})):
+        try:
+            with open(path) as f:
+                for line in f:
+                    key = line.split(None, 1)[0]
+                    if key in fields:
+                        usage[fields[key]] = int(line.split()[1])
+        except OSError:
+            pass
+    return usage
+
+
+class MemorySampler:
+    """Samples the total RSS and PSS of a process tree in a background thread and keeps the peaks."""
+    def __init__(self, pid: int, interval: float = 0.25):
+        self.pid = pid
+        self.interval = interval
+        self.peak_rss_kb = 0
+        self.peak_pss_kb = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self) -> 'MemorySampler':
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def _run(self):
+        while not self._stop.is_set():
+            usages = [memory_kb(pid) for pid in process_tree(self.pid)]
+            self.peak_rss_kb = max(self.peak_rss_kb, sum(u["rss_kb"] for u in usages))
+            self.peak_pss_kb = max(self.peak_pss_kb, sum(u["pss_kb"] for u in usages))
+            self._stop.wait(self.interval)
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port: int, env: Dict[str, str], workers: int, shared_weights: bool, log_file: Any) -> subprocess.Popen:
+    """Starts the API in a subprocess, through api/serve.py when the workers share weights."""
+    if shared_weights:
+        command = [sys.executable, os.path.join(project_root, "api", "serve.py"), "--host", "127.0.0.1",
+                   "--port", str(port), "--workers", str(workers)]
+    else:
+        command = [sys.executable, "-m", "uvicorn", "api.main:app", "--host", "127.0.0.1", "--port", str(port),
+                   "--workers", str(workers), "--log-level", "warning"]
+    return subprocess.Popen(command, cwd=project_root, env=env, stdout=log_file, stderr=subprocess.STDOUT)
+
+
+def wait_until_ready(base_url: str, server: subprocess.Popen, timeout: float = 120.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"The server exited with code {server.returncode} before it was ready.")
+        try:
+            if requests.get(f"{base_url}/predict/stats", timeout=2).ok:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    raise TimeoutError(f"The server at {base_url} was not ready after {timeout:.0f} s.")
+
+
+def train_and_wait(session: requests.Session, base_url: str, params: Dict[str, Any], timeout: float = 600.0,
+                   poll_interval: float = 0.5) -> Dict[str, Any]:
+    """Submits a training job and polls it until it finishes."""
+    response = session.post(f"{base_url}/train", json=params, timeout=30)
+    response.raise_for_status()
+    job = response.json()
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        response = session.get(f"{base_url}/train/{job['job_id']}", timeout=30)
+        if response.status_code == 404:
+            # Jobs live in the worker process that accepted them; another worker may have answered.
+            time.sleep(poll_interval)
+            continue
+        status = response.json()
+        if status["status"] not in ("queued", "running"):
+            if status["status"] != "succeeded":
+                raise RuntimeError(f"Training {params['ticker']} failed: {status.get('error')}")
+            return status
+        time.sleep(poll_interval)
+    raise TimeoutError(f"Training {params['ticker']} did not finish within {timeout:.0f} s.")
+
+
+def drive_load(base_url: str, tickers: List[str], mix: Dict[str, float], concurrency: int, duration: float,
+               train_params: Dict[str, Any], seed: int = 0, max_train_jobs: int = 1) -> Dict[str, Dict[str, Any]]:
+    """
+    Sends requests from `concurrency` threads for `duration` seconds and summarizes each endpoint.
+
+    A 'train' request waits for its job to finish, so its latency is the whole training time. No more
+    than `max_train_jobs` are in flight; a train draw beyond that is skipped and a predict is sent instead.
+    """
+    latencies = {name: [] for name in mix}
+    errors = {name: 0 for name in mix}
+    skipped_train = 0
+    train_slots = threading.BoundedSemaphore(max_train_jobs)
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+    names, weights = list(mix), list(mix.values())
+
+    def worker(worker_id: int):
+        nonlocal skipped_train
+        rng = random.Random(seed + worker_id)
+        with requests.Session() as session:
+            while time.monotonic() < deadline:
+                name = rng.choices(names, weights)[0]
+                ticker = rng.choice(tickers)
+                if name == "train" and not train_slots.acquire(blocking=False):
+                    with lock:
+                        skipped_train += 1
+                    if "predict" not in mix:
+                        time.sleep(0.05)
+                        continue
+                    name = "predict"
+                started = time.perf_counter()
+                try:
+                    if name == "predict":
+                        response = session.get(f"{base_url}/predict", timeout=60, params={
+                            "ticker": ticker, "interval": train_params["interval"],
+                            "window_size": train_params["window_size"]})
+                        ok = response.ok
+                    else:
+                        try:
+                            train_and_wait(session, base_url, dict(train_params, ticker=ticker), poll_interval=0.05)
+                        finally:
+                            train_slots.release()
+                        ok = True
+                except (requests.RequestException, RuntimeError, TimeoutError):
+                    ok = False
+                elapsed = time.perf_counter() - started
+                with lock:
+                    if ok:
+                        latencies[name].append(elapsed)
+                    else:
+                        errors[name] += 1
+
+    started = time.monotonic()
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+    summaries = {name: summarize(latencies[name], errors[name], elapsed) for name in mix}
+    if "train" in summaries:
+        summaries["train"]["skipped"] = skipped_train
+    return summaries
+
+
+def check_thresholds(report: Dict[str, Any], thresholds: Dict[str, Any]) -> List[str]:
+    """
+    Returns a description of every threshold the report breaks.
+
+    Thresholds are keyed by endpoint, with maximums such as 'p95_ms', 'p99_ms' and 'error_rate' and a
+    minimum 'min_throughput_rps', plus 'server' limits such as 'max_peak_rss_mb'.
+    """
+    failures = []
+    for name, limits in thresholds.get("endpoints", {}).items():
+        result = report["endpoints"].get(name)
+        if result is None:
+            continue
+        for metric in ("p50_ms", "p95_ms", "p99_ms"):
+            if metric in limits and result.get(metric, 0.0) > limits[metric]:
+                failures.append(f"{name} {metric}: {result[metric]:.1f} > {limits[metric]:.1f}")
+        error_rate = result["errors"] / result["requests"] if result["requests"] else 0.0
+        if "error_rate" in limits and error_rate > limits["error_rate"]:
+            failures.append(f"{name} error_rate: {error_rate:.3f} > {limits['error_rate']:.3f}")
+        if "min_throughput_rps" in limits and result["throughput_rps"] < limits["min_throughput_rps"]:
+            failures.append(f"{name} throughput_rps: {result['throughput_rps']:.1f} < {limits['min_throughput_rps']:.1f}")
+    server_limits = thresholds.get("server", {})
+    for metric in ("peak_rss_mb", "peak_pss_mb"):
+        limit = server_limits.get(f"max_{metric}")
+        if limit is not None and report["server"][metric] > limit:
+            failures.append(f"server {metric}: {report['server'][metric]:.0f} > {limit:.0f}")
+    return failures
+
+
+def thresholds_from_report(report: Dict[str, Any], headroom: float) -> Dict[str, Any]:
+    """Derives thresholds that allow `headroom` (e.g. 0.5 for 50%) of slack over the report's results."""
+    endpoints = {}
+    for name, result in report["endpoints"].items():
+        limits = {metric: round(result[metric] * (1 + headroom), 1) for metric in ("p95_ms", "p99_ms") if metric in result}
+        limits["min_throughput_rps"] = round(result["throughput_rps"] / (1 + headroom), 2)
+        limits["error_rate"] = 0.01
+        endpoints[name] = limits
+    return {
+        "config": report["config"],
+        "endpoints": endpoints,
+        "server": {"max_peak_rss_mb": round(report["server"]["peak_rss_mb"] * (1 + headroom))}
+    }
+
+
+def run(n_tickers: int, concurrency: int, duration: float, mix: Dict[str, float], workers: int,
+        shared_weights: bool, train_params: Dict[str, Any], bars: int, max_train_jobs: int = 1) -> Dict[str, Any]:
+    """Starts the fake data source and the server, trains every ticker's model, then drives the load."""
+    tickers = [f"LOAD{i}" for i in range(n_tickers)]
+    workdir = tempfile.mkdtemp(prefix="load-test-")
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    with FakeAlphaVantageServer(synthetic_bars=bars) as fake:
+        # Everything the server writes goes to the temporary directory.
+        env = dict(os.environ,
+                   ALPHA_VANTAGE_BASE_URL=fake.url,
+                   ALPHA_VANTAGE_API_KEY="load-test",
+                   ALPHA_VANTAGE_CACHE_DIR=os.path.join(workdir, "cache"),
+                   FEATURE_STORE_DIR=os.path.join(workdir, "features"),
+                   MODELS_DIR=os.path.join(workdir, "models"))
+        if shared_weights:
+            env["SHARED_WEIGHTS_DIR"] = os.path.join(workdir, "weights")
+        log_file = open(os.path.join(workdir, "server.log"), "w+")
+        server = start_server(port, env, workers, shared_weights, log_file)
+        sampler = None
+        try:
+            try:
+                wait_until_ready(base_url, server)
+            except (RuntimeError, TimeoutError):
+                log_file.seek(0)
+                print(log_file.read()[-4000:])
+                raise
+            print(f"Server ready at {base_url}; training {n_tickers} model(s)...")
+            with requests.Session() as session:
+                for ticker in tickers:
+                    train_and_wait(session, base_url, dict(train_params, ticker=ticker))
+
+            sampler = MemorySampler(server.pid).start()
+            print(f"Driving {concurrency} concurrent clients for {duration:.0f} s...")
+            endpoints = drive_load(base_url, tickers, mix, concurrency, duration, train_params,
+                                   max_train_jobs=max_train_jobs)
+        finally:
+            if sampler is not None:
+                sampler.stop()
+            server.terminate()
+            try:
+                server.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                server.kill()
+            log_file.close()
+            shutil.rmtree(workdir, ignore_errors=True)
+        fake_requests = fake.request_count
+
+    for name, result in endpoints.items():
+        percentiles = "  ".join(f"{m[:-3]}={result[m]:8.1f} ms" for m in ("p50_ms", "p95_ms", "p99_ms") if m in result)
+        skipped = f"  skipped={result['skipped']}" if "skipped" in result else ""
+        print(f"{name:<8} requests={result['requests']:<7} errors={result['errors']:<5} "
+              f"throughput={result['throughput_rps']:8.1f}/s  {percentiles}{skipped}")
+    server_report = {"peak_rss_mb": sampler.peak_rss_kb / 1024, "peak_pss_mb": sampler.peak_pss_kb / 1024,
+                     "upstream_requests": fake_requests}
+    print(f"server   peak_rss={server_report['peak_rss_mb']:.0f} MB  peak_pss={server_report['peak_pss_mb']:.0f} MB")
+    return {
+        "meta": {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count()
+        },
+        "config": {"tickers": n_tickers, "concurrency": concurrency, "duration_s": duration, "mix": mix,
+                   "workers": workers, "shared_weights": shared_weights, "bars": bars,
+                   "max_train_jobs": max_train_jobs, **train_params},
+        "endpoints": endpoints,
+        "server": server_report
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tickers", type=int, default=4, help="Number of tickers, each with its own model.")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent clients.")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds of load.")
+    parser.add_argument("--mix", default="predict=0.95,train=0.05", help="Relative weights of each endpoint.")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes.")
+    parser.add_argument("--shared-weights", action="store_true", help="Serve through api/serve.py with shared weights.")
+    parser.add_argument("--interval", default="60min")
+    parser.add_argument("--window-size", type=int, default=10)
+    parser.add_argument("--epochs", type=int, default=1, help="Epochs per training job.")
+    parser.add_argument("--max-train-jobs", type=int, default=1, help="Training jobs in flight at once.")
+    parser.add_argument("--bars", type=int, default=2000, help="Bars served per ticker by the fake data source.")
+    parser.add_argument("--output", default="load_results.json", help="Where to write the JSON results.")
+    parser.add_argument("--thresholds", help="A thresholds file to check the results against.")
+    parser.add_argument("--update-thresholds", action="store_true",
+                        help="Rewrite the thresholds file (default benchmarks/load_thresholds.json) from this run.")
+    parser.add_argument("--headroom", type=float, default=1.0,
+                        help="Slack allowed by --update-thresholds, e.g. 1.0 for 100%%.")
+    args = parser.parse_args(argv)
+
+    train_params = {"interval": args.interval, "window_size": args.window_size, "epochs": args.epochs}
+    report = run(args.tickers, args.concurrency, args.duration, parse_mix(args.mix), args.workers,
+                 args.shared_weights, train_params, args.bars, args.max_train_jobs)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    thresholds_path = args.thresholds or DEFAULT_THRESHOLDS
+    if args.update_thresholds:
+        with open(thresholds_path, "w") as f:
+            json.dump(thresholds_from_report(report, args.headroom), f, indent=2)
+        print(f"Thresholds written to {thresholds_path}")
+    elif args.thresholds:
+        with open(args.thresholds) as f:
+            thresholds = json.load(f)
+        if thresholds.get("config", report["config"]) != report["config"]:
+            print("Warning: the thresholds were recorded with a different load configuration.")
+        failures = check_thresholds(report, thresholds)
+        if failures:
+            print("Thresholds exceeded:")
+            for failure in failures:
+                print(f"  {failure}")
+            return 1
+        print("All thresholds met.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
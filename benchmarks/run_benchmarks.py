@@ -0,0 +1,181 @@
+"""
+Times and memory-profiles the data and model hot paths on synthetic OHLCV data.
+
+Usage:
+    python -m benchmarks.run_benchmarks --sizes 1000 100000 --output bench.json
+    python -m benchmarks.run_benchmarks --sizes 1000 100000 --baseline bench_baseline.json --tolerance 0.25
+
+Results are written as JSON. With --baseline, any benchmark whose median time exceeds the baseline by more
+than the tolerance is reported and the exit code is 1.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Add the project root to the Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from benchmarks.synthetic import generate_ohlcv, to_api_response
+from core.features.transforms import add_technical_features, scale_features
+from data.extractor import DataExtractor
+from data.processor import DataProcessor
+
+WINDOW_SIZE = 10
+
+
+def measure(fn: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    """Runs `fn` `repeat` times for timing, then once more under tracemalloc for the peak allocation."""
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+
+    gc.collect()
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "median_s": statistics.median(timings),
+        "min_s": min(timings),
+        "peak_mb": peak / (1024 * 1024)
+    }
+
+
+def data_benchmarks(n_bars: int, repeat: int, max_extractor_bars: int) -> List[Dict[str, Any]]:
+    """Benchmarks the extractor, processor and feature transforms on `n_bars` synthetic bars."""
+    bars = generate_ohlcv(n_bars)
+    with_gaps = bars.copy()
+    with_gaps.iloc[::97, 3] = np.nan
+    feature_frame = bars.rename(columns=str.capitalize)
+    technical = add_technical_features(feature_frame)
+
+    cases = {
+        "DataProcessor.clean_data": lambda: DataProcessor(with_gaps).clean_data(),
+        "DataProcessor.create_sequences": lambda: DataProcessor.create_sequences(bars, WINDOW_SIZE),
+        "add_technical_features": lambda: add_technical_features(feature_frame),
+        "scale_features": lambda: scale_features(technical)
+    }
+    if n_bars <= max_extractor_bars:
+        # Building the nested API dict is itself expensive, so it is only done up to a size limit.
+        response = to_api_response(bars)
+        cases["DataExtractor.extract_time_series_to_dataframe"] = \
+            lambda: DataExtractor(response).extract_time_series_to_dataframe()
+
+    results = []
+    for name, fn in cases.items():
+        result = {"name": name, "n_bars": n_bars}
+        result.update(measure(fn, repeat))
+        result["bars_per_s"] = n_bars / result["median_s"] if result["median_s"] else None
+        results.append(result)
+        print(f"{name:<50} n={n_bars:<10} median={result['median_s'] * 1000:10.2f} ms  peak={result['peak_mb']:8.1f} MB")
+    return results
+
+
+def model_benchmarks(batch_sizes: List[int], repeat: int) -> List[Dict[str, Any]]:
+    """Benchmarks FinancialModel.predict on single and batched inputs with an untrained model."""
+    from models.model_trainer import FinancialModel
+
+    model = FinancialModel(ticker="SYNTH")
+    model.build((WINDOW_SIZE, 5))
+    rng = np.random.default_rng(0)
+
+    results = []
+    for batch_size in batch_sizes:
+        inputs = rng.normal(size=(batch_size, WINDOW_SIZE, 5))
+        model.predict(inputs)  # each new batch shape is traced once before timing
+        result = {"name": "FinancialModel.predict", "batch_size": batch_size}
+        result.update(measure(lambda: model.predict(inputs), repeat))
+        result["predictions_per_s"] = batch_size / result["median_s"] if result["median_s"] else None
+        results.append(result)
+        print(f"{'FinancialModel.predict':<50} batch={batch_size:<6} median={result['median_s'] * 1000:10.2f} ms")
+    return results
+
+
+def result_key(result: Dict[str, Any]) -> str:
+    if "batch_size" in result:
+        return f"{result['name']}[batch={result['batch_size']}]"
+    return f"{result['name']}[n={result['n_bars']}]"
+
+
+def compare_to_baseline(results: List[Dict[str, Any]], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Returns a description of every benchmark that is slower than its baseline by more than `tolerance`."""
+    baseline_by_key = {result_key(r): r for r in baseline.get("results", [])}
+    regressions = []
+    for result in results:
+        reference = baseline_by_key.get(result_key(result))
+        if reference is None:
+            continue
+        ratio = result["median_s"] / reference["median_s"] if reference["median_s"] else 1.0
+        if ratio > 1.0 + tolerance:
+            regressions.append(f"{result_key(result)}: {reference['median_s'] * 1000:.2f} ms -> "
+                               f"{result['median_s'] * 1000:.2f} ms ({ratio:.2f}x)")
+    return regressions
+
+
+def run(sizes: List[int], batch_sizes: List[int], repeat: int, max_extractor_bars: int,
+        include_model: bool) -> Dict[str, Any]:
+    results = []
+    for n_bars in sizes:
+        results.extend(data_benchmarks(n_bars, repeat, max_extractor_bars))
+    if include_model:
+        results.extend(model_benchmarks(batch_sizes, repeat))
+    return {
+        "meta": {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "repeat": repeat
+        },
+        "results": results
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000], help="Numbers of bars to benchmark.")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 32, 256], help="Predict batch sizes.")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per benchmark.")
+    parser.add_argument("--max-extractor-bars", type=int, default=1_000_000,
+                        help="Largest size the extractor is benchmarked at.")
+    parser.add_argument("--skip-model", action="store_true", help="Skip the FinancialModel benchmarks.")
+    parser.add_argument("--output", default="bench_results.json", help="Where to write the JSON results.")
+    parser.add_argument("--baseline", help="A previous results file to compare against.")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown against the baseline.")
+    args = parser.parse_args(argv)
+
+    report = run(args.sizes, args.batch_sizes, args.repeat, args.max_extractor_bars, not args.skip_model)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(report["results"], baseline, args.tolerance)
+        if regressions:
+            print("Regressions against baseline:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print("No regressions against baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
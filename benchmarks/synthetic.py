@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+from typing import Any, Dict
+
+from data.cache import BAR_FIELDS, frame_to_time_series
+
+
+def generate_ohlcv(n_bars: int, seed: int = 42, start: str = "2020-01-01 09:00:00", freq: str = "60min",
+                   start_price: float = 100.0, volatility: float = 0.002, chunk_size: int = 1_000_000) -> pd.DataFrame:
+    """
+    Generates a deterministic synthetic OHLCV series as a geometric random walk.
+
+    The same arguments always produce the same bars. Bars are generated in chunks, so tens of millions
+    of bars can be produced without large temporary arrays.
+
+    Args:
+        n_bars: The number of bars to generate.
+        seed: The random seed.
+        start: The timestamp of the first bar.
+        freq: The spacing between bars.
+        start_price: The opening price of the first bar.
+        volatility: The standard deviation of the per-bar log return.
+        chunk_size: The number of bars generated per chunk.
+
+    Returns:
+        A DataFrame in the DataExtractor output schema (open, high, low, close, volume) with a DatetimeIndex.
+    """
+    rng = np.random.default_rng(seed)
+    columns = {name: np.empty(n_bars, dtype=np.float64) for name in ("open", "high", "low", "close", "volume")}
+    last_close = start_price
+    for begin in range(0, n_bars, chunk_size):
+        end = min(begin + chunk_size, n_bars)
+        size = end - begin
+        log_returns = rng.normal(0.0, volatility, size)
+        close = last_close * np.exp(np.cumsum(log_returns))
+        open_ = np.empty(size)
+        open_[0] = last_close
+        open_[1:] = close[:-1]
+        wick = np.abs(rng.normal(0.0, volatility, (2, size))) * close
+
+        columns["open"][begin:end] = open_
+        columns["close"][begin:end] = close
+        columns["high"][begin:end] = np.maximum(open_, close) + wick[0]
+        columns["low"][begin:end] = np.minimum(open_, close) - wick[1]
+        columns["volume"][begin:end] = rng.integers(1_000, 1_000_000, size)
+        last_close = close[-1]
+
+    index = pd.date_range(start=start, periods=n_bars, freq=freq)
+    return pd.DataFrame(columns, index=index)
+
+
+def to_api_response(df: pd.DataFrame, interval: str = "60min") -> Dict[str, Any]:
+    """Converts synthetic bars into the Alpha Vantage TIME_SERIES_INTRADAY response structure (string values)."""
+    bars = df.round(4).astype(str).rename(columns=dict(zip(["open", "high", "low", "close", "volume"], BAR_FIELDS)))
+    return {
+        "Meta Data": {"2. Symbol": "SYNTH", "4. Interval": interval},
+        f"Time Series ({interval})": frame_to_time_series(bars)
+    }
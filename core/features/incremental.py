@@ -0,0 +1,211 @@
+import json
+import math
+from collections import deque
+from typing import Any, Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+class RollingMean:
+    """
+    A fixed-window rolling mean updated one value at a time.
+
+    It repeats the arithmetic of pandas' `rolling(window).mean()` step for step (Kahan-compensated
+    adds and removes, the same clamping rules), so its output is bit-for-bit identical to the batch
+    computation over the same values.
+    """
+    def __init__(self, window: int):
+        self.window = window
+        self.values = deque()
+        self.nobs = 0
+        self.sum_x = 0.0
+        self.neg_ct = 0
+        self.compensation_add = 0.0
+        self.compensation_remove = 0.0
+        self.num_consecutive_same_value = 0
+        self.prev_value = None
+
+    def update(self, value: float) -> float:
+        """Adds the next value and returns the mean of the current window (NaN until it is full)."""
+        value = float(value)
+        if self.prev_value is None:
+            self.prev_value = value
+        if len(self.values) == self.window:
+            self._remove(self.values.popleft())
+        self.values.append(value)
+        self._add(value)
+        return self._mean()
+
+    def _add(self, value: float):
+        if value != value:
+            return
+        self.nobs += 1
+        y = value - self.compensation_add
+        t = self.sum_x + y
+        self.compensation_add = t - self.sum_x - y
+        self.sum_x = t
+        if math.copysign(1.0, value) < 0:
+            self.neg_ct += 1
+        if value == self.prev_value:
+            self.num_consecutive_same_value += 1
+        else:
+            self.num_consecutive_same_value = 1
+        self.prev_value = value
+
+    def _remove(self, value: float):
+        if value != value:
+            return
+        self.nobs -= 1
+        y = -value - self.compensation_remove
+        t = self.sum_x + y
+        self.compensation_remove = t - self.sum_x - y
+        self.sum_x = t
+        if math.copysign(1.0, value) < 0:
+            self.neg_ct -= 1
+
+    def _mean(self) -> float:
+        if self.nobs < self.window or self.nobs == 0:
+            return math.nan
+        result = self.sum_x / self.nobs
+        if self.num_consecutive_same_value >= self.nobs:
+            result = self.prev_value
+        elif self.neg_ct == 0 and result < 0:
+            result = 0.0
+        elif self.neg_ct == self.nobs and result > 0:
+            result = 0.0
+        return result
+
+    def state_dict(self) -> Dict[str, Any]:
+        state = dict(self.__dict__)
+        state["values"] = list(self.values)
+        return state
+
+    def load_state_dict(self, state: Dict[str, Any]):
+        self.__dict__.update(state)
+        self.values = deque(state["values"])
+
+
+class _TickerIndicators:
+    def __init__(self, rsi_window: int, ma_window: int):
+        self.prev_close = math.nan
+        self.avg_gain = RollingMean(rsi_window)
+        self.avg_loss = RollingMean(rsi_window)
+        self.ma = RollingMean(ma_window)
+
+    def update(self, close: float) -> Tuple[float, float]:
+        close = float(close)
+        delta = close - self.prev_close
+        self.prev_close = close
+        # Same as delta.where(delta > 0, 0) and -delta.where(delta < 0, 0), including the -0.0 losses.
+        gain = delta if delta > 0 else 0.0
+        loss = -(delta if delta < 0 else 0.0)
+        avg_gain = np.float64(self.avg_gain.update(gain))
+        avg_loss = np.float64(self.avg_loss.update(loss))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rs = avg_gain / avg_loss
+            rsi = 100 - (100 / (1 + rs))
+        return float(rsi), self.ma.update(close)
+
+    def state_dict(self) -> Dict[str, Any]:
+        return {
+            "prev_close": self.prev_close,
+            "avg_gain": self.avg_gain.state_dict(),
+            "avg_loss": self.avg_loss.state_dict(),
+            "ma": self.ma.state_dict()
+        }
+
+    def load_state_dict(self, state: Dict[str, Any]):
+        self.prev_close = state["prev_close"]
+        self.avg_gain.load_state_dict(state["avg_gain"])
+        self.avg_loss.load_state_dict(state["avg_loss"])
+        self.ma.load_state_dict(state["ma"])
+
+
+class IncrementalIndicators:
+    """
+    Maintains RSI and moving-average state per ticker and updates it in constant time per new bar.
+
+    Feeding a ticker's bars in order gives exactly the RSI and MA columns of `add_technical_features`
+    over the same history, and the state can be checkpointed and restored between runs.
+    """
+    def __init__(self, rsi_window: int = 14, ma_window: int = 20, close_column: str = 'Close'):
+        """
+        Initializes the IncrementalIndicators.
+
+        Args:
+            rsi_window: The window for the RSI averages.
+            ma_window: The window for the moving average.
+            close_column: The name of the close price column in DataFrames passed to update_frame().
+        """
+        self.rsi_window = rsi_window
+        self.ma_window = ma_window
+        self.close_column = close_column
+        self._tickers: Dict[str, _TickerIndicators] = {}
+
+    def update(self, ticker: str, close: float) -> Tuple[float, float]:
+        """
+        Adds the next close price for a ticker.
+
+        Returns:
+            A tuple (rsi, ma) for the new bar; either may be NaN while the windows fill up.
+        """
+        state = self._tickers.get(ticker)
+        if state is None:
+            state = self._tickers[ticker] = _TickerIndicators(self.rsi_window, self.ma_window)
+        return state.update(close)
+
+    def update_frame(self, ticker: str, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Adds a block of new bars for a ticker.
+
+        Args:
+            ticker: The ticker symbol.
+            df: The new bars, oldest first.
+
+        Returns:
+            A new DataFrame with 'RSI' and 'MA' columns, with incomplete rows dropped as in add_technical_features().
+        """
+        indicators = [self.update(ticker, close) for close in df[self.close_column].to_numpy(dtype=np.float64)]
+        df = df.copy()
+        df['RSI'] = [rsi for rsi, _ in indicators]
+        df['MA'] = [ma for _, ma in indicators]
+        return df.dropna()
+
+    def reset(self, ticker: str):
+        """Forgets the state of a ticker."""
+        self._tickers.pop(ticker, None)
+
+    def state_dict(self) -> Dict[str, Any]:
+        """Returns a JSON-serializable checkpoint of all ticker states."""
+        return {
+            "rsi_window": self.rsi_window,
+            "ma_window": self.ma_window,
+            "close_column": self.close_column,
+            "tickers": {ticker: state.state_dict() for ticker, state in self._tickers.items()}
+        }
+
+    def load_state_dict(self, state: Dict[str, Any]):
+        """Restores the ticker states from a checkpoint made by state_dict()."""
+        self.rsi_window = state["rsi_window"]
+        self.ma_window = state["ma_window"]
+        self.close_column = state["close_column"]
+        self._tickers = {}
+        for ticker, ticker_state in state["tickers"].items():
+            indicators = _TickerIndicators(self.rsi_window, self.ma_window)
+            indicators.load_state_dict(ticker_state)
+            self._tickers[ticker] = indicators
+
+    def save(self, file_path: str):
+        """Saves a checkpoint to a JSON file."""
+        with open(file_path, 'w') as f:
+            json.dump(self.state_dict(), f)
+
+    @classmethod
+    def load(cls, file_path: str) -> 'IncrementalIndicators':
+        """Restores an engine from a checkpoint saved with save()."""
+        with open(file_path) as f:
+            state = json.load(f)
+        engine = cls()
+        engine.load_state_dict(state)
+        return engine
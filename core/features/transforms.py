@@ -4,14 +4,21 @@ from typing import Tuple
 
 def calculate_rsi(df: pd.DataFrame, window: int = 14) -> pd.Series:
     """Calculates the Relative Strength Index (RSI) for a given DataFrame."""
-    close_prices = df['Close']
+    return rsi_from_close(df['Close'], window).rename('RSI')
+
+def rsi_from_close(close_prices, window: int = 14):
+    """
+    Calculates the RSI of a close price Series, or of every column of a DataFrame of close prices.
+
+    Each column is computed exactly as a Series would be, so the panel path matches the per-ticker one.
+    """
     delta = close_prices.diff()
     gain = delta.where(delta > 0, 0)
     loss = -delta.where(delta < 0, 0)
     avg_gain = gain.rolling(window=window).mean()
     avg_loss = loss.rolling(window=window).mean()
     rs = avg_gain / avg_loss
-    return (100 - (100 / (1 + rs))).rename('RSI')
+    return 100 - (100 / (1 + rs))
 
 def add_technical_features(df: pd.DataFrame, ma_window: int = 20) -> pd.DataFrame:
     """
@@ -1,27 +1,31 @@
-from numpy.f2py.crackfortran import verbose
-
 from core.models.base_model import BaseModel
+from core.models.numpy_lstm import NumpyLSTM
+from data.dataset import WindowedDataset
 import pandas as pd
 import numpy as np
-import tensorflow as tf
-from tensorflow.keras.models import Sequential, load_model
-from tensorflow.keras.layers import LSTM, Dense, Dropout
+from typing import Optional, Tuple
+
+DEFAULT_HYPERPARAMETERS = {
+    'lstm_units': 50,
+    'dropout_rate': 0.2,
+    'epochs': 50,
+    'batch_size': 32,
+    'learning_rate': 0.001
+}
 
 class LSTMModel(BaseModel):
 
     def __init__(self, model_name: str, hyperparameters: dict ):
         if hyperparameters is None:
-            hyperparameters = {
-                'lstm_units': 50,
-                'dropout_rate': 0.2,
-                'epochs': 50,
-                'batch_size': 32,
-                'learning_rate': 0.001
-            }
+            hyperparameters = dict(DEFAULT_HYPERPARAMETERS)
         super().__init__(model_name, hyperparameters)
         self.model = None
 
     def build_model(self, input_shape: tuple):
+        import tensorflow as tf
+        from tensorflow.keras.models import Sequential
+        from tensorflow.keras.layers import LSTM, Dense, Dropout
+
         model = Sequential([
             LSTM(units=self.hyperparameters['lstm_units'],
                  return_sequences=False,
@@ -33,19 +37,45 @@ class LSTMModel(BaseModel):
         model.compile(optimizer=optimizer, loss='mean_squared_error')
         self.model = model
 
-    def train(self, X_train: pd.DataFrame, y_train: pd.Series):
-
+    def train(self, X_train: pd.DataFrame, y_train: pd.Series, streaming: bool = False,
+              validation_data: Optional[Tuple[pd.DataFrame, pd.Series]] = None, callbacks: Optional[list] = None):
+        """
+        Trains the model. With streaming=True, batches are generated lazily from X_train
+        instead of handing Keras a reshaped copy of the whole training set.
+        If validation_data (X_val, y_val) is given, val_loss is reported to the callbacks after every epoch.
+        """
         n_features = X_train.shape[1]
-        X_train_reshaped = X_train.values.reshape((X_train.shape[0], 1, n_features))
-        self.build_model((X_train_reshaped.shape[1], n_features))
-        self.history = self.model.fit(
-            X_train_reshaped,
-            y_train.values,
-            epochs=self.hyperparameters['epochs'],
-            batch_size=self.hyperparameters['batch_size'],
-            verbose=2,
-            shuffle=False
-        )
+        self.build_model((1, n_features))
+        if streaming:
+            # Each sample is a window of one row, paired with the target of that same row.
+            dataset = WindowedDataset(X_train.values, y_train.values, window_size=1, horizon=0,
+                                      batch_size=self.hyperparameters['batch_size'])
+            if validation_data is not None:
+                X_val, y_val = validation_data
+                validation_data = WindowedDataset(X_val.values, y_val.values, window_size=1, horizon=0,
+                                                  batch_size=self.hyperparameters['batch_size']).to_keras(workers=1)
+            self.history = self.model.fit(
+                dataset.to_keras(),
+                epochs=self.hyperparameters['epochs'],
+                validation_data=validation_data,
+                callbacks=callbacks,
+                verbose=2
+            )
+        else:
+            X_train_reshaped = X_train.values.reshape((X_train.shape[0], 1, n_features))
+            if validation_data is not None:
+                X_val, y_val = validation_data
+                validation_data = (X_val.values.reshape((X_val.shape[0], 1, n_features)), y_val.values)
+            self.history = self.model.fit(
+                X_train_reshaped,
+                y_train.values,
+                epochs=self.hyperparameters['epochs'],
+                batch_size=self.hyperparameters['batch_size'],
+                validation_data=validation_data,
+                callbacks=callbacks,
+                verbose=2,
+                shuffle=False
+            )
         print(f"{self.model_name} training complete.")
 
     def predict(self, X_test: pd.DataFrame) -> pd.Series:
@@ -64,6 +94,15 @@ class LSTMModel(BaseModel):
         self.model.save(file_path)
         print(f"Model saved to {file_path}.")
 
+    def export_weights(self, file_path: str):
+        """Exports the weights to a .npz file that NumpyLSTM can run without TensorFlow."""
+        if self.model is None:
+            raise ValueError("Model has not been trained; nothing to export.")
+        NumpyLSTM.from_keras(self.model).save(file_path)
+        print(f"Weights exported to {file_path}.")
+
     def load(self, file_path: str):
+        from tensorflow.keras.models import load_model
+
         self.model = load_model(file_path)
         print(f"Model loaded from {file_path}.")
\ No newline at end of file
@@ -0,0 +1,188 @@
+import json
+import os
+import numpy as np
+from typing import Any, Dict, List
+
+_ACTIVATIONS = {
+    'linear': lambda x: x,
+    'tanh': np.tanh,
+    'sigmoid': lambda x: 0.5 * (1.0 + np.tanh(0.5 * x)),
+    'relu': lambda x: np.maximum(x, 0.0)
+}
+
+
+def _activation(name: str):
+    if name not in _ACTIVATIONS:
+        raise ValueError(f"Activation '{name}' is not supported by the NumPy inference engine.")
+    return _ACTIVATIONS[name]
+
+
+def _matmul(x: np.ndarray, kernel: np.ndarray) -> np.ndarray:
+    """x @ kernel, where a stacked kernel of shape (batch_size, n_in, n_out) holds one kernel per row of x."""
+    if kernel.ndim == 2:
+        return x @ kernel
+    if x.ndim == 2:
+        return np.matmul(x[:, np.newaxis], kernel)[:, 0]
+    return np.matmul(x, kernel)
+
+
+def _row_bias(layer: Dict[str, Any], x: np.ndarray) -> np.ndarray:
+    """The layer's bias, shaped to broadcast over x when the layer is stacked."""
+    bias = layer['bias']
+    if layer['kernel'].ndim == 2 or x.ndim == 2:
+        return bias
+    return bias[:, np.newaxis]
+
+
+class NumpyLSTM:
+    """
+    A NumPy-only forward pass for the LSTM -> Dropout -> Dense stacks built by FinancialModel and LSTMModel.
+
+    The weights are exported once from a trained Keras model into a compact .npz file, after which
+    predictions need neither TensorFlow nor Keras. Dropout is a no-op at inference and is skipped.
+    """
+    def __init__(self, layers: List[Dict[str, Any]]):
+        """
+        Initializes the NumpyLSTM.
+
+        Args:
+            layers: The layer specs, each with a 'type' ('lstm' or 'dense'), its activations and weight arrays.
+        """
+        self.layers = layers
+
+    @classmethod
+    def from_keras(cls, keras_model: Any) -> 'NumpyLSTM':
+        """Copies the weights and activations out of a Keras Sequential model."""
+        layers = []
+        for layer in keras_model.layers:
+            kind = type(layer).__name__
+            if kind == 'Dropout':
+                continue
+            weights = [np.asarray(w, dtype=np.float32) for w in layer.get_weights()]
+            if kind == 'LSTM':
+                kernel, recurrent_kernel, bias = weights if layer.use_bias else weights + [None]
+                layers.append({
+                    'type': 'lstm',
+                    'units': layer.units,
+                    'return_sequences': layer.return_sequences,
+                    'activation': layer.activation.__name__,
+                    'recurrent_activation': layer.recurrent_activation.__name__,
+                    'kernel': kernel,
+                    'recurrent_kernel': recurrent_kernel,
+                    'bias': bias if bias is not None else np.zeros(4 * layer.units, dtype=np.float32)
+                })
+            elif kind == 'Dense':
+                kernel, bias = weights if layer.use_bias else weights + [None]
+                layers.append({
+                    'type': 'dense',
+                    'activation': layer.activation.__name__,
+                    'kernel': kernel,
+                    'bias': bias if bias is not None else np.zeros(kernel.shape[1], dtype=np.float32)
+                })
+            else:
+                raise ValueError(f"Layer type '{kind}' is not supported by the NumPy inference engine.")
+        return cls(layers)
+
+    @classmethod
+    def stack(cls, models: List['NumpyLSTM'], model_index: np.ndarray) -> 'NumpyLSTM':
+        """
+        Combines models of the same architecture into one that runs a different model per batch row.
+
+        Row b of the batches passed to the stacked model's predict() goes through models[model_index[b]],
+        so inputs for several models (e.g. several tickers) take one forward pass instead of one each.
+
+        Raises:
+            ValueError: If the models' layers differ in type, activation or weight shape.
+        """
+        first = models[0]
+        if any(model.architecture() != first.architecture() for model in models[1:]):
+            raise ValueError("Only models with the same architecture can be stacked.")
+        model_index = np.asarray(model_index)
+        layers = []
+        for index, layer in enumerate(first.layers):
+            stacked = dict(layer)
+            for key, value in layer.items():
+                if isinstance(value, np.ndarray):
+                    stacked[key] = np.stack([model.layers[index][key] for model in models])[model_index]
+            layers.append(stacked)
+        return cls(layers)
+
+    def architecture(self) -> List[Dict[str, Any]]:
+        """The layer specs with each weight array replaced by its shape."""
+        return [{key: value.shape if isinstance(value, np.ndarray) else value for key, value in layer.items()}
+                for layer in self.layers]
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """
+        Runs the forward pass.
+
+        Args:
+            X: The input sequences, of shape (batch_size, window_size, n_features).
+
+        Returns:
+            The predictions, of shape (batch_size, output_units).
+        """
+        outputs = np.asarray(X, dtype=np.float32)
+        for layer in self.layers:
+            if layer['type'] == 'lstm':
+                outputs = self._lstm_forward(layer, outputs)
+            else:
+                outputs = _activation(layer['activation'])(_matmul(outputs, layer['kernel']) + _row_bias(layer, outputs))
+        return outputs
+
+    @staticmethod
+    def _lstm_forward(layer: Dict[str, Any], inputs: np.ndarray) -> np.ndarray:
+        batch_size, timesteps, _ = inputs.shape
+        units = layer['units']
+        activation = _activation(layer['activation'])
+        recurrent_activation = _activation(layer['recurrent_activation'])
+
+        # The input projection of every timestep is a single matmul; only the recurrence is sequential.
+        projected = _matmul(inputs, layer['kernel']) + _row_bias(layer, inputs)
+        h = np.zeros((batch_size, units), dtype=np.float32)
+        c = np.zeros((batch_size, units), dtype=np.float32)
+        sequence = np.empty((batch_size, timesteps, units), dtype=np.float32) if layer['return_sequences'] else None
+        for t in range(timesteps):
+            z = projected[:, t] + _matmul(h, layer['recurrent_kernel'])
+            # Keras gate order: input, forget, cell, output.
+            i = recurrent_activation(z[:, :units])
+            f = recurrent_activation(z[:, units:2 * units])
+            c = f * c + i * activation(z[:, 2 * units:3 * units])
+            o = recurrent_activation(z[:, 3 * units:])
+            h = o * activation(c)
+            if sequence is not None:
+                sequence[:, t] = h
+        return sequence if sequence is not None else h
+
+    def save(self, file_path: str):
+        """Saves the layer specs and weights to a single .npz file, replacing it atomically."""
+        arrays = {}
+        specs = []
+        for index, layer in enumerate(self.layers):
+            spec = {}
+            for key, value in layer.items():
+                if isinstance(value, np.ndarray):
+                    arrays[f'layer{index}_{key}'] = value
+                else:
+                    spec[key] = value
+            specs.append(spec)
+        arrays['spec'] = np.array(json.dumps(specs))
+
+        tmp_path = f'{file_path}.{os.getpid()}.tmp.npz'
+        np.savez(tmp_path, **arrays)
+        os.replace(tmp_path, file_path)
+
+    @classmethod
+    def load(cls, file_path: str) -> 'NumpyLSTM':
+        """Loads a model saved with save()."""
+        with np.load(file_path) as archive:
+            specs = json.loads(str(archive['spec']))
+            layers = []
+            for index, spec in enumerate(specs):
+                layer = dict(spec)
+                prefix = f'layer{index}_'
+                for name in archive.files:
+                    if name.startswith(prefix):
+                        layer[name[len(prefix):]] = archive[name]
+                layers.append(layer)
+        return cls(layers)
@@ -0,0 +1,55 @@
+import numpy as np
+from multiprocessing import shared_memory
+from typing import Tuple
+
+
+class SharedArray:
+    """
+    A NumPy array stored in a named shared-memory block.
+
+    The creating process copies the data in once; worker processes attach to it by its picklable `spec`
+    and read it in place, instead of each receiving a pickled copy.
+    """
+    def __init__(self, shm: shared_memory.SharedMemory, shape: Tuple[int, ...], dtype: str, owner: bool):
+        self._shm = shm
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.owner = owner
+        self.array = np.ndarray(self.shape, dtype=self.dtype, buffer=shm.buf)
+
+    @classmethod
+    def create(cls, array: np.ndarray) -> 'SharedArray':
+        """Copies `array` into a new shared-memory block owned by the calling process."""
+        array = np.ascontiguousarray(array)
+        shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        shared = cls(shm, array.shape, array.dtype.str, owner=True)
+        shared.array[...] = array
+        return shared
+
+    @classmethod
+    def attach(cls, spec: Tuple[str, Tuple[int, ...], str], readonly: bool = True) -> 'SharedArray':
+        """Attaches to a block created elsewhere, given its spec."""
+        name, shape, dtype = spec
+        shared = cls(shared_memory.SharedMemory(name=name), shape, dtype, owner=False)
+        if readonly:
+            shared.array.flags.writeable = False
+        return shared
+
+    @property
+    def spec(self) -> Tuple[str, Tuple[int, ...], str]:
+        """The (name, shape, dtype) triple other processes attach with."""
+        return self._shm.name, self.shape, self.dtype.str
+
+    def close(self):
+        """Detaches from the block, and frees it if this process created it."""
+        self.array = None
+        self._shm.close()
+        if self.owner:
+            self._shm.unlink()
+
+    def __enter__(self) -> 'SharedArray':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
@@ -0,0 +1,202 @@
+import asyncio
+import os
+import random
+import time
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple, Union
+
+import httpx
+
+from data.cache import ResponseCache, time_series_to_frame
+from data.connector import AlphaVantageConnector, intraday_params, merge_top_up, time_series_key
+from infrastructure.metrics import span
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class RateLimitedError(RuntimeError):
+    """Raised when Alpha Vantage keeps answering with its call-frequency note after every retry."""
+
+
+class TokenBucket:
+    """
+    An asyncio token bucket: `rate_per_minute` tokens are added per minute, up to `capacity`.
+
+    With the default capacity of 1, requests are spaced evenly and no 60 s window ever sees more than
+    rate_per_minute + 1 of them. Larger capacities allow bursts at the cost of that guarantee.
+    """
+    def __init__(self, rate_per_minute: float, capacity: float = 1, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity
+        self.tokens = capacity
+        self._clock = clock
+        self._updated = clock()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Waits until a token is available and takes it."""
+        async with self._lock:
+            while True:
+                now = self._clock()
+                self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class AsyncAlphaVantageConnector:
+    """
+    An asyncio Alpha Vantage connector for refreshing many tickers concurrently.
+
+    All requests share one pooled HTTP client and one token bucket sized to the account's per-minute
+    quota. Failed requests (connection errors, 429/5xx, and the 200 "Note" Alpha Vantage sends when
+    throttling) are retried with full-jitter exponential backoff. Concurrent fetches of the same ticker and
+    interval share a single request. Responses go through the same ResponseCache top-up as
+    AlphaVantageConnector.
+    """
+    def __init__(self, api_key: str, base_url: Optional[str] = None, requests_per_minute: Optional[float] = None,
+                 burst: float = 1, max_connections: int = 10, timeout: float = 10.0, max_retries: int = 3,
+                 backoff_base: float = 0.5, backoff_max: float = 8.0, cache: Optional[ResponseCache] = None,
+                 use_cache: bool = True, transport: Optional[httpx.AsyncBaseTransport] = None):
+        """
+        Initializes the AsyncAlphaVantageConnector.
+
+        Args:
+            api_key: The Alpha Vantage API key.
+            base_url: The API root. Defaults to ALPHA_VANTAGE_BASE_URL, then the real API.
+            requests_per_minute: The account's quota. Defaults to ALPHA_VANTAGE_REQUESTS_PER_MINUTE, then 5.
+            burst: The token bucket capacity.
+            max_connections: The size of the connection pool.
+            timeout: The timeout of each request, in seconds.
+            max_retries: How many times a failed request is retried.
+            backoff_base: The backoff before the first retry; it doubles with each retry.
+            backoff_max: The cap on the backoff.
+            cache: The response cache. Created from the environment if None and use_cache is True.
+            use_cache: Whether to cache responses.
+            transport: An httpx transport to use instead of the network, e.g. for tests.
+        """
+        self.api_key = api_key
+        self.base_url = (base_url or os.getenv("ALPHA_VANTAGE_BASE_URL") or AlphaVantageConnector.BASE_URL).rstrip("/")
+        if requests_per_minute is None:
+            requests_per_minute = float(os.getenv("ALPHA_VANTAGE_REQUESTS_PER_MINUTE", 5))
+        self.rate_limiter = TokenBucket(requests_per_minute, burst)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        if cache is None and use_cache:
+            cache = ResponseCache.from_env()
+        self.cache = cache
+        self.client = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            transport=transport
+        )
+        self._in_flight: Dict[Tuple[str, str], asyncio.Task] = {}
+
+    async def __aenter__(self) -> 'AsyncAlphaVantageConnector':
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+        return False
+
+    async def close(self):
+        await self.client.aclose()
+
+    async def fetch_time_series_intraday(self, ticker: str, interval: str) -> Dict[str, Any]:
+        """
+        Fetches a ticker's intraday series. A fetch of the same ticker and interval that is already
+        running is joined instead of starting another request.
+        """
+        key = (ticker, interval)
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(ticker, interval))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _, key=key: self._in_flight.pop(key, None))
+        # Shielded, so one caller being cancelled does not cancel the request for the others.
+        return await asyncio.shield(task)
+
+    async def fetch_many(self, tickers: Iterable[str], interval: str) -> Dict[str, Union[Dict[str, Any], Exception]]:
+        """
+        Fetches many tickers concurrently, within the rate limit.
+
+        Returns:
+            Each ticker's response, or the exception its fetch raised.
+        """
+        tickers = list(dict.fromkeys(tickers))
+        results = await asyncio.gather(*(self.fetch_time_series_intraday(ticker, interval) for ticker in tickers),
+                                       return_exceptions=True)
+        return dict(zip(tickers, results))
+
+    async def _fetch(self, ticker: str, interval: str) -> Dict[str, Any]:
+        params = intraday_params(ticker, interval, self.api_key)
+        if self.cache is None:
+            return await self._make_request('query', params)
+
+        cached_bars = await asyncio.to_thread(self.cache.get, ticker, interval)
+        if cached_bars is not None and not cached_bars.empty:
+            # Top up the cached series with the latest bars only.
+            response = await self._make_request('query', dict(params, outputsize='compact'))
+            response, merged = merge_top_up(cached_bars, response, ticker, interval)
+            if response is not None:
+                if merged is not None:
+                    await asyncio.to_thread(self.cache.put, ticker, interval, merged)
+                return response
+            # The cache is too old for the top-up to reach it, so the whole series is fetched again.
+            params = dict(params, outputsize='full')
+
+        response = await self._make_request('query', params)
+        series_key = time_series_key(response)
+        if series_key:
+            await asyncio.to_thread(self.cache.put, ticker, interval, time_series_to_frame(response[series_key]))
+        return response
+
+    async def _make_request(self, endpoint: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        url = f"/{endpoint}"
+        for attempt in range(self.max_retries + 1):
+            await self.rate_limiter.acquire()
+            retry = attempt < self.max_retries
+            try:
+                with span("connector_request") as s:
+                    response = await self.client.get(url, params=params)
+                    s.record(nbytes=len(response.content))
+                if response.status_code in RETRY_STATUS_CODES and retry:
+                    print(f"HTTP {response.status_code} for {self.base_url}{url}; retrying")
+                else:
+                    response.raise_for_status()
+                    body = response.json()
+                    if not _is_throttled(body):
+                        return body
+                    if not retry:
+                        raise RateLimitedError(body.get("Note") or body.get("Information"))
+                    print(f"Rate limited by {self.base_url}; retrying")
+            except httpx.TransportError as e:
+                if not retry:
+                    print(f"Request Exception for {self.base_url}{url}: {e}")
+                    raise
+                print(f"Request Exception for {self.base_url}{url}: {e}; retrying")
+            except httpx.HTTPStatusError as e:
+                print(f"HTTP Error for {self.base_url}{url}: {e}")
+                raise
+            await asyncio.sleep(self._backoff(attempt))
+
+    def _backoff(self, attempt: int) -> float:
+        # Full jitter: a uniform delay up to the exponential cap, so retrying clients spread out.
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+
+def _is_throttled(body: Any) -> bool:
+    """Alpha Vantage signals throttling with a 200 response holding only a 'Note' or 'Information' message."""
+    return isinstance(body, dict) and time_series_key(body) is None and ("Note" in body or "Information" in body)
+
+
+def fetch_many(api_key: str, tickers: Iterable[str], interval: str,
+               **kwargs) -> Dict[str, Union[Dict[str, Any], Exception]]:
+    """Fetches many tickers concurrently from synchronous code. kwargs go to AsyncAlphaVantageConnector."""
+    async def run() -> Dict[str, Union[Dict[str, Any], Exception]]:
+        async with AsyncAlphaVantageConnector(api_key, **kwargs) as connector:
+            return await connector.fetch_many(tickers, interval)
+    return asyncio.run(run())
@@ -0,0 +1,136 @@
+import io
+import os
+import re
+import threading
+import time
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, Optional
+
+# Alpha Vantage field names, in the column order stored on disk.
+BAR_FIELDS = ["1. open", "2. high", "3. low", "4. close", "5. volume"]
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+class ResponseCache:
+    """
+    An on-disk, columnar cache of intraday bars keyed by ticker and interval.
+
+    Each entry is a single .npz file holding the bar timestamps and one float64 array per
+    OHLCV field. Entries older than `ttl_seconds` are evicted, and the least recently used
+    entries are evicted once the cache grows beyond `max_bytes`.
+    """
+    def __init__(self, cache_dir: str, ttl_seconds: float = 24 * 3600, max_bytes: int = 256 * 1024 * 1024):
+        """
+        Initializes the ResponseCache.
+
+        Args:
+            cache_dir: The directory to store cache entries in. Created if missing.
+            ttl_seconds: The maximum age of an entry, measured from its last update.
+            max_bytes: The maximum total size of all entries on disk.
+        """
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @classmethod
+    def from_env(cls) -> 'ResponseCache':
+        """Creates a cache in ALPHA_VANTAGE_CACHE_DIR, defaulting to 'data/cache' in the project."""
+        default_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache')
+        cache_dir = os.getenv("ALPHA_VANTAGE_CACHE_DIR") or default_dir
+        ttl_seconds = float(os.getenv("ALPHA_VANTAGE_CACHE_TTL", 24 * 3600))
+        return cls(cache_dir, ttl_seconds=ttl_seconds)
+
+    def _entry_path(self, ticker: str, interval: str) -> str:
+        key = re.sub(r"[^A-Za-z0-9.-]", "_", f"{ticker.upper()}_{interval}")
+        return os.path.join(self.cache_dir, f"{key}.npz")
+
+    def get(self, ticker: str, interval: str) -> Optional[pd.DataFrame]:
+        """
+        Returns the cached bars for a ticker and interval, or None on a miss or expired entry.
+
+        The returned DataFrame is indexed by timestamp and has the Alpha Vantage field names as columns.
+        """
+        path = self._entry_path(ticker, interval)
+        try:
+            modified = os.path.getmtime(path)
+        except OSError:
+            return None
+
+        if time.time() - modified > self.ttl_seconds:
+            self._remove(path)
+            return None
+
+        with np.load(path) as entry:
+            index = pd.to_datetime(entry["timestamp"], unit="s")
+            bars = pd.DataFrame(entry["values"], index=index, columns=BAR_FIELDS)
+        # Record the access for LRU eviction without extending the entry's TTL.
+        os.utime(path, (time.time(), modified))
+        return bars
+
+    def put(self, ticker: str, interval: str, bars: pd.DataFrame):
+        """Stores bars (indexed by timestamp, Alpha Vantage field names as columns) for a ticker and interval."""
+        path = self._entry_path(ticker, interval)
+        buffer = io.BytesIO()
+        np.savez(
+            buffer,
+            timestamp=bars.index.values.astype("datetime64[s]").astype(np.int64),
+            values=bars[BAR_FIELDS].to_numpy(dtype=np.float64),
+        )
+        # Unique per thread as well as per process, since request handlers run on a threadpool.
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(buffer.getvalue())
+        os.replace(tmp_path, path)
+        self._enforce_size()
+
+    def clear(self):
+        """Removes every entry from the cache."""
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".npz"):
+                self._remove(os.path.join(self.cache_dir, name))
+
+    def _enforce_size(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".npz"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if time.time() - stat.st_mtime > self.ttl_seconds:
+                self._remove(path)
+            else:
+                entries.append((stat.st_atime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def time_series_to_frame(time_series: Dict[str, Dict[str, Any]]) -> pd.DataFrame:
+    """Converts an Alpha Vantage time series mapping into a timestamp-indexed float DataFrame."""
+    bars = pd.DataFrame.from_dict(time_series, orient="index")
+    bars = bars.reindex(columns=BAR_FIELDS).apply(pd.to_numeric, errors="coerce")
+    bars.index = pd.to_datetime(bars.index)
+    return bars.sort_index()
+
+
+def frame_to_time_series(bars: pd.DataFrame) -> Dict[str, Dict[str, float]]:
+    """Converts a timestamp-indexed DataFrame back into the Alpha Vantage time series mapping."""
+    bars = bars.copy()
+    bars.index = bars.index.strftime(TIMESTAMP_FORMAT)
+    return bars.to_dict(orient="index")
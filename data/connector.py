@@ -1,15 +1,53 @@
+import os
+import threading
 import requests
 import pandas as pd
-from typing import Dict, Any
+from requests.adapters import HTTPAdapter
+from typing import Dict, Any, Optional, Tuple
+
+from data.cache import ResponseCache, time_series_to_frame, frame_to_time_series
+from infrastructure.metrics import span
+
+_shared_session: Optional[requests.Session] = None
+_shared_session_lock = threading.Lock()
+
+
+def shared_session() -> requests.Session:
+    """
+    Returns the process-wide requests.Session, created on first use.
+
+    Its connection pool holds up to ALPHA_VANTAGE_MAX_CONNECTIONS (default 10) keep-alive connections,
+    so connectors created per request reuse open connections instead of reconnecting every time.
+    """
+    global _shared_session
+    with _shared_session_lock:
+        if _shared_session is None:
+            max_connections = int(os.getenv("ALPHA_VANTAGE_MAX_CONNECTIONS", 10))
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=max_connections, pool_maxsize=max_connections)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _shared_session = session
+        return _shared_session
+
 
 class AlphaVantageConnector:
     BASE_URL = "https://www.alphavantage.co"
 
-    def __init__(self, api_key: str, use_local_data: bool = False, local_data_path: str = None):
+    def __init__(self, api_key: str, use_local_data: bool = False, local_data_path: str = None,
+                 cache: Optional[ResponseCache] = None, use_cache: bool = True, base_url: Optional[str] = None,
+                 session: Optional[requests.Session] = None):
         self.api_key = api_key
-        self.session = requests.Session()
+        # ALPHA_VANTAGE_BASE_URL points the connector elsewhere, e.g. at the fake server in infrastructure/.
+        self.base_url = (base_url or os.getenv("ALPHA_VANTAGE_BASE_URL") or self.BASE_URL).rstrip("/")
+        # A session passed in, e.g. shared_session(), outlives the connector and is not closed by it.
+        self._owns_session = session is None
+        self.session = session if session is not None else requests.Session()
         self.use_local_data = use_local_data
         self.local_data_path = local_data_path
+        if cache is None and use_cache and not use_local_data:
+            cache = ResponseCache.from_env()
+        self.cache = cache
 
     def fetch_time_series_intraday(self, ticker: str, interval: str) -> Dict[str, Any]:
         if self.use_local_data and self.local_data_path:
@@ -19,20 +57,40 @@ class AlphaVantageConnector:
             time_series_data = df.to_dict(orient="index")
             return {"Time Series (60min)": time_series_data} # Mock the API response structure
 
-        params = {
-            'function': "TIME_SERIES_INTRADAY",
-            'symbol': ticker,
-            'interval': interval,
-            'apikey': self.api_key
-        }
-        return self._make_request('query', params)
+        params = intraday_params(ticker, interval, self.api_key)
+        if self.cache is None:
+            return self._make_request('query', params)
+
+        cached_bars = self.cache.get(ticker, interval)
+        if cached_bars is not None and not cached_bars.empty:
+            # Top up the cached series with the latest bars only.
+            response = self._make_request('query', dict(params, outputsize='compact'))
+            response, merged = merge_top_up(cached_bars, response, ticker, interval)
+            if response is not None:
+                if merged is not None:
+                    self.cache.put(ticker, interval, merged)
+                return response
+            # The cache is too old for the top-up to reach it, so the whole series is fetched again.
+            params = dict(params, outputsize='full')
+
+        response = self._make_request('query', params)
+        series_key = self._time_series_key(response)
+        if series_key:
+            self.cache.put(ticker, interval, time_series_to_frame(response[series_key]))
+        return response
+
+    @staticmethod
+    def _time_series_key(response: Dict[str, Any]) -> Optional[str]:
+        return time_series_key(response)
 
     def _make_request(self, endpoint: str, params: Dict[str, Any]) -> Dict[str, Any]:
-        url = f"{self.BASE_URL}/{endpoint}"
+        url = f"{self.base_url}/{endpoint}"
         try:
-            response = self.session.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            return response.json()
+            with span("connector_request") as s:
+                response = self.session.get(url, params=params, timeout=10)
+                response.raise_for_status()
+                s.record(nbytes=len(response.content))
+                return response.json()
         except requests.exceptions.HTTPError as e:
             print(f"HTTP Error for {url}: {e}")
             raise
@@ -41,4 +99,49 @@ class AlphaVantageConnector:
             raise
 
     def close(self):
-        self.session.close()
+        if self._owns_session:
+            self.session.close()
+
+
+def intraday_params(ticker: str, interval: str, api_key: str) -> Dict[str, Any]:
+    """The query parameters of a TIME_SERIES_INTRADAY request."""
+    return {
+        'function': "TIME_SERIES_INTRADAY",
+        'symbol': ticker,
+        'interval': interval,
+        'apikey': api_key
+    }
+
+
+def time_series_key(response: Dict[str, Any]) -> Optional[str]:
+    """Returns the key of the non-empty time series in a response, or None."""
+    series_key = next((key for key in response.keys() if "Time Series" in key), None)
+    return series_key if series_key and response.get(series_key) else None
+
+
+def merge_top_up(cached_bars: pd.DataFrame, response: Dict[str, Any], ticker: str,
+                 interval: str) -> Tuple[Optional[Dict[str, Any]], Optional[pd.DataFrame]]:
+    """
+    Merges a compact top-up response into the cached bars.
+
+    Returns:
+        A tuple of the full response to serve and the merged bars to cache, which is None when the
+        response had no bars and the cached data is served as is. Both are None when the top-up does
+        not overlap the cache, so bars in between are missing and the full series must be fetched.
+    """
+    series_key = time_series_key(response)
+    if not series_key:
+        print(f"--- No new bars returned for {ticker}; serving cached data ---")
+        return {f"Time Series ({interval})": frame_to_time_series(cached_bars)}, None
+
+    new_bars = time_series_to_frame(response[series_key])
+    if new_bars.index[0] > cached_bars.index[-1]:
+        # The latest bars do not overlap the cache, so bars may be missing in between.
+        print(f"--- Cached bars for {ticker} end before the top-up starts; fetching the full series ---")
+        return None, None
+
+    # Fresh values win for overlapping timestamps (e.g. a bar that was still forming).
+    merged = pd.concat([cached_bars[cached_bars.index < new_bars.index[0]], new_bars])
+
+    response[series_key] = frame_to_time_series(merged)
+    return response, merged
@@ -0,0 +1,119 @@
+import math
+import numpy as np
+import pandas as pd
+from typing import Optional, Tuple
+
+from data.windowing import window_view
+
+
+class WindowedDataset:
+    """
+    Serves (X, y) training batches of sliding windows without materializing every window.
+
+    Only the 2D series is kept in memory; each batch gathers its windows from a strided view, so peak
+    memory is bounded by the batch size rather than by window_size x the length of the history.
+    Sample i is the window of rows [i, i + window_size) paired with targets[i + window_size - 1 + horizon],
+    which with the default horizon of 1 matches DataProcessor.create_sequences.
+    """
+    def __init__(self, values: np.ndarray, targets: np.ndarray, window_size: int, batch_size: int = 32,
+                 horizon: int = 1, indices: Optional[np.ndarray] = None, shuffle: bool = False,
+                 seed: Optional[int] = None, dtype: np.dtype = np.float32):
+        """
+        Initializes the WindowedDataset.
+
+        Args:
+            values: The feature rows, of shape (n_rows, n_features).
+            targets: The target value of each row, of shape (n_rows,).
+            window_size: The number of rows in each window.
+            batch_size: The number of windows per batch.
+            horizon: How many rows after the window's last row the target is taken from.
+            indices: The sample indices served by this dataset. Defaults to all samples.
+            shuffle: If True, the samples are reshuffled at the end of every epoch.
+            seed: The seed for shuffling.
+            dtype: The dtype of the served batches.
+        """
+        self.values = np.asarray(values, dtype=dtype)
+        self.targets = np.asarray(targets, dtype=dtype)
+        self.window_size = window_size
+        self.batch_size = batch_size
+        self.horizon = horizon
+        self.shuffle = shuffle
+        self._rng = np.random.default_rng(seed)
+        self._windows = window_view(self.values, window_size)
+
+        n_samples = max(len(self.values) - window_size - horizon + 1, 0)
+        self.indices = np.arange(n_samples) if indices is None else np.asarray(indices)
+        self._order = self.indices
+        if shuffle:
+            self.on_epoch_end()
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, window_size: int, target: str = 'close', **kwargs) -> 'WindowedDataset':
+        """Creates a dataset over a cleaned DataFrame, using all its columns as features."""
+        return cls(df.to_numpy(), df[target].to_numpy(), window_size, **kwargs)
+
+    def split(self, validation_split: float) -> Tuple['WindowedDataset', 'WindowedDataset']:
+        """
+        Splits off the last `validation_split` fraction of samples for validation, as Keras' fit() does.
+
+        The validation dataset is never shuffled.
+        """
+        split_at = int(math.floor(len(self.indices) * (1.0 - validation_split)))
+        train = self._subset(self.indices[:split_at], self.shuffle)
+        validation = self._subset(self.indices[split_at:], False)
+        return train, validation
+
+    def _subset(self, indices: np.ndarray, shuffle: bool) -> 'WindowedDataset':
+        subset = WindowedDataset.__new__(WindowedDataset)
+        subset.__dict__.update(self.__dict__)
+        subset.indices = indices
+        subset._order = indices
+        subset.shuffle = shuffle
+        subset._rng = np.random.default_rng(self._rng.integers(2 ** 32))
+        if shuffle:
+            subset.on_epoch_end()
+        return subset
+
+    @property
+    def n_samples(self) -> int:
+        return len(self.indices)
+
+    def __len__(self) -> int:
+        return math.ceil(len(self.indices) / self.batch_size)
+
+    def __getitem__(self, batch_index: int) -> Tuple[np.ndarray, np.ndarray]:
+        batch = self._order[batch_index * self.batch_size:(batch_index + 1) * self.batch_size]
+        # Fancy indexing copies only this batch's windows out of the strided view.
+        X = self._windows[batch]
+        y = self.targets[batch + self.window_size - 1 + self.horizon]
+        return X, y
+
+    def on_epoch_end(self):
+        if self.shuffle:
+            self._order = self._rng.permutation(self.indices)
+
+    def to_keras(self, workers: int = 2, max_queue_size: int = 10):
+        """
+        Wraps the dataset for Keras' fit(), prefetching up to `max_queue_size` batches on `workers` threads.
+
+        Keras only prefetches in the background with more than one worker; workers=1 serves batches inline.
+        """
+        from tensorflow.keras.utils import PyDataset
+
+        dataset = self
+
+        class _KerasWindowedDataset(PyDataset):
+            def __init__(self):
+                super().__init__(workers=workers, use_multiprocessing=False, max_queue_size=max_queue_size)
+
+            def __len__(self):
+                return len(dataset)
+
+            def __getitem__(self, batch_index):
+                return dataset[batch_index]
+
+            def on_epoch_end(self):
+                dataset.on_epoch_end()
+
+        return _KerasWindowedDataset()
+
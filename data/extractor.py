@@ -1,11 +1,19 @@
 import pandas as pd
 from typing import Dict, Any
 
+from infrastructure.metrics import span
+
 class DataExtractor:
     def __init__(self, raw_data: Dict[str, Any]):
         self.raw_data = raw_data
 
     def extract_time_series_to_dataframe(self) -> pd.DataFrame:
+        with span("extract") as s:
+            df = self._extract()
+            s.record(rows=len(df), nbytes=df.memory_usage(index=True).sum())
+        return df
+
+    def _extract(self) -> pd.DataFrame:
         time_series_key = next((key for key in self.raw_data.keys() if "Time Series" in key), None)
         if not time_series_key or not self.raw_data.get(time_series_key):
             raise ValueError("Could not find time series data in the API response.")
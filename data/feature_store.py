@@ -0,0 +1,375 @@
+import fcntl
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from core.features.incremental import IncrementalIndicators
+from data.processor import DataProcessor
+from data.windowing import window_view
+from infrastructure.metrics import span
+
+# The feature config used when none is given: the cleaned OHLCV columns as they are, which is what the
+# models are trained on today.
+DEFAULT_FEATURE_CONFIG = {
+    "technical": False,
+    "rsi_window": 14,
+    "ma_window": 20,
+    "scale": False,
+    "target": "close"
+}
+MANIFEST_VERSION = 1
+FEATURES_DTYPE = np.float32
+
+
+def feature_config_hash(config: Dict[str, Any]) -> str:
+    """Returns a short, stable hash of a feature config."""
+    return hashlib.sha1(json.dumps(config, sort_keys=True).encode()).hexdigest()[:12]
+
+
+class FeatureSet:
+    """
+    A read-only view of one stored feature matrix, as of the manifest it was opened with.
+
+    The arrays are memory-mapped from disk, so opening a feature set and slicing windows out of it
+    does not copy the data. Rows appended after opening are not visible; open the set again to see them.
+    The one exception is a revised last bar (see FeatureStore.update()), whose row is rewritten in place.
+    """
+    def __init__(self, path: str, manifest: Dict[str, Any]):
+        self.path = path
+        self.manifest = manifest
+        self.columns = manifest["columns"]
+        self.n_rows = manifest["n_rows"]
+        self.version = manifest["version"]
+        self.window_size = manifest["window_size"]
+        self.target_index = self.columns.index(manifest["config"]["target"])
+        features_file, timestamps_file = _data_files(manifest)
+        self.features = self._map(features_file, FEATURES_DTYPE, (self.n_rows, len(self.columns)))
+        self.timestamps = self._map(timestamps_file, np.int64, (self.n_rows,))
+
+    def _map(self, name: str, dtype: np.dtype, shape: Tuple[int, ...]) -> np.ndarray:
+        if self.n_rows == 0:
+            return np.empty(shape, dtype=dtype)
+        return np.memmap(os.path.join(self.path, name), dtype=dtype, mode='r', shape=shape)
+
+    @property
+    def targets(self) -> np.ndarray:
+        """The target column of every row, as a view of the feature matrix."""
+        return self.features[:, self.target_index]
+
+    @property
+    def last_timestamp(self) -> Optional[int]:
+        """The timestamp of the last stored row, in nanoseconds since the epoch."""
+        return int(self.timestamps[-1]) if self.n_rows else None
+
+    @property
+    def index(self) -> pd.DatetimeIndex:
+        return pd.DatetimeIndex(self.timestamps.astype('datetime64[ns]'))
+
+    def windows(self) -> np.ndarray:
+        """All windows of `window_size` rows, as a strided view of shape (n_rows - w + 1, w, n_features)."""
+        return window_view(self.features, self.window_size)
+
+    def sequences(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the training (X, y) pairs as views, matching DataProcessor.create_sequences:
+        window i is paired with the target of the row right after it.
+        """
+        if self.n_rows <= self.window_size:
+            return np.array([]), np.array([])
+        return self.windows()[:-1], self.targets[self.window_size:]
+
+    def last_window(self) -> np.ndarray:
+        """The most recent window, as a view of shape (1, window_size, n_features)."""
+        if self.n_rows < self.window_size:
+            raise ValueError(f"Not enough data for a window of {self.window_size} rows; only {self.n_rows} available.")
+        return self.features[-self.window_size:][np.newaxis]
+
+    def frame(self) -> pd.DataFrame:
+        """The stored features as a DataFrame. This copies the data."""
+        return pd.DataFrame(np.array(self.features), index=self.index, columns=self.columns)
+
+    def scaler(self) -> Optional[Any]:
+        """Returns the fitted MinMaxScaler the features were scaled with, or None if they are unscaled."""
+        params = self.manifest.get("scaler")
+        return _scaler_from_params(params) if params else None
+
+
+class FeatureStore:
+    """
+    An on-disk store of model-ready feature matrices, keyed by ticker, interval, window size and feature config.
+
+    Each entry is a directory holding the float32 features and int64 timestamps as raw arrays, plus a
+    JSON manifest with the row count, the columns, the fitted scaler parameters and the checkpointed
+    indicator state. Updating an entry only cleans, featurizes and appends the bars newer than the last
+    stored one; the manifest is replaced atomically after the rows are written, so readers never see
+    a partial append.
+    """
+    def __init__(self, root: str):
+        """
+        Initializes the FeatureStore.
+
+        Args:
+            root: The directory to store entries in. Created if missing.
+        """
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    @classmethod
+    def from_env(cls) -> 'FeatureStore':
+        """Creates a store in FEATURE_STORE_DIR, defaulting to 'data/features' in the project."""
+        default_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'features')
+        return cls(os.getenv("FEATURE_STORE_DIR") or default_dir)
+
+    def entry_path(self, ticker: str, interval: str, window_size: int, config: Optional[Dict[str, Any]] = None,
+                   source: Optional[str] = None) -> str:
+        """
+        Returns the directory of an entry. Bars from different sources, e.g. a local file and the live API,
+        are different histories and get different entries; None stands for the live API.
+        """
+        config = self._resolve_config(config)
+        key = re.sub(r"[^A-Za-z0-9.-]", "_", f"{ticker.upper()}_{interval}")
+        name = f"w{window_size}-{feature_config_hash(config)}"
+        if source is not None:
+            name += "-" + hashlib.sha1(str(source).encode()).hexdigest()[:8]
+        return os.path.join(self.root, key, name)
+
+    def open(self, ticker: str, interval: str, window_size: int, config: Optional[Dict[str, Any]] = None,
+             source: Optional[str] = None) -> Optional[FeatureSet]:
+        """Opens a stored feature set, or returns None if there is none."""
+        path = self.entry_path(ticker, interval, window_size, config, source)
+        manifest = self._read_manifest(path)
+        return FeatureSet(path, manifest) if manifest else None
+
+    def update(self, ticker: str, interval: str, window_size: int, raw_df: pd.DataFrame,
+               config: Optional[Dict[str, Any]] = None, scaler: Optional[Dict[str, Any]] = None,
+               source: Optional[str] = None) -> FeatureSet:
+        """
+        Brings a feature set up to date with the given raw bars and opens it.
+
+        The first call builds the entry from all of `raw_df`, fitting the scaler if the config asks for
+        scaling. Later calls append only the bars newer than the last stored one, reusing the stored
+        scaler and indicator state. If the last stored bar has changed in `raw_df`, e.g. because it was
+        still forming when it was stored, it is featurized again from the state saved before it. If
+        `raw_df` ends before the stored data does, it is treated as a different history and the entry
+        is rebuilt.
+
+        Args:
+            ticker: The ticker symbol.
+            interval: The bar interval, e.g. '60min'.
+            window_size: The number of rows per model input window.
+            raw_df: The raw bars, indexed by timestamp, oldest first.
+            config: The feature config. Missing keys default to DEFAULT_FEATURE_CONFIG.
+            scaler: Fitted scaler parameters to scale with instead of fitting them, e.g. those a model was
+                trained with. An entry scaled with different parameters is rebuilt.
+            source: Where the bars come from, e.g. a local file path; None for the live API.
+        """
+        config = self._resolve_config(config)
+        path = self.entry_path(ticker, interval, window_size, config, source)
+        os.makedirs(path, exist_ok=True)
+        with open(os.path.join(path, ".lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            manifest = self._read_manifest(path)
+            stale = None
+            if manifest is not None and manifest["n_rows"] and len(raw_df) \
+                    and _to_ns(raw_df.index[-1:])[0] < manifest["last_timestamp"]:
+                print(f"Feature store: history for {ticker} changed, rebuilding.")
+                stale = manifest
+            elif manifest is not None and config["scale"] and scaler is not None and manifest["scaler"] != scaler:
+                print(f"Feature store: scaler for {ticker} differs from the requested one, rebuilding.")
+                stale = manifest
+            elif manifest is not None and _last_bar_revised(manifest, raw_df):
+                print(f"Feature store: last bar for {ticker} was revised, featurizing it again.")
+                manifest.update(manifest["before_last_bar"])
+
+            with span("feature_store_update") as s:
+                if manifest is None or stale is not None:
+                    generation = stale["generation"] + 1 if stale else 0
+                    manifest = self._new_manifest(ticker, interval, window_size, config, generation)
+                    if config["scale"]:
+                        manifest["scaler"] = scaler
+                    new_raw = raw_df
+                else:
+                    new_raw = raw_df[_to_ns(raw_df.index) > manifest["last_timestamp"]]
+                appended = self._append(path, manifest, new_raw)
+                s.record(rows=appended)
+            if manifest["columns"] is None:
+                raise ValueError(f"No bars to build features for {ticker} from.")
+            if stale is not None:
+                # Readers may still map the old files; unlinking keeps their data alive until they close.
+                for name in _data_files(stale):
+                    os.remove(os.path.join(path, name))
+        return FeatureSet(path, manifest)
+
+    def _new_manifest(self, ticker: str, interval: str, window_size: int, config: Dict[str, Any],
+                      generation: int) -> Dict[str, Any]:
+        return {
+            "manifest_version": MANIFEST_VERSION,
+            "generation": generation,
+            "ticker": ticker,
+            "interval": interval,
+            "window_size": window_size,
+            "config": config,
+            "config_hash": feature_config_hash(config),
+            "version": 0,
+            "n_rows": 0,
+            "columns": None,
+            "last_timestamp": None,
+            "last_clean_row": None,
+            "indicators": None,
+            "scaler": None,
+            "updated_at": None
+        }
+
+    def _append(self, path: str, manifest: Dict[str, Any], new_raw: pd.DataFrame) -> int:
+        if new_raw.empty:
+            return 0
+        config = manifest["config"]
+        raw_columns = list(new_raw.columns)
+
+        # The last stored clean row seeds the forward fill, so gaps at the start of the new bars are
+        # filled exactly as cleaning the whole history would fill them.
+        if manifest["last_clean_row"] is not None:
+            seed = pd.DataFrame([manifest["last_clean_row"]], columns=raw_columns,
+                                index=pd.DatetimeIndex([pd.Timestamp(manifest["last_timestamp"])]))
+            cleaned = DataProcessor(pd.concat([seed, new_raw])).clean_data().iloc[1:]
+        else:
+            cleaned = DataProcessor(new_raw).clean_data()
+        if cleaned.empty:
+            return 0
+        last_clean_row = cleaned.iloc[-1].astype(float).tolist()
+        last_timestamp = int(_to_ns(cleaned.index[-1:])[0])
+        # The state before the last bar, from which a revised last bar is featurized again.
+        before_last_bar = {
+            "last_timestamp": int(_to_ns(cleaned.index[-2:-1])[0]) if len(cleaned) > 1 else manifest["last_timestamp"],
+            "last_clean_row": cleaned.iloc[-2].astype(float).tolist() if len(cleaned) > 1 else manifest["last_clean_row"],
+            "indicators": manifest["indicators"]
+        }
+
+        features = cleaned
+        if config["technical"]:
+            indicators = IncrementalIndicators(config["rsi_window"], config["ma_window"], close_column=config["target"])
+            if manifest["indicators"] is not None:
+                indicators.load_state_dict(manifest["indicators"])
+            head = indicators.update_frame(manifest["ticker"], cleaned.iloc[:-1])
+            before_last_bar["indicators"] = indicators.state_dict()
+            features = pd.concat([head, indicators.update_frame(manifest["ticker"], cleaned.iloc[-1:])])
+            manifest["indicators"] = indicators.state_dict()
+
+        if config["scale"] and not features.empty:
+            if manifest["scaler"] is None:
+                from core.features.transforms import scale_features
+                features, scaler = scale_features(features)
+                manifest["scaler"] = _scaler_params(scaler)
+            else:
+                scaler = _scaler_from_params(manifest["scaler"])
+                features = pd.DataFrame(scaler.transform(features), columns=features.columns, index=features.index)
+
+        if manifest["columns"] is None:
+            manifest["columns"] = list(features.columns)
+        rows = features.to_numpy(dtype=FEATURES_DTYPE)
+        n_rows = manifest["n_rows"]
+        if len(rows):
+            n_columns = len(manifest["columns"])
+            features_file, timestamps_file = _data_files(manifest)
+            self._write_rows(os.path.join(path, features_file), rows, n_rows * n_columns * rows.itemsize)
+            self._write_rows(os.path.join(path, timestamps_file), _to_ns(features.index), n_rows * 8)
+
+        last_bar_has_row = len(features) > 0 and features.index[-1] == cleaned.index[-1]
+        before_last_bar["n_rows"] = n_rows + len(rows) - int(last_bar_has_row)
+        manifest.update({
+            "version": manifest["version"] + 1,
+            "n_rows": n_rows + len(rows),
+            "last_timestamp": last_timestamp,
+            "last_clean_row": last_clean_row,
+            "last_raw_row": new_raw.loc[cleaned.index[-1:]].iloc[-1].astype(float).tolist(),
+            "before_last_bar": before_last_bar,
+            "updated_at": time.time()
+        })
+        self._write_manifest(path, manifest)
+        return len(rows)
+
+    @staticmethod
+    def _write_rows(file_path: str, rows: np.ndarray, offset: int):
+        mode = "r+b" if os.path.exists(file_path) else "wb"
+        with open(file_path, mode) as f:
+            f.seek(offset)
+            f.write(np.ascontiguousarray(rows).tobytes())
+            # Bytes past the new rows are left over from an interrupted append. The file is only cut after
+            # writing, so it never shrinks under rows that readers have mapped.
+            f.truncate()
+            f.flush()
+            os.fsync(f.fileno())
+
+    @staticmethod
+    def _read_manifest(path: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(os.path.join(path, "manifest.json")) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return manifest if manifest.get("manifest_version") == MANIFEST_VERSION else None
+
+    @staticmethod
+    def _write_manifest(path: str, manifest: Dict[str, Any]):
+        manifest_path = os.path.join(path, "manifest.json")
+        tmp_path = f"{manifest_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, manifest_path)
+
+    @staticmethod
+    def _resolve_config(config: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        return dict(DEFAULT_FEATURE_CONFIG, **(config or {}))
+
+
+def _data_files(manifest: Dict[str, Any]) -> Tuple[str, str]:
+    """The features and timestamps file names of a manifest. A rebuilt entry gets new files rather than
+    truncating ones that readers may have mapped."""
+    generation = manifest["generation"]
+    return f"features.{generation}.bin", f"timestamps.{generation}.bin"
+
+
+def _to_ns(index: pd.Index) -> np.ndarray:
+    return pd.DatetimeIndex(index).as_unit('ns').asi8
+
+
+def _last_bar_revised(manifest: Dict[str, Any], raw_df: pd.DataFrame) -> bool:
+    """Returns whether raw_df holds different values for the last stored bar than it was stored with."""
+    if not manifest.get("before_last_bar") or manifest["last_timestamp"] is None:
+        return False
+    at_last_bar = raw_df[_to_ns(raw_df.index) == manifest["last_timestamp"]]
+    if at_last_bar.empty:
+        return False
+    incoming = at_last_bar.iloc[-1].to_numpy(dtype=np.float64)
+    return not np.array_equal(incoming, np.asarray(manifest["last_raw_row"], dtype=np.float64), equal_nan=True)
+
+
+def _scaler_params(scaler: Any) -> Dict[str, Any]:
+    """The fitted state of a MinMaxScaler, as JSON-serializable lists."""
+    return {
+        "feature_range": list(scaler.feature_range),
+        "feature_names_in": [str(name) for name in getattr(scaler, "feature_names_in_", [])],
+        "n_samples_seen": int(scaler.n_samples_seen_),
+        **{name: getattr(scaler, f"{name}_").tolist() for name in ("min", "scale", "data_min", "data_max", "data_range")}
+    }
+
+
+def _scaler_from_params(params: Dict[str, Any]) -> Any:
+    """Rebuilds a fitted MinMaxScaler from _scaler_params() output."""
+    from sklearn.preprocessing import MinMaxScaler
+
+    scaler = MinMaxScaler(feature_range=tuple(params["feature_range"]))
+    for name in ("min", "scale", "data_min", "data_max", "data_range"):
+        setattr(scaler, f"{name}_", np.asarray(params[name], dtype=np.float64))
+    scaler.n_samples_seen_ = params["n_samples_seen"]
+    scaler.n_features_in_ = len(params["min"])
+    if params["feature_names_in"]:
+        scaler.feature_names_in_ = np.asarray(params["feature_names_in"], dtype=object)
+    return scaler
@@ -0,0 +1,91 @@
+import os
+import numpy as np
+import pandas as pd
+
+from infrastructure.metrics import span
+
+OHLCV_COLUMNS = ["open", "high", "low", "close", "volume"]
+
+# Alpha Vantage field names, as found in raw API dumps such as data/sample_data.csv.
+FIELD_ALIASES = {
+    "1. open": "open",
+    "2. high": "high",
+    "3. low": "low",
+    "4. close": "close",
+    "5. volume": "volume"
+}
+
+
+def load_local_time_series(path: str) -> pd.DataFrame:
+    """
+    Loads a local OHLCV file straight into the DataExtractor output schema.
+
+    Supported formats are CSV, Parquet, Feather and NumPy structured arrays (.npy, memory-mapped).
+    Columns may use either the plain names ('open', ...) or the Alpha Vantage names ('1. open', ...),
+    and the timestamps are read from a 'timestamp' column or the index.
+
+    Args:
+        path: The path to the local data file.
+
+    Returns:
+        A DataFrame with a sorted DatetimeIndex and float64 open, high, low, close and volume columns.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    with span("load_local") as s:
+        if extension == ".csv":
+            df = _read_csv(path)
+        elif extension in (".parquet", ".pq"):
+            df = pd.read_parquet(path)
+        elif extension == ".feather":
+            df = pd.read_feather(path)
+        elif extension == ".npy":
+            df = _read_npy(path)
+        else:
+            raise ValueError(f"Unsupported local data format '{extension}' for {path}.")
+        df = _to_extractor_schema(df)
+        s.record(rows=len(df), nbytes=df.memory_usage(index=True).sum())
+    return df
+
+
+def _read_csv(path: str) -> pd.DataFrame:
+    header = pd.read_csv(path, nrows=0).columns
+    value_columns = [col for col in header if FIELD_ALIASES.get(col, col) in OHLCV_COLUMNS]
+    index_column = "timestamp" if "timestamp" in header else header[0]
+    return pd.read_csv(
+        path,
+        usecols=[index_column] + value_columns,
+        index_col=index_column,
+        parse_dates=[index_column],
+        dtype={col: np.float64 for col in value_columns},
+        engine="c"
+    )
+
+
+def _read_npy(path: str) -> pd.DataFrame:
+    records = np.load(path, mmap_mode="r")
+    if records.dtype.names is None or "timestamp" not in records.dtype.names:
+        raise ValueError(f"{path} must hold a structured array with a 'timestamp' field.")
+    timestamps = records["timestamp"]
+    if not np.issubdtype(timestamps.dtype, np.datetime64):
+        # Integer timestamps are epoch seconds, as stored by data.cache.ResponseCache.
+        timestamps = timestamps.astype("datetime64[s]")
+    columns = {name: records[name] for name in records.dtype.names if name != "timestamp"}
+    return pd.DataFrame(columns, index=pd.DatetimeIndex(timestamps))
+
+
+def _to_extractor_schema(df: pd.DataFrame) -> pd.DataFrame:
+    if "timestamp" in df.columns:
+        df = df.set_index("timestamp")
+    df = df.rename(columns=FIELD_ALIASES)
+
+    missing = [col for col in OHLCV_COLUMNS if col not in df.columns]
+    if missing:
+        raise ValueError(f"Local data is missing the columns: {missing}")
+
+    df = df[OHLCV_COLUMNS].astype(np.float64)
+    if not isinstance(df.index, pd.DatetimeIndex):
+        df.index = pd.to_datetime(df.index)
+    df.index.name = None
+    if not df.index.is_monotonic_increasing:
+        df = df.sort_index()
+    return df
@@ -0,0 +1,200 @@
+import warnings
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from core.features.transforms import rsi_from_close
+from data.cache import BAR_FIELDS
+from data.loader import OHLCV_COLUMNS
+from infrastructure.metrics import span
+
+
+class Panel:
+    """
+    Many tickers' bars aligned into one (timestamp, ticker, field) float64 array.
+
+    Timestamps are the union over all tickers. `mask` marks the rows that belong to each ticker's own
+    series: a ticker without a bar at some timestamp, or whose row was dropped by cleaning or by
+    feature warm-up, is masked out there. Every operation gives, for each ticker, exactly what the
+    per-ticker DataExtractor / DataProcessor / transforms path gives for that ticker alone, but runs
+    as a few array operations over the whole panel.
+    """
+    def __init__(self, values: np.ndarray, timestamps: Sequence[Any], tickers: Sequence[str], fields: Sequence[str],
+                 mask: Optional[np.ndarray] = None):
+        """
+        Initializes the Panel.
+
+        Args:
+            values: The data, of shape (n_timestamps, n_tickers, n_fields).
+            timestamps: The timestamp of each row, oldest first.
+            tickers: The ticker symbols, in column order.
+            fields: The field names, e.g. 'open' ... 'volume'.
+            mask: Which (timestamp, ticker) rows belong to the ticker's series. Defaults to all.
+        """
+        self.values = values
+        self.timestamps = pd.DatetimeIndex(timestamps)
+        self.tickers = list(tickers)
+        self.fields = list(fields)
+        self.mask = mask if mask is not None else np.ones(values.shape[:2], dtype=bool)
+
+    @classmethod
+    def from_frames(cls, frames: Dict[str, pd.DataFrame], fields: Optional[Sequence[str]] = None) -> 'Panel':
+        """Aligns per-ticker DataFrames, indexed by timestamp, into a panel."""
+        fields = list(fields or OHLCV_COLUMNS)
+        stamps = [pd.DatetimeIndex(df.index).as_unit('ns').asi8 for df in frames.values()]
+        timestamps = np.unique(np.concatenate(stamps)) if stamps else np.array([], dtype=np.int64)
+        values = np.full((len(timestamps), len(frames), len(fields)), np.nan)
+        mask = np.zeros((len(timestamps), len(frames)), dtype=bool)
+        for n, (df, stamp) in enumerate(zip(frames.values(), stamps)):
+            rows = np.searchsorted(timestamps, stamp)
+            values[rows, n] = df[fields].to_numpy(dtype=np.float64)
+            mask[rows, n] = True
+        return cls(values, pd.to_datetime(timestamps), list(frames), fields, mask)
+
+    @classmethod
+    def from_time_series(cls, responses: Dict[str, Dict[str, Any]]) -> 'Panel':
+        """
+        Builds a panel straight from Alpha Vantage responses keyed by ticker, like DataExtractor does for one.
+
+        The timestamps and every field of all tickers are each parsed in a single call. The responses
+        should share an interval, so their timestamps have the same format.
+        """
+        with span("panel_extract") as s:
+            ticker_ids, stamps = [], []
+            raw = {field: [] for field in BAR_FIELDS}
+            for n, (ticker, response) in enumerate(responses.items()):
+                time_series_key = next((key for key in response.keys() if "Time Series" in key), None)
+                if not time_series_key or not response.get(time_series_key):
+                    raise ValueError(f"Could not find time series data in the API response for {ticker}.")
+                series = response[time_series_key]
+                stamps.extend(series.keys())
+                ticker_ids.append(np.full(len(series), n))
+                for field in BAR_FIELDS:
+                    raw[field].extend(bar.get(field) for bar in series.values())
+
+            parsed = pd.to_datetime(pd.Index(stamps, dtype=object)).as_unit('ns').asi8
+            timestamps, rows = np.unique(parsed, return_inverse=True)
+            columns = np.concatenate(ticker_ids) if ticker_ids else np.array([], dtype=np.int64)
+            values = np.full((len(timestamps), len(responses), len(BAR_FIELDS)), np.nan)
+            for f, field in enumerate(BAR_FIELDS):
+                values[rows, columns, f] = pd.to_numeric(pd.Series(raw[field], dtype=object), errors='coerce')
+            mask = np.zeros(values.shape[:2], dtype=bool)
+            mask[rows, columns] = True
+            s.record(rows=len(rows), nbytes=values.nbytes)
+        return cls(values, pd.to_datetime(timestamps), list(responses), OHLCV_COLUMNS, mask)
+
+    def to_frame(self, ticker: str) -> pd.DataFrame:
+        """Returns one ticker's rows as a DataFrame, as the per-ticker path would produce it."""
+        n = self.tickers.index(ticker)
+        rows = self.mask[:, n]
+        return pd.DataFrame(self.values[rows, n], index=self.timestamps[rows], columns=self.fields)
+
+    def clean(self) -> 'Panel':
+        """Forward-fills gaps and drops leading incomplete rows per ticker, like DataProcessor.clean_data()."""
+        with span("panel_clean") as s:
+            values = _ffill(self.values)
+            mask = self.mask & ~np.isnan(values).any(axis=2)
+            s.record(rows=int(mask.sum()), nbytes=values.nbytes)
+        return Panel(values, self.timestamps, self.tickers, self.fields, mask)
+
+    def add_technical_features(self, ma_window: int = 20, rsi_window: int = 14, close_field: str = 'close') -> 'Panel':
+        """
+        Adds 'RSI' and 'MA' fields and drops the rows where they are incomplete, like add_technical_features().
+
+        The indicators run over each ticker's own rows, so missing bars of one ticker do not shift its windows.
+        """
+        with span("panel_features") as s:
+            close_index = self.fields.index(close_field)
+            compact, order, counts = _compact(self.values[:, :, close_index:close_index + 1], self.mask)
+            close = pd.DataFrame(compact[:, :, 0])
+            rsi = rsi_from_close(close, rsi_window).to_numpy()
+            ma = close.rolling(window=ma_window).mean().to_numpy()
+            added = np.stack([_scatter(rsi, order, counts, len(self.values)),
+                              _scatter(ma, order, counts, len(self.values))], axis=2)
+            values = np.concatenate([self.values, added], axis=2)
+            mask = self.mask & ~np.isnan(values).any(axis=2)
+            s.record(rows=int(mask.sum()), nbytes=values.nbytes)
+        return Panel(values, self.timestamps, self.tickers, self.fields + ['RSI', 'MA'], mask)
+
+    def scale(self, feature_range: Tuple[float, float] = (0, 1)) -> Tuple['Panel', Dict[str, np.ndarray]]:
+        """
+        Min-max scales every field of every ticker over that ticker's rows, as scale_features() does with a
+        new MinMaxScaler per ticker.
+
+        Returns:
+            A tuple of the scaled panel and the fitted parameters ('min', 'scale', 'data_min', 'data_max'),
+            each of shape (n_tickers, n_fields), matching the MinMaxScaler attributes of the same names.
+        """
+        with span("panel_scale") as s:
+            values = np.where(self.mask[:, :, np.newaxis], self.values, np.nan)
+            with warnings.catch_warnings():
+                # Tickers without any rows have all-NaN parameters.
+                warnings.simplefilter("ignore", RuntimeWarning)
+                data_min = np.nanmin(values, axis=0)
+                data_max = np.nanmax(values, axis=0)
+            data_range = data_max - data_min
+            # As sklearn's _handle_zeros_in_scale, constant fields are given a scale of 1.
+            safe_range = np.where(data_range < 10 * np.finfo(data_range.dtype).eps, 1.0, data_range)
+            scale = (feature_range[1] - feature_range[0]) / safe_range
+            min_ = feature_range[0] - data_min * scale
+            scaled = self.values * scale
+            scaled += min_
+            s.record(rows=int(self.mask.sum()), nbytes=scaled.nbytes)
+        params = {"min": min_, "scale": scale, "data_min": data_min, "data_max": data_max}
+        return Panel(scaled, self.timestamps, self.tickers, self.fields, self.mask), params
+
+    def windows(self, window_size: int, target: str = 'close') -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Builds the training windows of every ticker, matching DataProcessor.create_sequences per ticker.
+
+        Returns:
+            A tuple (X, y, ticker_ids): X of shape (n_samples, window_size, n_fields), y of shape
+            (n_samples,), and the index into `tickers` of each sample. Samples are grouped by ticker, in
+            ticker order, and in time order within a ticker.
+        """
+        with span("panel_windows") as s:
+            compact, _, counts = _compact(self.values, self.mask)
+            n_starts = compact.shape[0] - window_size
+            if n_starts <= 0:
+                return np.array([]), np.array([]), np.array([], dtype=np.int64)
+            # (n_tickers, n_starts, window_size, n_fields), as a strided view.
+            view = sliding_window_view(compact, window_size, axis=0)[:n_starts].transpose(1, 0, 3, 2)
+            valid = np.arange(n_starts)[np.newaxis, :] < (counts - window_size)[:, np.newaxis]
+            X = view[valid]
+            y = compact[window_size:, :, self.fields.index(target)].T[valid]
+            ticker_ids = np.nonzero(valid)[0]
+            s.record(rows=len(X), nbytes=X.nbytes + y.nbytes)
+        return X, y, ticker_ids
+
+
+def _ffill(values: np.ndarray) -> np.ndarray:
+    """Forward-fills NaNs along the first axis, independently for every other position."""
+    positions = np.arange(len(values)).reshape((-1,) + (1,) * (values.ndim - 1))
+    last_valid = np.where(np.isnan(values), 0, positions)
+    np.maximum.accumulate(last_valid, axis=0, out=last_valid)
+    return np.take_along_axis(values, last_valid, axis=0)
+
+
+def _compact(values: np.ndarray, mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Moves each ticker's masked-in rows to the top, in order, so per-ticker row windows line up.
+
+    Returns:
+        The compacted values of shape (max_rows, n_tickers, n_fields) padded with NaN, the source row of
+        each compacted row, and the number of rows of each ticker.
+    """
+    counts = mask.sum(axis=0)
+    n_rows = int(counts.max()) if counts.size else 0
+    order = np.argsort(~mask, axis=0, kind='stable')[:n_rows]
+    compact = np.take_along_axis(values, order[:, :, np.newaxis], axis=0)
+    compact[np.arange(n_rows)[:, np.newaxis] >= counts[np.newaxis, :]] = np.nan
+    return compact, order, counts
+
+
+def _scatter(compact: np.ndarray, order: np.ndarray, counts: np.ndarray, n_timestamps: int) -> np.ndarray:
+    """The inverse of _compact() for one field: puts compacted rows back at their timestamps."""
+    out = np.full((n_timestamps, compact.shape[1]), np.nan)
+    rows, columns = np.nonzero(np.arange(len(compact))[:, np.newaxis] < counts[np.newaxis, :])
+    out[order[rows, columns], columns] = compact[rows, columns]
+    return out
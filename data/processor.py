@@ -2,20 +2,22 @@ import pandas as pd
 import numpy as np
 from typing import Tuple
 
+from data.windowing import build_windows
+from infrastructure.metrics import span
+
 class DataProcessor:
     def __init__(self, df: pd.DataFrame):
         self.df = df
 
     def clean_data(self) -> pd.DataFrame:
-        df_cleaned = self.df.ffill()
-        return df_cleaned.dropna()
+        with span("clean") as s:
+            df_cleaned = self.df.ffill().dropna()
+            s.record(rows=len(df_cleaned), nbytes=df_cleaned.memory_usage(index=True).sum())
+        return df_cleaned
 
     @staticmethod
     def create_sequences(df: pd.DataFrame, window_size: int) -> Tuple[np.ndarray, np.ndarray]:
-        X, y = [], []
-        for i in range(len(df) - window_size):
-            sequence = df.iloc[i:i + window_size].values
-            X.append(sequence)
-            target = df['close'].iloc[i + window_size]
-            y.append(target)
-        return np.array(X), np.array(y)
+        with span("create_sequences") as s:
+            X, y = build_windows(df, window_size, target='close')
+            s.record(rows=len(X), nbytes=X.nbytes + y.nbytes)
+        return X, y
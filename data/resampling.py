@@ -0,0 +1,207 @@
+import re
+from datetime import date
+from typing import Dict, Iterable, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.holiday import (AbstractHolidayCalendar, GoodFriday, Holiday, USLaborDay, USMartinLutherKingJr,
+                                    USMemorialDay, USPresidentsDay, USThanksgivingDay, nearest_workday,
+                                    sunday_to_monday)
+
+from infrastructure.metrics import span
+
+BAR_COLUMNS = ["open", "high", "low", "close", "volume"]
+NS_PER_DAY = 24 * 3600 * 10 ** 9
+NS_PER_MINUTE = 60 * 10 ** 9
+INTERVAL_PATTERN = re.compile(r"^(\d+)min$")
+DAILY_INTERVALS = ("daily", "1d")
+
+
+class NYSEHolidayCalendar(AbstractHolidayCalendar):
+    """The full-day market holidays of the New York Stock Exchange."""
+    rules = [
+        Holiday("New Year's Day", month=1, day=1, observance=sunday_to_monday),
+        USMartinLutherKingJr,
+        USPresidentsDay,
+        GoodFriday,
+        USMemorialDay,
+        Holiday("Juneteenth", month=6, day=19, start_date="2022-01-01", observance=nearest_workday),
+        Holiday("Independence Day", month=7, day=4, observance=nearest_workday),
+        USLaborDay,
+        USThanksgivingDay,
+        Holiday("Christmas Day", month=12, day=25, observance=nearest_workday)
+    ]
+
+
+def interval_minutes(interval: str) -> Optional[int]:
+    """
+    Returns the length of an intraday interval such as '60min' in minutes, or None for a daily interval.
+
+    Raises:
+        ValueError: If the interval is neither.
+    """
+    if interval in DAILY_INTERVALS:
+        return None
+    match = INTERVAL_PATTERN.match(interval)
+    if not match or int(match.group(1)) <= 0:
+        raise ValueError(f"Unsupported interval '{interval}'; expected e.g. '5min', '60min' or 'daily'.")
+    return int(match.group(1))
+
+
+class TradingCalendar:
+    """
+    The trading sessions of an exchange: the weekdays in `weekmask` that are not holidays, each open from
+    `open_time` to `close_time` in the exchange's local time.
+
+    The defaults match Alpha Vantage's intraday series for US equities, which include the pre-market and
+    after-hours sessions from 04:00 to 20:00 Eastern; use regular_hours() for 09:30 to 16:00.
+    """
+    def __init__(self, open_time: str = "04:00", close_time: str = "20:00", weekmask: str = "Mon Tue Wed Thu Fri",
+                 holidays: Optional[Iterable[Union[str, date]]] = None, timezone: str = "US/Eastern"):
+        """
+        Initializes the TradingCalendar.
+
+        Args:
+            open_time: The session open, as 'HH:MM'.
+            close_time: The session close, as 'HH:MM'.
+            weekmask: The trading weekdays, in numpy.busday format.
+            holidays: The dates without a session. Defaults to the NYSE holiday rules.
+            timezone: The exchange's timezone; timezone-aware timestamps are converted to it.
+        """
+        self.open_ns = pd.Timedelta(f"{open_time}:00").value
+        self.close_ns = pd.Timedelta(f"{close_time}:00").value
+        if not 0 <= self.open_ns < self.close_ns <= NS_PER_DAY:
+            raise ValueError("The session must open before it closes, within one day.")
+        self.weekmask = weekmask
+        self.timezone = timezone
+        self._holidays = None if holidays is None else np.array(sorted(pd.to_datetime(list(holidays)).date),
+                                                                dtype="datetime64[D]")
+
+    @property
+    def key(self) -> Tuple:
+        """A hashable identity of the calendar's sessions."""
+        holidays = None if self._holidays is None else tuple(self._holidays.tolist())
+        return (self.open_ns, self.close_ns, self.weekmask, holidays, self.timezone)
+
+    @classmethod
+    def regular_hours(cls, **kwargs) -> 'TradingCalendar':
+        """The regular US equity session, 09:30 to 16:00 Eastern."""
+        return cls(open_time="09:30", close_time="16:00", **kwargs)
+
+    def holidays(self, start: np.datetime64, end: np.datetime64) -> np.ndarray:
+        """Returns the holidays between two dates, inclusive, as datetime64[D]."""
+        if self._holidays is not None:
+            return self._holidays
+        dates = NYSEHolidayCalendar().holidays(pd.Timestamp(start), pd.Timestamp(end))
+        return dates.values.astype("datetime64[D]")
+
+    def sessions(self, start: Union[str, date, pd.Timestamp], end: Union[str, date, pd.Timestamp]) -> pd.DatetimeIndex:
+        """Returns the dates with a session between start and end, inclusive."""
+        days = np.arange(np.datetime64(pd.Timestamp(start).date(), "D"),
+                         np.datetime64(pd.Timestamp(end).date(), "D") + 1)
+        mask = np.is_busday(days, weekmask=self.weekmask, holidays=self.holidays(days[0], days[-1])) if len(days) else []
+        return pd.DatetimeIndex(days[mask])
+
+    def locate(self, timestamps: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Places timestamps in their sessions.
+
+        Args:
+            timestamps: Local exchange times, as int64 nanoseconds since the epoch.
+
+        Returns:
+            For each timestamp, its day (in days since the epoch), its offset from that day's session open
+            in nanoseconds, and whether it falls inside a session.
+        """
+        days = np.floor_divide(timestamps, NS_PER_DAY)
+        offsets = timestamps - days * NS_PER_DAY - self.open_ns
+        if not len(timestamps):
+            return days, offsets, np.zeros(0, dtype=bool)
+        calendar_days = days.astype("datetime64[D]")
+        trading = np.is_busday(calendar_days, weekmask=self.weekmask,
+                               holidays=self.holidays(calendar_days.min(), calendar_days.max()))
+        inside = trading & (offsets >= 0) & (offsets < self.close_ns - self.open_ns)
+        return days, offsets, inside
+
+    def local_ns(self, index: pd.DatetimeIndex) -> np.ndarray:
+        """Returns an index's timestamps as naive local exchange times, in int64 nanoseconds."""
+        if index.tz is not None:
+            index = index.tz_convert(self.timezone).tz_localize(None)
+        return index.as_unit("ns").asi8
+
+
+def resample(bars: pd.DataFrame, interval: str, calendar: Optional[TradingCalendar] = None,
+             complete_until: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+    """Resamples fine-grained OHLCV bars to a coarser interval; see resample_many()."""
+    return resample_many(bars, [interval], calendar, complete_until)[interval]
+
+
+def resample_many(bars: pd.DataFrame, intervals: Sequence[str], calendar: Optional[TradingCalendar] = None,
+                  complete_until: Optional[pd.Timestamp] = None) -> Dict[str, pd.DataFrame]:
+    """
+    Derives coarser OHLCV series, e.g. '60min' and 'daily' from '5min' bars, in a single pass.
+
+    Bars are placed in their trading sessions once, then each interval is aggregated with one reduceat
+    per column: first open, highest high, lowest low, last close and summed volume. Intraday buckets are
+    anchored at the session open and end at the session close, and are labelled with their start time;
+    daily bars are labelled with their date. Only buckets that hold at least one bar are emitted, so
+    overnight, weekend and holiday gaps never produce filler bars. Bars outside the sessions and bars
+    with a missing price are dropped rather than filled.
+
+    Args:
+        bars: OHLCV bars in the DataExtractor schema, with a DatetimeIndex.
+        intervals: The target intervals, each coarser than the bars, e.g. ['30min', '60min', 'daily'].
+        calendar: The trading calendar. Defaults to TradingCalendar().
+        complete_until: The time up to which the bars are complete, e.g. the end of the last bar. Buckets
+            that end after it are still forming and are left out, so a stored bar is never a partial one.
+            None keeps every bucket.
+
+    Returns:
+        The resampled bars for each interval.
+    """
+    calendar = calendar or TradingCalendar()
+    with span("resample") as s:
+        if not bars.index.is_monotonic_increasing:
+            bars = bars.sort_index()
+        timestamps = calendar.local_ns(pd.DatetimeIndex(bars.index))
+        values = bars[BAR_COLUMNS].to_numpy(dtype=np.float64)
+        days, offsets, inside = calendar.locate(timestamps)
+        keep = inside & ~np.isnan(values[:, :4]).any(axis=1)
+        days, offsets, values = days[keep], offsets[keep], values[keep]
+        values[:, 4] = np.nan_to_num(values[:, 4])
+        closes = days * NS_PER_DAY + calendar.close_ns
+        if complete_until is not None:
+            complete_until = calendar.local_ns(pd.DatetimeIndex([complete_until]))[0]
+
+        resampled = {}
+        for interval in intervals:
+            minutes = interval_minutes(interval)
+            if minutes is None:
+                labels, ends = days * NS_PER_DAY, closes
+            else:
+                width = minutes * NS_PER_MINUTE
+                labels = days * NS_PER_DAY + calendar.open_ns + offsets // width * width
+                ends = np.minimum(labels + width, closes)
+            if complete_until is None:
+                resampled[interval] = _aggregate(values, labels)
+            else:
+                # Buckets are in time order, so only a trailing run of them can still be forming.
+                complete = ends <= complete_until
+                resampled[interval] = _aggregate(values[complete], labels[complete])
+        s.record(rows=len(bars), nbytes=values.nbytes)
+    return resampled
+
+
+def _aggregate(values: np.ndarray, labels: np.ndarray) -> pd.DataFrame:
+    """Aggregates sorted bars sharing a bucket label into one OHLCV bar per label."""
+    if not len(labels):
+        return pd.DataFrame(columns=BAR_COLUMNS, index=pd.DatetimeIndex([], dtype="datetime64[ns]"), dtype=np.float64)
+    starts = np.flatnonzero(np.concatenate(([True], labels[1:] != labels[:-1])))
+    ends = np.append(starts[1:], len(labels)) - 1
+    return pd.DataFrame({
+        "open": values[starts, 0],
+        "high": np.maximum.reduceat(values[:, 1], starts),
+        "low": np.minimum.reduceat(values[:, 2], starts),
+        "close": values[ends, 3],
+        "volume": np.add.reduceat(values[:, 4], starts)
+    }, index=pd.DatetimeIndex(labels[starts].astype("datetime64[ns]")))
@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from typing import Optional, Tuple, Union
+
+
+def window_view(values: np.ndarray, window_size: int) -> np.ndarray:
+    """
+    Returns a read-only strided view of every window of `window_size` consecutive rows.
+
+    Args:
+        values: A 2D array of shape (n_rows, n_features).
+        window_size: The number of rows in each window.
+
+    Returns:
+        An array of shape (n_rows - window_size + 1, window_size, n_features) sharing memory with `values`.
+    """
+    if values.ndim != 2:
+        raise ValueError(f"Expected a 2D array of shape (rows, features), got {values.ndim} dimensions.")
+    if window_size < 1:
+        raise ValueError("window_size must be a positive integer.")
+    if len(values) < window_size:
+        return np.empty((0, window_size, values.shape[1]), dtype=values.dtype)
+    return sliding_window_view(values, (window_size, values.shape[1]))[:, 0]
+
+
+def build_windows(data: Union[pd.DataFrame, np.ndarray],
+                  window_size: int,
+                  target: Union[str, int] = 'close',
+                  dtype: Optional[np.dtype] = None,
+                  materialize: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Builds (X, y) training windows where each window of `window_size` rows is paired with the
+    target value of the row that immediately follows it.
+
+    Args:
+        data: A DataFrame, or a 2D array of shape (n_rows, n_features).
+        window_size: The number of rows in each window.
+        target: The target column name (DataFrame) or column position (array).
+        dtype: The output dtype. Defaults to the dtype of the input values.
+        materialize: If False, X is returned as a read-only view over the input values
+            (unless a dtype conversion forces a copy). If True, X is a contiguous copy.
+
+    Returns:
+        A tuple (X, y) with X of shape (n_rows - window_size, window_size, n_features)
+        and y of shape (n_rows - window_size,).
+    """
+    if isinstance(data, pd.DataFrame):
+        target_index = data.columns.get_loc(target) if isinstance(target, str) else target
+        values = data.to_numpy()
+        # Keep the target column's own dtype, as selecting it from the frame would.
+        target_values = data.iloc[:, target_index].to_numpy()
+    else:
+        if isinstance(target, str):
+            raise ValueError("A column position must be given as target when windowing a raw array.")
+        values = np.asarray(data)
+        target_values = values[:, target]
+
+    n_samples = len(values) - window_size
+    if n_samples <= 0:
+        # Matches np.array([]) for an empty list of windows.
+        return np.array([], dtype=dtype), np.array([], dtype=dtype)
+
+    if dtype is not None:
+        values = values.astype(dtype, copy=False)
+        target_values = target_values.astype(dtype, copy=False)
+
+    X = window_view(values, window_size)[:n_samples]
+    y = target_values[window_size:]
+    if materialize:
+        X = np.ascontiguousarray(X)
+        y = y.copy()
+    return X, y
@@ -0,0 +1,219 @@
+import argparse
+import json
+import os
+import re
+import sys
+import threading
+import time
+import zlib
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+# Add the project root to the Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+# The body Alpha Vantage returns, with status 200, once the per-minute quota is used up.
+RATE_LIMIT_NOTE = ("Thank you for using Alpha Vantage! Our standard API call frequency is "
+                   "{} calls per minute. Please visit https://www.alphavantage.co/premium/ if you would like to "
+                   "target a higher API call frequency.")
+COMPACT_BARS = 100
+
+
+def recording_path(recordings_dir: str, ticker: str, interval: str) -> str:
+    """Returns the file a ticker's recorded response is stored in."""
+    key = re.sub(r"[^A-Za-z0-9.-]", "_", f"{ticker.upper()}_{interval}")
+    return os.path.join(recordings_dir, f"{key}.json")
+
+
+def record_response(recordings_dir: str, ticker: str, interval: str, response: Dict[str, Any]) -> str:
+    """Saves a real TIME_SERIES_INTRADAY response so the fake server can replay it."""
+    os.makedirs(recordings_dir, exist_ok=True)
+    path = recording_path(recordings_dir, ticker, interval)
+    with open(path, "w") as f:
+        json.dump(response, f)
+    return path
+
+
+class FakeAlphaVantageServer:
+    """
+    A local stand-in for the Alpha Vantage API, for testing connectors and load offline.
+
+    It answers TIME_SERIES_INTRADAY queries on /query from, in order: the `responses` given, JSON files
+    in `recordings_dir` (see record_response), or, with `synthetic=True`, generated bars seeded by the
+    ticker. Like the real API it honours outputsize=compact and, when `requests_per_minute` is set,
+    answers requests over the quota with a 200 "Note" body. Latency and server errors can be injected.
+    """
+    def __init__(self, responses: Optional[Dict[Tuple[str, str], Dict[str, Any]]] = None,
+                 recordings_dir: Optional[str] = None, synthetic: bool = True, synthetic_bars: int = 2000,
+                 requests_per_minute: Optional[int] = None, latency: float = 0.0,
+                 host: str = "127.0.0.1", port: int = 0):
+        """
+        Initializes the FakeAlphaVantageServer. The server is started by start() or by entering it as a context.
+
+        Args:
+            responses: Responses keyed by (ticker, interval).
+            recordings_dir: A directory of recorded responses.
+            synthetic: If True, tickers without a response are served generated bars.
+            synthetic_bars: The number of generated bars per ticker.
+            requests_per_minute: The quota over which requests are rate limited. None means no limit.
+            latency: Seconds to wait before answering each request.
+            host: The address to listen on.
+            port: The port to listen on; 0 picks a free port.
+        """
+        self.responses = dict(responses or {})
+        self.recordings_dir = recordings_dir
+        self.synthetic = synthetic
+        self.synthetic_bars = synthetic_bars
+        self.requests_per_minute = requests_per_minute
+        self.latency = latency
+        self.request_count = 0
+        self.request_counts: Dict[Tuple[str, str], int] = {}
+        self._failures = 0
+        self._recent = deque()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def port(self) -> int:
+        """The port the server listens on, which is the one picked when it was created with port 0."""
+        return self._server.server_address[1]
+
+    @property
+    def url(self) -> str:
+        return f"http://{self._server.server_address[0]}:{self.port}"
+
+    def start(self) -> 'FakeAlphaVantageServer':
+        """Serves requests on a background thread until stop()."""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        """Serves requests on the calling thread until interrupted, then closes the socket."""
+        try:
+            self._server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._server.server_close()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> 'FakeAlphaVantageServer':
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+        return False
+
+    def fail_next(self, count: int):
+        """Makes the next `count` requests fail with a 503."""
+        with self._lock:
+            self._failures += count
+
+    def respond(self, query: Dict[str, str]) -> Tuple[int, Dict[str, Any]]:
+        """Returns the status and JSON body for a request's query parameters."""
+        ticker, interval = query.get("symbol", ""), query.get("interval", "")
+        with self._lock:
+            self.request_count += 1
+            self.request_counts[(ticker, interval)] = self.request_counts.get((ticker, interval), 0) + 1
+            if self._failures:
+                self._failures -= 1
+                return 503, {"error": "Service Unavailable"}
+            if self.requests_per_minute is not None:
+                now = time.monotonic()
+                while self._recent and now - self._recent[0] >= 60:
+                    self._recent.popleft()
+                if len(self._recent) >= self.requests_per_minute:
+                    return 200, {"Note": RATE_LIMIT_NOTE.format(self.requests_per_minute)}
+                self._recent.append(now)
+
+        if query.get("function") != "TIME_SERIES_INTRADAY":
+            return 200, {"Error Message": "This API function does not exist."}
+        response = self._lookup(ticker, interval)
+        if response is None:
+            return 200, {"Error Message": f"Invalid API call. Unknown symbol '{ticker}'."}
+        if query.get("outputsize", "compact") == "compact":
+            response = _compact(response)
+        return 200, response
+
+    def _lookup(self, ticker: str, interval: str) -> Optional[Dict[str, Any]]:
+        response = self.responses.get((ticker, interval))
+        if response is None and self.recordings_dir:
+            path = recording_path(self.recordings_dir, ticker, interval)
+            if os.path.exists(path):
+                with open(path) as f:
+                    response = json.load(f)
+        if response is None and self.synthetic and ticker:
+            from benchmarks.synthetic import generate_ohlcv, to_api_response
+            bars = generate_ohlcv(self.synthetic_bars, seed=zlib.crc32(ticker.encode()), freq=interval)
+            response = to_api_response(bars, interval)
+            response["Meta Data"]["2. Symbol"] = ticker
+        if response is not None:
+            with self._lock:
+                self.responses[(ticker, interval)] = response
+        return response
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                if parsed.path.rstrip("/") != "/query":
+                    status, body = 404, {"error": "Not Found"}
+                else:
+                    if server.latency:
+                        time.sleep(server.latency)
+                    query = {key: values[-1] for key, values in parse_qs(parsed.query).items()}
+                    status, body = server.respond(query)
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def _compact(response: Dict[str, Any]) -> Dict[str, Any]:
+    """Keeps only the latest COMPACT_BARS bars, as outputsize=compact does."""
+    compacted = {}
+    for key, value in response.items():
+        if "Time Series" in key:
+            value = dict(sorted(value.items())[-COMPACT_BARS:])
+        compacted[key] = value
+    return compacted
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Serve a fake Alpha Vantage API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--recordings-dir", help="Directory of recorded responses to replay.")
+    parser.add_argument("--no-synthetic", action="store_true", help="Only serve recorded responses.")
+    parser.add_argument("--bars", type=int, default=2000, help="Bars per synthetic ticker.")
+    parser.add_argument("--requests-per-minute", type=int, help="Rate limit, as on the real API.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds of latency per request.")
+    args = parser.parse_args()
+
+    fake = FakeAlphaVantageServer(recordings_dir=args.recordings_dir, synthetic=not args.no_synthetic,
+                                  synthetic_bars=args.bars, requests_per_minute=args.requests_per_minute,
+                                  latency=args.latency, host=args.host, port=args.port)
+    print(f"Fake Alpha Vantage serving on {fake.url} (set ALPHA_VANTAGE_BASE_URL to use it)")
+    fake.serve_forever()
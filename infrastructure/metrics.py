@@ -0,0 +1,165 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, List, Optional, Tuple
+
+# Upper bounds (in seconds) of the latency histogram buckets.
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+
+class _StageStats:
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.bucket_counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum_seconds = 0.0
+        self.errors = 0
+        self.rows = 0
+        self.bytes = 0
+
+
+class MetricsRegistry:
+    """
+    Collects per-stage latency histograms, row counts and byte sizes, and renders them in the
+    Prometheus text exposition format.
+    """
+    def __init__(self, enabled: bool = True, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        """
+        Initializes the MetricsRegistry.
+
+        Args:
+            enabled: If False, span() returns a shared no-op span and nothing is recorded.
+            buckets: The upper bounds of the latency histogram buckets, in seconds.
+        """
+        self.enabled = enabled
+        self.buckets = tuple(sorted(buckets))
+        self._stages: Dict[str, _StageStats] = {}
+        self._lock = threading.Lock()
+
+    def span(self, stage: str) -> 'Span':
+        """Returns a context manager that times one run of `stage`."""
+        if not self.enabled:
+            return _NOOP_SPAN
+        return Span(self, stage)
+
+    def observe(self, stage: str, seconds: float, rows: Optional[int] = None, nbytes: Optional[int] = None,
+                error: bool = False):
+        """Records one completed run of a stage."""
+        if not self.enabled:
+            return
+        with self._lock:
+            stats = self._stages.get(stage)
+            if stats is None:
+                stats = self._stages[stage] = _StageStats(self.buckets)
+            stats.bucket_counts[bisect_left(self.buckets, seconds)] += 1
+            stats.count += 1
+            stats.sum_seconds += seconds
+            if error:
+                stats.errors += 1
+            if rows is not None:
+                stats.rows += int(rows)
+            if nbytes is not None:
+                stats.bytes += int(nbytes)
+
+    def snapshot(self) -> Dict[str, Dict[str, object]]:
+        """Returns everything recorded so far as plain data, e.g. to send it to another process."""
+        with self._lock:
+            return {stage: dict(vars(stats), bucket_counts=list(stats.bucket_counts))
+                    for stage, stats in self._stages.items()}
+
+    def merge(self, snapshot: Dict[str, Dict[str, object]]):
+        """Adds a snapshot() taken in another process, e.g. a training worker, to this registry."""
+        if not self.enabled:
+            return
+        with self._lock:
+            for stage, recorded in snapshot.items():
+                stats = self._stages.get(stage)
+                if stats is None:
+                    stats = self._stages[stage] = _StageStats(self.buckets)
+                if len(recorded["bucket_counts"]) != len(stats.bucket_counts):
+                    raise ValueError("Cannot merge metrics recorded with different histogram buckets.")
+                stats.bucket_counts = [a + b for a, b in zip(stats.bucket_counts, recorded["bucket_counts"])]
+                for name in ("count", "sum_seconds", "errors", "rows", "bytes"):
+                    setattr(stats, name, getattr(stats, name) + recorded[name])
+
+    def reset(self):
+        """Discards everything recorded so far."""
+        with self._lock:
+            self._stages = {}
+
+    def render_prometheus(self) -> str:
+        """Returns all recorded metrics in the Prometheus text exposition format."""
+        with self._lock:
+            stages = sorted(self._stages.items())
+            lines: List[str] = [
+                "# HELP pipeline_stage_duration_seconds Latency of each pipeline and model stage.",
+                "# TYPE pipeline_stage_duration_seconds histogram"
+            ]
+            for stage, stats in stages:
+                cumulative = 0
+                for bound, count in zip(self.buckets, stats.bucket_counts):
+                    cumulative += count
+                    lines.append(f'pipeline_stage_duration_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+                lines.append(f'pipeline_stage_duration_seconds_bucket{{stage="{stage}",le="+Inf"}} {stats.count}')
+                lines.append(f'pipeline_stage_duration_seconds_sum{{stage="{stage}"}} {stats.sum_seconds}')
+                lines.append(f'pipeline_stage_duration_seconds_count{{stage="{stage}"}} {stats.count}')
+
+            for name, attribute, help_text in (
+                    ("pipeline_stage_errors_total", "errors", "Runs of each stage that raised an exception."),
+                    ("pipeline_stage_rows_total", "rows", "Rows processed by each stage."),
+                    ("pipeline_stage_bytes_total", "bytes", "Bytes produced or transferred by each stage.")):
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} counter")
+                for stage, stats in stages:
+                    lines.append(f'{name}{{stage="{stage}"}} {getattr(stats, attribute)}')
+        return "\n".join(lines) + "\n"
+
+
+class Span:
+    """Times a block of code and records it under a stage name, along with optional row and byte counts."""
+    __slots__ = ("registry", "stage", "rows", "nbytes", "started")
+
+    def __init__(self, registry: MetricsRegistry, stage: str):
+        self.registry = registry
+        self.stage = stage
+        self.rows = None
+        self.nbytes = None
+        self.started = 0.0
+
+    def record(self, rows: Optional[int] = None, nbytes: Optional[int] = None):
+        """Attaches the number of rows and bytes handled by this run of the stage."""
+        self.rows = rows
+        self.nbytes = nbytes
+
+    def __enter__(self) -> 'Span':
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.registry.observe(self.stage, time.perf_counter() - self.started, self.rows, self.nbytes,
+                              error=exc_type is not None)
+        return False
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def record(self, rows: Optional[int] = None, nbytes: Optional[int] = None):
+        pass
+
+    def __enter__(self) -> '_NoopSpan':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+# The process-wide registry used by the pipeline, the models and the /metrics endpoint.
+metrics = MetricsRegistry(enabled=os.getenv("METRICS_ENABLED", "1").lower() not in ("0", "false", "no"))
+
+
+def span(stage: str) -> Span:
+    """Returns a timing span for `stage` on the process-wide registry."""
+    return metrics.span(stage)
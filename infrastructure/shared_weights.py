@@ -0,0 +1,208 @@
+import fcntl
+import json
+import os
+import tempfile
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from core.models.numpy_lstm import NumpyLSTM
+from models.model_trainer import FinancialModel
+from infrastructure.metrics import span
+
+# Array offsets in the weight files are aligned to cache lines.
+ALIGNMENT = 64
+
+
+def default_root() -> str:
+    """The default store directory: on /dev/shm where it exists, so the weights never touch the disk."""
+    base = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(base, "financial-prediction-weights")
+
+
+class SharedWeightStore:
+    """
+    Model weights shared read-only by every process on a node.
+
+    Each ticker's exported NumPy weights are published once into a single flat file, ideally on tmpfs,
+    and every process serving predictions memory-maps that file read-only. The arrays of the NumpyLSTM
+    it gets back are views of the mapping, so N worker processes share one copy of the weights in the
+    page cache instead of holding N.
+
+    Published weights are versioned by the modification time of the ticker's model file, as
+    ModelRegistry.version() is. A retrained model is published as a new file and the ticker's JSON
+    manifest is atomically switched to it; processes still using the old mapping keep a valid view until
+    they drop it, even once the old file is removed.
+    """
+    def __init__(self, root: Optional[str] = None, models_dir: Optional[str] = None, keep_versions: int = 2):
+        """
+        Initializes the SharedWeightStore.
+
+        Args:
+            root: The directory the weight files and manifests are kept in. Defaults to default_root().
+            models_dir: The directory models are saved in. Defaults to the 'models' directory.
+            keep_versions: How many versions of a ticker's weights are kept; older ones are removed.
+        """
+        self.root = root or default_root()
+        self.models_dir = models_dir
+        self.keep_versions = keep_versions
+        os.makedirs(self.root, exist_ok=True)
+
+    @classmethod
+    def from_env(cls) -> Optional['SharedWeightStore']:
+        """Returns the store in SHARED_WEIGHTS_DIR, or None if shared weights are not enabled."""
+        root = os.getenv("SHARED_WEIGHTS_DIR")
+        return cls(root) if root else None
+
+    def manifest_path(self, ticker: str) -> str:
+        return os.path.join(self.root, f"{ticker}.json")
+
+    def version(self, ticker: str) -> Optional[int]:
+        """Returns the version of a ticker's published weights, or None if none are published."""
+        manifest = self._read_manifest(ticker)
+        return manifest["version"] if manifest else None
+
+    def tickers(self) -> List[str]:
+        """Returns the tickers with published weights."""
+        return sorted(name[:-len(".json")] for name in os.listdir(self.root) if name.endswith(".json"))
+
+    def publish(self, ticker: str, models_dir: Optional[str] = None) -> int:
+        """
+        Publishes the weights of a ticker's saved model, unless that version is already published.
+
+        The weights are read from the exported .npz file. If it is missing or older than the model file,
+        the Keras model is loaded and exported first, which needs TensorFlow.
+
+        Returns:
+            The published version.
+
+        Raises:
+            FileNotFoundError: If the ticker has no saved model.
+        """
+        models_dir = models_dir or self.models_dir
+        model_path = FinancialModel.model_path(ticker, models_dir)
+        weights_path = FinancialModel.weights_path(ticker, models_dir)
+        with open(os.path.join(self.root, f"{ticker}.lock"), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                version = os.stat(model_path).st_mtime_ns
+            except FileNotFoundError:
+                raise FileNotFoundError(f"Model file not found at {model_path}. Please train the model first.")
+            manifest = self._read_manifest(ticker)
+            if manifest is not None and manifest["version"] == version:
+                return version
+
+            if not os.path.exists(weights_path) or os.path.getmtime(weights_path) < os.path.getmtime(model_path):
+                print(f"Exporting NumPy weights for {ticker}...")
+                FinancialModel.load(ticker, models_dir).export_weights(weights_path)
+
+            with span("shared_weights_publish") as s:
+                model = NumpyLSTM.load(weights_path)
+                data_file = f"{ticker}.{version}.bin"
+                layers, size = _layout(model)
+                tmp_path = os.path.join(self.root, f".{data_file}.{os.getpid()}.{threading.get_ident()}.tmp")
+                buffer = np.zeros(size, dtype=np.uint8)
+                for layer, specs in zip(model.layers, layers):
+                    for key, (offset, shape, dtype) in specs["arrays"].items():
+                        array = np.ascontiguousarray(layer[key], dtype=dtype)
+                        buffer[offset:offset + array.nbytes] = array.view(np.uint8).ravel()
+                buffer.tofile(tmp_path)
+                os.replace(tmp_path, os.path.join(self.root, data_file))
+                s.record(nbytes=size)
+
+            self._write_manifest(ticker, {"ticker": ticker, "version": version, "file": data_file, "layers": layers})
+            self._prune(ticker, version)
+        print(f"Published shared weights for {ticker} (version {version}).")
+        return version
+
+    def attach(self, ticker: str) -> Optional[Tuple[int, NumpyLSTM]]:
+        """
+        Maps a ticker's published weights read-only.
+
+        Returns:
+            The version and a NumpyLSTM whose weights are views of the shared mapping, or None if the
+            ticker has no published weights.
+        """
+        # A publish may remove the file between reading the manifest and opening it; read it again then.
+        for _ in range(3):
+            manifest = self._read_manifest(ticker)
+            if manifest is None:
+                return None
+            try:
+                mapping = np.memmap(os.path.join(self.root, manifest["file"]), dtype=np.uint8, mode="r")
+            except FileNotFoundError:
+                continue
+            layers = []
+            for specs in manifest["layers"]:
+                layer = dict(specs["spec"])
+                for key, (offset, shape, dtype) in specs["arrays"].items():
+                    count = int(np.prod(shape, dtype=np.int64))
+                    layer[key] = mapping[offset:offset + count * np.dtype(dtype).itemsize].view(dtype).reshape(shape)
+                layers.append(layer)
+            return manifest["version"], NumpyLSTM(layers)
+        return None
+
+    def load(self, ticker: str, models_dir: Optional[str] = None) -> NumpyLSTM:
+        """
+        Returns a ticker's model backed by the shared weights, publishing the saved model first if the
+        published version is missing or stale. Usable as a ModelRegistry loader.
+
+        Raises:
+            FileNotFoundError: If the ticker has no saved model.
+            RuntimeError: If the weights cannot be attached even after publishing them.
+        """
+        model_path = FinancialModel.model_path(ticker, models_dir or self.models_dir)
+        try:
+            version = os.stat(model_path).st_mtime_ns
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Model file not found at {model_path}. Please train the model first.")
+        attached = self.attach(ticker)
+        if attached is None or attached[0] != version:
+            self.publish(ticker, models_dir)
+            attached = self.attach(ticker)
+            if attached is None:
+                # e.g. the weights file was pruned by a concurrent publish on every retry.
+                raise RuntimeError(f"Could not attach the shared weights of {ticker} in {self.root} after publishing them.")
+        return attached[1]
+
+    def _prune(self, ticker: str, version: int):
+        prefix = f"{ticker}."
+        versions = []
+        for name in os.listdir(self.root):
+            stem = name[len(prefix):-len(".bin")] if name.startswith(prefix) and name.endswith(".bin") else ""
+            if stem.isdigit():
+                versions.append(int(stem))
+        for old in sorted(v for v in versions if v != version)[:-(self.keep_versions - 1) or None]:
+            # Processes that mapped the old file keep their pages until they unmap it.
+            os.remove(os.path.join(self.root, f"{prefix}{old}.bin"))
+
+    def _read_manifest(self, ticker: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.manifest_path(ticker)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _write_manifest(self, ticker: str, manifest: Dict[str, Any]):
+        manifest_path = self.manifest_path(ticker)
+        tmp_path = f"{manifest_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, manifest_path)
+
+
+def _layout(model: NumpyLSTM) -> Tuple[List[Dict[str, Any]], int]:
+    """Assigns every weight array an aligned offset in one flat buffer. Returns the layer specs and the size."""
+    layers, size = [], 0
+    for layer in model.layers:
+        spec, arrays = {}, {}
+        for key, value in layer.items():
+            if isinstance(value, np.ndarray):
+                size = -(-size // ALIGNMENT) * ALIGNMENT
+                arrays[key] = (size, list(value.shape), value.dtype.str)
+                size += value.nbytes
+            else:
+                spec[key] = value
+        layers.append({"spec": spec, "arrays": arrays})
+    return layers, size
@@ -0,0 +1,159 @@
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Dict, Hashable, List
+
+import numpy as np
+
+
+class QueueFullError(RuntimeError):
+    """Raised when a model's inference queue is at its maximum depth."""
+
+
+class _PendingPrediction:
+    def __init__(self, model: Any, inputs: np.ndarray):
+        self.model = model
+        self.inputs = inputs
+        self.enqueued_at = time.perf_counter()
+        self.future: Future = Future()
+
+
+class InferenceScheduler:
+    """
+    Groups concurrent prediction requests into batched forward passes.
+
+    Requests are queued per key (usually the ticker). A background worker per key flushes its queue as a
+    single `model.predict` call once `max_batch_size` inputs are waiting or the oldest has waited
+    `max_wait_ms`, and hands each caller back its own rows of the output.
+    """
+    def __init__(self, max_batch_size: int = 32, max_wait_ms: float = 5.0, max_queue_depth: int = 1024,
+                 idle_timeout: float = 60.0, stats_window: int = 100):
+        """
+        Initializes the InferenceScheduler.
+
+        Args:
+            max_batch_size: The maximum number of inputs in one forward pass.
+            max_wait_ms: The longest time an input waits for others to join its batch.
+            max_queue_depth: The maximum number of inputs waiting per key before submit() is rejected.
+            idle_timeout: Seconds after which an idle key's worker thread exits.
+            stats_window: The number of recent batches kept for stats().
+        """
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_queue_depth = max_queue_depth
+        self.idle_timeout = idle_timeout
+        self._queues: Dict[Hashable, queue.Queue] = {}
+        self._workers: Dict[Hashable, threading.Thread] = {}
+        self._lock = threading.Lock()
+        self._recent_batches = deque(maxlen=stats_window)
+        self._totals = {"batches": 0, "requests": 0, "errors": 0}
+
+    def submit(self, key: Hashable, model: Any, inputs: np.ndarray) -> Future:
+        """
+        Queues a single input of shape (window_size, n_features) for a batched prediction.
+
+        Args:
+            key: The queue to join, e.g. the ticker.
+            model: Any object with a `predict(batch)` method returning one row per input.
+            inputs: The model input for one prediction.
+
+        Returns:
+            A Future resolving to this input's row of the model output.
+
+        Raises:
+            QueueFullError: If the key already has `max_queue_depth` inputs waiting.
+        """
+        pending = _PendingPrediction(model, np.asarray(inputs))
+        with self._lock:
+            key_queue = self._queues.get(key)
+            if key_queue is None:
+                key_queue = self._queues[key] = queue.Queue(maxsize=self.max_queue_depth)
+            try:
+                key_queue.put_nowait(pending)
+            except queue.Full:
+                raise QueueFullError(f"Inference queue for {key} is full ({self.max_queue_depth} pending).")
+            worker = self._workers.get(key)
+            if worker is None:
+                worker = threading.Thread(target=self._run_worker, args=(key, key_queue),
+                                          name=f"inference-{key}", daemon=True)
+                self._workers[key] = worker
+                worker.start()
+        return pending.future
+
+    def predict(self, key: Hashable, model: Any, inputs: np.ndarray, timeout: float = None) -> np.ndarray:
+        """Submits a single input and blocks until its prediction is ready."""
+        return self.submit(key, model, inputs).result(timeout=timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns running totals and the most recent per-batch statistics."""
+        with self._lock:
+            recent = list(self._recent_batches)
+            totals = dict(self._totals)
+            queue_depths = {str(key): q.qsize() for key, q in self._queues.items()}
+        totals["mean_batch_size"] = totals["requests"] / totals["batches"] if totals["batches"] else 0.0
+        return {
+            "config": {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000.0,
+                "max_queue_depth": self.max_queue_depth
+            },
+            "totals": totals,
+            "queue_depths": queue_depths,
+            "recent_batches": recent
+        }
+
+    def _run_worker(self, key: Hashable, key_queue: queue.Queue):
+        while True:
+            try:
+                first = key_queue.get(timeout=self.idle_timeout)
+            except queue.Empty:
+                with self._lock:
+                    if key_queue.empty():
+                        del self._workers[key]
+                        del self._queues[key]
+                        return
+                continue
+
+            batch = [first]
+            deadline = first.enqueued_at + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(key_queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._flush(key, batch)
+
+    def _flush(self, key: Hashable, batch: List[_PendingPrediction]):
+        # Requests can only share a forward pass if they target the same model with the same input shape.
+        groups: Dict[Any, List[_PendingPrediction]] = {}
+        for pending in batch:
+            groups.setdefault((id(pending.model), pending.inputs.shape), []).append(pending)
+
+        for group in groups.values():
+            started = time.perf_counter()
+            try:
+                outputs = np.asarray(group[0].model.predict(np.stack([p.inputs for p in group])))
+            except Exception as e:
+                for pending in group:
+                    pending.future.set_exception(e)
+                with self._lock:
+                    self._totals["errors"] += 1
+                continue
+            finished = time.perf_counter()
+
+            for pending, output in zip(group, outputs):
+                pending.future.set_result(output)
+            with self._lock:
+                self._totals["batches"] += 1
+                self._totals["requests"] += len(group)
+                self._recent_batches.append({
+                    "key": str(key),
+                    "batch_size": len(group),
+                    "max_queue_wait_ms": (started - group[0].enqueued_at) * 1000.0,
+                    "inference_ms": (finished - started) * 1000.0
+                })
@@ -1,15 +1,23 @@
-import tensorflow as tf
-from tensorflow.keras.models import Sequential, load_model as keras_load_model
-from tensorflow.keras.layers import LSTM, Dense, Dropout
+import json
 import numpy as np
+import pandas as pd
 import os
-from typing import List, Optional
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from core.models.numpy_lstm import NumpyLSTM
+from data.dataset import WindowedDataset
+from infrastructure.metrics import span
+
+# TensorFlow is imported inside the methods that need it, so that serving predictions from exported
+# NumPy weights never loads it.
 
 class FinancialModel:
     """
     A class to handle the building, training, saving, and loading of a financial prediction model.
     """
-    def __init__(self, model: Optional[Sequential] = None, ticker: str = "default"):
+    def __init__(self, model: Optional[Any] = None, ticker: str = "default"):
         """
         Initializes the FinancialModel.
 
@@ -31,6 +39,9 @@ class FinancialModel:
             dropout_rate: The dropout rate.
             dense_units: The number of units in the Dense layer.
         """
+        from tensorflow.keras.models import Sequential
+        from tensorflow.keras.layers import LSTM, Dense, Dropout
+
         model = Sequential()
         for i, units in enumerate(lstm_units):
             return_sequences = i < len(lstm_units) - 1
@@ -46,7 +57,8 @@ class FinancialModel:
         model.compile(optimizer='adam', loss='mean_squared_error')
         self.model = model
 
-    def train(self, X_train: np.ndarray, y_train: np.ndarray, epochs: int = 20, batch_size: int = 32):
+    def train(self, X_train: np.ndarray, y_train: np.ndarray, epochs: int = 20, batch_size: int = 32,
+              callbacks: Optional[list] = None):
         """
         Trains the model.
 
@@ -55,20 +67,97 @@ class FinancialModel:
             y_train: The training labels.
             epochs: The number of epochs to train for.
             batch_size: The batch size.
+            callbacks: Optional Keras callbacks passed to fit(), e.g. for progress reporting.
         """
         if self.model is None:
             raise ValueError("Model has not been built or loaded. Call build() or load() first.")
 
         print("Starting model training...")
-        self.history = self.model.fit(X_train, y_train, epochs=epochs, batch_size=batch_size, validation_split=0.1, verbose=1)
+        with span("train") as s:
+            self.history = self.model.fit(X_train, y_train, epochs=epochs, batch_size=batch_size, validation_split=0.1,
+                                          verbose=1, callbacks=callbacks)
+            s.record(rows=len(X_train), nbytes=X_train.nbytes)
+        print("Model training completed.")
+
+    def train_on_frame(self, df: pd.DataFrame, window_size: int, epochs: int = 20, batch_size: int = 32,
+                       validation_split: float = 0.1, prefetch_workers: int = 2, max_queue_size: int = 10,
+                       callbacks: Optional[list] = None):
+        """
+        Trains the model on windows generated lazily from a cleaned DataFrame, in shuffled batches.
+
+        Peak memory is bounded by the batch size instead of the full (n_samples, window_size, n_features)
+        tensor. The last `validation_split` of the windows is held out, as with train().
+
+        Args:
+            df: The cleaned DataFrame, with a 'close' column as the target.
+            window_size: The number of rows in each window.
+            epochs: The number of epochs to train for.
+            batch_size: The batch size.
+            validation_split: The fraction of windows used for validation.
+            prefetch_workers: The number of threads preparing batches ahead of the model.
+            max_queue_size: The number of batches prepared ahead.
+            callbacks: Optional Keras callbacks passed to fit().
+        """
+        self.train_on_arrays(df.to_numpy(), df['close'].to_numpy(), window_size, epochs, batch_size,
+                             validation_split, prefetch_workers, max_queue_size, callbacks)
+
+    def train_on_arrays(self, values: np.ndarray, targets: np.ndarray, window_size: int, epochs: int = 20,
+                        batch_size: int = 32, validation_split: float = 0.1, prefetch_workers: int = 2,
+                        max_queue_size: int = 10, callbacks: Optional[list] = None):
+        """
+        Trains the model like train_on_frame(), on a feature matrix and its target column.
+
+        Float32 inputs, such as the memory-mapped arrays of a FeatureSet, are used in place without copying.
+
+        Args:
+            values: The feature rows, of shape (n_rows, n_features).
+            targets: The target value of each row, of shape (n_rows,).
+            The remaining arguments are as for train_on_frame().
+        """
+        if self.model is None:
+            raise ValueError("Model has not been built or loaded. Call build() or load() first.")
+
+        dataset = WindowedDataset(values, targets, window_size, batch_size=batch_size, shuffle=True)
+        train_data, validation_data = dataset.split(validation_split)
+
+        print("Starting streaming model training...")
+        with span("train") as s:
+            self.history = self.model.fit(
+                train_data.to_keras(prefetch_workers, max_queue_size),
+                validation_data=validation_data.to_keras(prefetch_workers, max_queue_size) if validation_data.n_samples else None,
+                epochs=epochs, verbose=1, callbacks=callbacks)
+            s.record(rows=dataset.n_samples, nbytes=dataset.values.nbytes)
         print("Model training completed.")
 
-    def save(self, models_dir: Optional[str] = None) -> str:
+    def predict(self, X: np.ndarray) -> np.ndarray:
         """
-        Saves the trained model to a file.
+        Runs a single forward pass over a batch of sequences.
+
+        Args:
+            X: The input sequences, of shape (batch_size, window_size, n_features).
+
+        Returns:
+            The predictions, of shape (batch_size, 1).
+        """
+        if self.model is None:
+            raise ValueError("Model has not been built or loaded. Call build() or load() first.")
+        with span("predict") as s:
+            predictions = np.asarray(self.model.predict_on_batch(X))
+            s.record(rows=len(X), nbytes=X.nbytes)
+        return predictions
+
+    def save(self, models_dir: Optional[str] = None, feature_spec: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Saves the trained model to a file, along with its weights exported for NumPy inference.
+
+        The model file's modification time is its version (see ModelRegistry.version()). It is set
+        explicitly, so the feature spec can be saved under the same version before the model is renamed
+        into place.
 
         Args:
             models_dir: The directory to save the model in. Defaults to the 'models' directory.
+            feature_spec: A description of the features the model was trained on, such as the feature store
+                config, columns and fitted scaler, saved as JSON next to the model so inference can reproduce them.
 
         Returns:
             The path to the saved model.
@@ -76,16 +165,115 @@ class FinancialModel:
         if self.model is None:
             raise ValueError("No model to save.")
 
-        if models_dir is None:
-            models_dir = os.path.dirname(__file__)
-
-        os.makedirs(models_dir, exist_ok=True)
-
-        model_path = os.path.join(models_dir, f'{self.ticker}_model.keras')
-        self.model.save(model_path)
+        model_path = self.model_path(self.ticker, models_dir)
+        os.makedirs(os.path.dirname(model_path), exist_ok=True)
+        # Write to a temporary file and rename it into place, so readers never see a partial model.
+        tmp_path = os.path.join(os.path.dirname(model_path), f'.{self.ticker}_model.{os.getpid()}.tmp.keras')
+        try:
+            self.model.save(tmp_path)
+            # Exported before the rename, so the weights are never older than the model file that versions them.
+            weights_path = self.export_weights(self.weights_path(self.ticker, models_dir))
+            version = time.time_ns()
+            self._save_feature_spec(models_dir, version, feature_spec)
+            os.utime(weights_path, ns=(version, version))
+            os.utime(tmp_path, ns=(version, version))
+            os.replace(tmp_path, model_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
         print(f"Model saved to {model_path}")
         return model_path
 
+    def export_weights(self, file_path: str) -> str:
+        """
+        Exports the weights to a .npz file that NumpyLSTM can run without TensorFlow.
+
+        Args:
+            file_path: The path of the .npz file.
+
+        Returns:
+            The path of the exported weights.
+        """
+        if self.model is None:
+            raise ValueError("No model to export.")
+        NumpyLSTM.from_keras(self.model).save(file_path)
+        return file_path
+
+    @staticmethod
+    def weights_path(ticker: str, models_dir: Optional[str] = None) -> str:
+        """Returns the file path a ticker's exported NumPy weights are saved to."""
+        return os.path.splitext(FinancialModel.model_path(ticker, models_dir))[0] + '.npz'
+
+    @staticmethod
+    def features_path(ticker: str, models_dir: Optional[str] = None) -> str:
+        """Returns the file path a ticker's feature spec is saved to."""
+        return os.path.splitext(FinancialModel.model_path(ticker, models_dir))[0] + '_features.json'
+
+    @classmethod
+    def load_feature_spec(cls, ticker: str, models_dir: Optional[str] = None,
+                          model_version: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """
+        Returns the feature spec saved with a ticker's model, or None if it was saved without one.
+
+        Args:
+            ticker: The ticker symbol for the model.
+            models_dir: The directory where the model is saved.
+            model_version: The version of the model the spec must belong to (ModelRegistry.version()).
+                Defaults to the latest saved model.
+
+        Raises:
+            RuntimeError: If no spec was saved with that version of the model.
+        """
+        try:
+            with open(cls.features_path(ticker, models_dir)) as f:
+                saved = json.load(f)
+        except FileNotFoundError:
+            return None
+        if "specs" not in saved:
+            # Saved before specs were versioned.
+            return saved
+        specs = saved["specs"]
+        if model_version is None:
+            return specs[max(specs, key=int)] if specs else None
+        if str(model_version) not in specs:
+            raise RuntimeError(f"No feature spec was saved with version {model_version} of the {ticker} model.")
+        return specs[str(model_version)]
+
+    def _save_feature_spec(self, models_dir: Optional[str], version: int, feature_spec: Optional[Dict[str, Any]]):
+        """
+        Adds the spec of a model version to the ticker's spec file, replacing the file atomically.
+
+        The previous version's spec is kept as well, so requests still serving the old model find its spec
+        while the new model is being renamed into place.
+        """
+        path = self.features_path(self.ticker, models_dir)
+        try:
+            with open(path) as f:
+                specs = json.load(f).get("specs", {})
+        except (FileNotFoundError, ValueError):
+            specs = {}
+        if specs:
+            latest = max(specs, key=int)
+            specs = {latest: specs[latest]}
+        specs[str(version)] = feature_spec
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({"specs": specs}, f)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def model_path(ticker: str, models_dir: Optional[str] = None) -> str:
+        """
+        Returns the file path a ticker's model is saved to.
+
+        Args:
+            ticker: The ticker symbol for the model.
+            models_dir: The directory where the model is saved. Defaults to MODELS_DIR, then the 'models' directory.
+        """
+        if models_dir is None:
+            models_dir = os.getenv("MODELS_DIR") or os.path.dirname(__file__)
+        return os.path.join(models_dir, f'{ticker}_model.keras')
+
     @classmethod
     def load(cls, ticker: str, models_dir: Optional[str] = None) -> 'FinancialModel':
         """
@@ -98,16 +286,17 @@ class FinancialModel:
         Returns:
             A FinancialModel instance with the loaded model.
         """
-        if models_dir is None:
-            models_dir = os.path.dirname(__file__)
-
-        model_path = os.path.join(models_dir, f'{ticker}_model.keras')
+        model_path = cls.model_path(ticker, models_dir)
 
         if not os.path.exists(model_path):
             raise FileNotFoundError(f"Model file not found at {model_path}. Please train the model first.")
 
         print(f"Loading model from {model_path}")
-        model = keras_load_model(model_path)
+        from tensorflow.keras.models import load_model as keras_load_model
+
+        with span("model_load") as s:
+            model = keras_load_model(model_path)
+            s.record(nbytes=os.path.getsize(model_path))
         return cls(model=model, ticker=ticker)
 
     def get_summary(self):
@@ -0,0 +1,165 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Iterable, List, Optional, Tuple
+
+from core.models.numpy_lstm import NumpyLSTM
+from models.model_trainer import FinancialModel
+from infrastructure.metrics import span
+
+
+def load_inference_model(ticker: str, models_dir: Optional[str] = None) -> Any:
+    """
+    Loads a ticker's model for serving predictions.
+
+    The exported NumPy weights are used when they are at least as new as the Keras model file, so
+    TensorFlow is not needed. Otherwise the Keras model is loaded.
+    """
+    model_path = FinancialModel.model_path(ticker, models_dir)
+    weights_path = FinancialModel.weights_path(ticker, models_dir)
+    if os.path.exists(weights_path) and os.path.exists(model_path) \
+            and os.path.getmtime(weights_path) >= os.path.getmtime(model_path):
+        with span("model_load") as s:
+            model = NumpyLSTM.load(weights_path)
+            s.record(nbytes=os.path.getsize(weights_path))
+        return model
+    return FinancialModel.load(ticker, models_dir)
+
+
+class _RegistryEntry:
+    def __init__(self, model: Any, version: int, nbytes: int):
+        self.model = model
+        self.version = version
+        self.nbytes = nbytes
+
+
+class ModelRegistry:
+    """
+    A process-level cache of loaded models, so requests don't deserialize the model file every time.
+
+    Models are evicted least-recently-used first once more than `max_models` are loaded or their
+    estimated weight size exceeds `max_bytes`. A model is reloaded when its file on disk changes.
+    """
+    def __init__(self, models_dir: Optional[str] = None, max_models: int = 8, max_bytes: Optional[int] = None,
+                 loader: Callable[[str, Optional[str]], Any] = load_inference_model):
+        """
+        Initializes the ModelRegistry.
+
+        Args:
+            models_dir: The directory models are saved in. Defaults to the 'models' directory.
+            max_models: The maximum number of models kept in memory.
+            max_bytes: The maximum estimated size of all cached model weights. None means no limit.
+            loader: Loads a model given a ticker and models_dir. The model must have a predict(X) method.
+        """
+        self.models_dir = models_dir
+        self.max_models = max_models
+        self.max_bytes = max_bytes
+        self.loader = loader
+        self._entries: 'OrderedDict[str, _RegistryEntry]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_locks = {}
+
+    def version(self, ticker: str) -> int:
+        """
+        Returns the version of the model file on disk, as its modification time in nanoseconds.
+
+        Raises:
+            FileNotFoundError: If the ticker has no saved model.
+        """
+        model_path = FinancialModel.model_path(ticker, self.models_dir)
+        try:
+            return os.stat(model_path).st_mtime_ns
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Model file not found at {model_path}. Please train the model first.")
+
+    def get(self, ticker: str) -> Any:
+        """
+        Returns the model for a ticker, loading it if it is not cached or its file has changed.
+
+        Raises:
+            FileNotFoundError: If the ticker has no saved model.
+        """
+        return self.get_versioned(ticker)[0]
+
+    def get_versioned(self, ticker: str) -> Tuple[Any, int]:
+        """
+        Returns the model for a ticker along with its version, e.g. to load the feature spec saved with it.
+
+        Raises:
+            FileNotFoundError: If the ticker has no saved model.
+        """
+        version = self.version(ticker)
+        model = self._lookup(ticker, version)
+        if model is not None:
+            return model, version
+
+        with self._lock:
+            load_lock = self._load_locks.setdefault(ticker, threading.Lock())
+        with load_lock:
+            while True:
+                # Another request may have loaded the same version while we waited.
+                model = self._lookup(ticker, version)
+                if model is not None:
+                    return model, version
+                model = self.loader(ticker, self.models_dir)
+                loaded_version = self.version(ticker)
+                if loaded_version == version:
+                    break
+                # The model was saved again while loading, so what was loaded may be either version.
+                version = loaded_version
+            entry = _RegistryEntry(model, version, _estimate_nbytes(model))
+            with self._lock:
+                self._entries[ticker] = entry
+                self._entries.move_to_end(ticker)
+                self._evict()
+            return model, version
+
+    def preload(self, tickers: Iterable[str]) -> List[str]:
+        """
+        Loads the models for the given tickers ahead of the first request.
+
+        Returns:
+            The tickers whose models were loaded. Tickers without a saved model are skipped.
+        """
+        loaded = []
+        for ticker in tickers:
+            try:
+                self.get(ticker)
+                loaded.append(ticker)
+            except FileNotFoundError as e:
+                print(f"Skipping preload for {ticker}: {e}")
+        return loaded
+
+    def invalidate(self, ticker: str):
+        """Drops a ticker's model from the cache."""
+        with self._lock:
+            self._entries.pop(ticker, None)
+
+    def cached_tickers(self) -> List[str]:
+        """Returns the cached tickers, least recently used first."""
+        with self._lock:
+            return list(self._entries)
+
+    def _lookup(self, ticker: str, version: int) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(ticker)
+            if entry is None or entry.version != version:
+                return None
+            self._entries.move_to_end(ticker)
+            return entry.model
+
+    def _evict(self):
+        total_bytes = sum(entry.nbytes for entry in self._entries.values())
+        while len(self._entries) > 1 and (
+                len(self._entries) > self.max_models
+                or (self.max_bytes is not None and total_bytes > self.max_bytes)):
+            _, evicted = self._entries.popitem(last=False)
+            total_bytes -= evicted.nbytes
+
+
+def _estimate_nbytes(model: Any) -> int:
+    """Estimates the in-memory size of a model's weights, assuming float32 parameters for Keras models."""
+    if isinstance(model, NumpyLSTM):
+        return sum(value.nbytes for layer in model.layers for value in layer.values() if hasattr(value, 'nbytes'))
+    count_params = getattr(model.model, 'count_params', None)
+    return count_params() * 4 if count_params else 0
@@ -0,0 +1,215 @@
+import hashlib
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+import numpy as np
+import pandas as pd
+
+# Add the project root to the Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from core.models.base_model import BaseModel
+from core.utils import SharedArray
+
+# A fold is (train_start, train_end, test_start, test_end), as half-open row ranges.
+Fold = Tuple[int, int, int, int]
+
+
+def walk_forward_folds(n_samples: int, n_folds: int, test_size: Optional[int] = None,
+                       train_size: Optional[int] = None, mode: str = 'expanding') -> List[Fold]:
+    """
+    Splits `n_samples` time-ordered samples into consecutive walk-forward folds.
+
+    The last `n_folds * test_size` samples are cut into test blocks. Each fold trains on the samples before
+    its test block: all of them ('expanding') or only the latest `train_size` ('rolling').
+    """
+    if mode not in ('expanding', 'rolling'):
+        raise ValueError("mode must be 'expanding' or 'rolling'.")
+    if test_size is None:
+        test_size = n_samples // (n_folds + 1)
+    if mode == 'rolling' and train_size is None:
+        train_size = n_samples - n_folds * test_size
+
+    folds = []
+    for k in range(n_folds):
+        test_start = n_samples - (n_folds - k) * test_size
+        train_start = 0 if mode == 'expanding' else max(0, test_start - train_size)
+        if test_size <= 0 or test_start - train_start <= 0:
+            raise ValueError(f"Not enough samples ({n_samples}) for {n_folds} folds of {test_size} test samples.")
+        folds.append((train_start, test_start, test_start, test_start + test_size))
+    return folds
+
+
+def _run_fold(spec: Tuple[str, Tuple[int, ...], str], columns: List[str], target_index: int, horizon: int,
+              model_cls: Type[BaseModel], hyperparameters: Dict[str, Any], fold: Fold) -> Dict[str, Any]:
+    """Trains and evaluates one fold inside a worker process, reading the series from shared memory."""
+    started = time.perf_counter()
+    shared = SharedArray.attach(spec)
+    try:
+        result = _evaluate_fold(shared.array, columns, target_index, horizon, model_cls, hyperparameters, fold)
+    finally:
+        shared.close()
+    result["fold_seconds"] = time.perf_counter() - started
+    return result
+
+
+def _evaluate_fold(values: np.ndarray, columns: List[str], target_index: int, horizon: int,
+                   model_cls: Type[BaseModel], hyperparameters: Dict[str, Any], fold: Fold) -> Dict[str, Any]:
+    # Everything that views `values` stays local here, so the shared block can be closed on return.
+    def samples(start: int, end: int) -> Tuple[pd.DataFrame, pd.Series]:
+        # Sample t pairs the features of row t with the target `horizon` rows later.
+        X = pd.DataFrame(values[start:end], columns=columns, index=pd.RangeIndex(start, end), copy=False)
+        y = pd.Series(values[start + horizon:end + horizon, target_index], index=X.index, copy=False)
+        return X, y
+
+    train_start, train_end, test_start, test_end = fold
+    X_train, y_train = samples(train_start, train_end)
+    X_test, y_test = samples(test_start, test_end)
+
+    model = model_cls(f"{model_cls.__name__}_fold_{test_start}", hyperparameters)
+    train_started = time.perf_counter()
+    model.train(X_train, y_train)
+    predict_started = time.perf_counter()
+    predictions = np.asarray(model.predict(X_test), dtype=np.float64)
+    predict_finished = time.perf_counter()
+
+    actual = y_test.to_numpy()
+    errors = predictions - actual
+    nonzero = actual != 0
+    return {
+        "mae": float(np.mean(np.abs(errors))),
+        "rmse": float(np.sqrt(np.mean(errors ** 2))),
+        "mape": float(np.mean(np.abs(errors[nonzero] / actual[nonzero])) * 100) if nonzero.any() else None,
+        "train_seconds": predict_started - train_started,
+        "predict_seconds": predict_finished - predict_started
+    }
+
+
+class WalkForwardBacktester:
+    """
+    Evaluates a BaseModel implementation over walk-forward folds of a cleaned series, in parallel.
+
+    The series is placed in shared memory once and every worker process reads it in place. Fold results
+    are cached on disk under a hash of the model, its hyperparameters, the fold bounds and the fold's data,
+    so re-running with unchanged inputs only reads the cache.
+    """
+    def __init__(self, model_cls: Type[BaseModel], hyperparameters: Optional[Dict[str, Any]] = None,
+                 n_folds: int = 5, mode: str = 'expanding', test_size: Optional[int] = None,
+                 train_size: Optional[int] = None, target: str = 'close', horizon: int = 1,
+                 max_workers: Optional[int] = None, cache_dir: Optional[str] = None):
+        """
+        Initializes the WalkForwardBacktester.
+
+        Args:
+            model_cls: The BaseModel subclass to evaluate, e.g. LSTMModel.
+            hyperparameters: The hyperparameters passed to every fold's model.
+            n_folds: The number of test blocks.
+            mode: 'expanding' trains each fold on all earlier samples, 'rolling' on the latest `train_size`.
+            test_size: The number of samples per test block. Defaults to n_samples // (n_folds + 1).
+            train_size: The rolling training window. Defaults to everything before the first test block.
+            target: The column to predict.
+            horizon: How many rows ahead of each sample's features the target is taken from.
+            max_workers: The number of worker processes. Defaults to one per fold, up to the CPU count.
+            cache_dir: The directory for cached fold results. None disables caching.
+        """
+        self.model_cls = model_cls
+        self.hyperparameters = hyperparameters
+        self.n_folds = n_folds
+        self.mode = mode
+        self.test_size = test_size
+        self.train_size = train_size
+        self.target = target
+        self.horizon = horizon
+        self.max_workers = max_workers or min(n_folds, os.cpu_count() or 1)
+        self.cache_dir = cache_dir
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def run(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Runs every fold over a cleaned DataFrame.
+
+        Returns:
+            One row per fold with its bounds, error metrics (mae, rmse, mape), timings and whether it was cached.
+        """
+        started = time.perf_counter()
+        columns = list(df.columns)
+        values = np.ascontiguousarray(df.to_numpy(dtype=np.float64))
+        target_index = columns.index(self.target)
+        folds = walk_forward_folds(len(values) - self.horizon, self.n_folds, self.test_size, self.train_size, self.mode)
+
+        results: Dict[Fold, Dict[str, Any]] = {}
+        pending = {}
+        for fold in folds:
+            key = self._cache_key(values, columns, fold)
+            cached = self._read_cache(key)
+            if cached is not None:
+                results[fold] = dict(cached, cached=True)
+            else:
+                pending[fold] = key
+
+        if pending:
+            with SharedArray.create(values) as shared:
+                context = multiprocessing.get_context("spawn")
+                with ProcessPoolExecutor(max_workers=min(self.max_workers, len(pending)), mp_context=context) as pool:
+                    futures = {
+                        fold: pool.submit(_run_fold, shared.spec, columns, target_index, self.horizon,
+                                          self.model_cls, self.hyperparameters, fold)
+                        for fold in pending
+                    }
+                    for fold, future in futures.items():
+                        results[fold] = dict(future.result(), cached=False)
+                        self._write_cache(pending[fold], results[fold])
+
+        rows = []
+        for index, fold in enumerate(folds):
+            train_start, train_end, test_start, test_end = fold
+            rows.append(dict({
+                "fold": index,
+                "train_start": df.index[train_start],
+                "train_end": df.index[train_end - 1],
+                "test_start": df.index[test_start],
+                "test_end": df.index[test_end - 1],
+                "train_samples": train_end - train_start,
+                "test_samples": test_end - test_start
+            }, **results[fold]))
+        report = pd.DataFrame(rows)
+        report.attrs["wall_seconds"] = time.perf_counter() - started
+        return report
+
+    def _cache_key(self, values: np.ndarray, columns: List[str], fold: Fold) -> str:
+        digest = hashlib.sha256()
+        digest.update(json.dumps({
+            "model": f"{self.model_cls.__module__}.{self.model_cls.__qualname__}",
+            "hyperparameters": self.hyperparameters,
+            "columns": columns,
+            "target": self.target,
+            "horizon": self.horizon,
+            "fold": fold
+        }, sort_keys=True, default=str).encode())
+        digest.update(values[fold[0]:fold[3] + self.horizon].tobytes())
+        return digest.hexdigest()
+
+    def _read_cache(self, key: str) -> Optional[Dict[str, Any]]:
+        if not self.cache_dir:
+            return None
+        try:
+            with open(os.path.join(self.cache_dir, f"{key}.json")) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_cache(self, key: str, result: Dict[str, Any]):
+        if not self.cache_dir:
+            return
+        path = os.path.join(self.cache_dir, f"{key}.json")
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({k: v for k, v in result.items() if k != "cached"}, f)
+        os.replace(tmp_path, path)
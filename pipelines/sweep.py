@@ -0,0 +1,253 @@
+import hashlib
+import itertools
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+# Add the project root to the Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from core.models.lstm_model import DEFAULT_HYPERPARAMETERS, LSTMModel
+from core.utils import SharedArray
+
+FINISHED_STATUSES = ("completed", "pruned")
+
+# Set in each worker process by _init_worker.
+_worker_state: Dict[str, Any] = {}
+
+
+def grid_space(space: Dict[str, Sequence[Any]]) -> List[Dict[str, Any]]:
+    """Returns every combination of the candidate values in `space`, e.g. {'lstm_units': [32, 64]}."""
+    keys = sorted(space)
+    return [dict(zip(keys, values)) for values in itertools.product(*(space[key] for key in keys))]
+
+
+def random_space(space: Dict[str, Union[Sequence[Any], Tuple[float, float]]], n_trials: int,
+                 seed: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Samples `n_trials` parameter sets from `space`.
+
+    A list is sampled as a choice of its values. A (low, high) tuple is sampled uniformly, as an inclusive
+    integer range when both bounds are ints.
+    """
+    rng = np.random.default_rng(seed)
+    trials = []
+    for _ in range(n_trials):
+        params = {}
+        for key in sorted(space):
+            values = space[key]
+            if isinstance(values, tuple):
+                low, high = values
+                if isinstance(low, int) and isinstance(high, int):
+                    params[key] = int(rng.integers(low, high + 1))
+                else:
+                    params[key] = float(rng.uniform(low, high))
+            else:
+                params[key] = values[int(rng.integers(len(values)))]
+        trials.append(params)
+    return trials
+
+
+def trial_id(params: Dict[str, Any]) -> str:
+    """A stable id for a parameter set, used to match trials against the log when resuming."""
+    return hashlib.sha1(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()[:12]
+
+
+def _init_worker(tf_threads: int, specs: Dict[str, Tuple[str, Tuple[int, ...], str]], columns: List[str]):
+    """Limits TensorFlow's thread pools and attaches to the shared training data, once per worker process."""
+    os.environ["OMP_NUM_THREADS"] = str(tf_threads)
+    import tensorflow as tf
+    tf.config.threading.set_intra_op_parallelism_threads(tf_threads)
+    tf.config.threading.set_inter_op_parallelism_threads(tf_threads)
+
+    # The attachments live as long as the worker, so Keras can read the arrays in place.
+    shared = {name: SharedArray.attach(spec) for name, spec in specs.items()}
+    _worker_state.update(shared=shared, columns=columns)
+
+
+def _run_trial(params: Dict[str, Any], curves: Any, patience: int, prune_after: int,
+               min_trials_to_prune: int) -> Dict[str, Any]:
+    """Trains one LSTMModel with `params` inside a worker, reporting its validation curve into `curves`."""
+    import tensorflow as tf
+
+    started = time.perf_counter()
+    shared, columns = _worker_state["shared"], _worker_state["columns"]
+    X_train = pd.DataFrame(shared["X_train"].array, columns=columns, copy=False)
+    y_train = pd.Series(shared["y_train"].array, copy=False)
+    X_val = pd.DataFrame(shared["X_val"].array, columns=columns, copy=False)
+    y_val = pd.Series(shared["y_val"].array, copy=False)
+
+    tid = trial_id(params)
+    pruned = {"epoch": None}
+
+    class MedianPruningCallback(tf.keras.callbacks.Callback):
+        """Stops the trial when its val_loss is worse than the median of other trials at the same epoch."""
+        def on_epoch_end(self, epoch, logs=None):
+            curve = list(curves.get(tid, [])) + [float(logs["val_loss"])]
+            curves[tid] = curve
+            if epoch + 1 < prune_after:
+                return
+            others = [c[epoch] for key, c in curves.items() if key != tid and len(c) > epoch]
+            if len(others) >= min_trials_to_prune and curve[-1] > float(np.median(others)):
+                pruned["epoch"] = epoch + 1
+                self.model.stop_training = True
+
+    hyperparameters = dict(DEFAULT_HYPERPARAMETERS, **params)
+    model = LSTMModel(f"trial_{tid}", hyperparameters)
+    early_stopping = tf.keras.callbacks.EarlyStopping(monitor="val_loss", patience=patience, restore_best_weights=True)
+    model.train(X_train, y_train, validation_data=(X_val, y_val),
+                callbacks=[early_stopping, MedianPruningCallback()])
+
+    val_losses = [float(value) for value in model.history.history["val_loss"]]
+    best_epoch = int(np.argmin(val_losses))
+    return {
+        "trial_id": tid,
+        "params": params,
+        "status": "pruned" if pruned["epoch"] is not None else "completed",
+        "val_loss": val_losses[best_epoch],
+        "best_epoch": best_epoch + 1,
+        "epochs_run": len(val_losses),
+        "val_loss_curve": val_losses,
+        "seconds": time.perf_counter() - started
+    }
+
+
+class SweepRunner:
+    """
+    Runs LSTMModel hyperparameter trials concurrently on a process pool.
+
+    The training and validation arrays are copied into shared memory once and every worker reads them in
+    place. Each worker's TensorFlow thread pools are capped so concurrent trials don't oversubscribe the CPU.
+    Trials stop early when val_loss stops improving, and are pruned when it is worse than the median of the
+    other trials at the same epoch. Every finished trial is appended to a JSONL log; re-running with the
+    same log skips the trials already in it.
+    """
+    def __init__(self, log_path: str, max_workers: Optional[int] = None, tf_threads: Optional[int] = None,
+                 validation_split: float = 0.1, patience: int = 3, prune_after: int = 2,
+                 min_trials_to_prune: int = 2):
+        """
+        Initializes the SweepRunner.
+
+        Args:
+            log_path: The JSONL file finished trials are appended to.
+            max_workers: The number of concurrent trials. Defaults to the CPU count.
+            tf_threads: TensorFlow's intra- and inter-op threads per trial. Defaults to the CPUs per worker.
+            validation_split: The last fraction of samples held out for val_loss.
+            patience: Epochs without val_loss improvement before a trial stops early.
+            prune_after: The first epoch at which a trial may be pruned.
+            min_trials_to_prune: How many other trials must have reached an epoch before pruning against it.
+        """
+        cpu_count = os.cpu_count() or 1
+        self.log_path = log_path
+        self.max_workers = max_workers or cpu_count
+        self.tf_threads = tf_threads or max(1, cpu_count // self.max_workers)
+        self.validation_split = validation_split
+        self.patience = patience
+        self.prune_after = prune_after
+        self.min_trials_to_prune = min_trials_to_prune
+
+    def run(self, X: pd.DataFrame, y: pd.Series, trials: List[Dict[str, Any]]) -> pd.DataFrame:
+        """
+        Runs the trials that are not already in the log.
+
+        Args:
+            X: The feature rows, in time order.
+            y: The target of each row.
+            trials: The parameter sets, e.g. from grid_space or random_space.
+
+        Returns:
+            One row per trial in the log, best val_loss first.
+        """
+        finished = {record["trial_id"] for record in self.load_log() if record["status"] in FINISHED_STATUSES}
+        pending = []
+        for params in trials:
+            tid = trial_id(params)
+            if tid not in finished and tid not in {trial_id(p) for p in pending}:
+                pending.append(params)
+        print(f"Sweep: {len(trials) - len(pending)} trials already logged, {len(pending)} to run.")
+
+        if pending:
+            self._run_pending(X, y, pending)
+        return self.results()
+
+    def _run_pending(self, X: pd.DataFrame, y: pd.Series, pending: List[Dict[str, Any]]):
+        values = X.to_numpy(dtype=np.float32)
+        targets = y.to_numpy(dtype=np.float32)
+        split_at = int(len(values) * (1.0 - self.validation_split))
+        arrays = {
+            "X_train": values[:split_at], "y_train": targets[:split_at],
+            "X_val": values[split_at:], "y_val": targets[split_at:]
+        }
+        shared = {name: SharedArray.create(array) for name, array in arrays.items()}
+        # TensorFlow is not fork-safe, so workers are spawned rather than forked.
+        context = multiprocessing.get_context("spawn")
+        mp_manager = context.Manager()
+        try:
+            curves = mp_manager.dict()
+            for record in self.load_log():
+                curves[record["trial_id"]] = record.get("val_loss_curve", [])
+            specs = {name: array.spec for name, array in shared.items()}
+            with ProcessPoolExecutor(max_workers=min(self.max_workers, len(pending)), mp_context=context,
+                                     initializer=_init_worker, initargs=(self.tf_threads, specs, list(X.columns))) as pool:
+                futures = {
+                    pool.submit(_run_trial, params, curves, self.patience, self.prune_after, self.min_trials_to_prune): params
+                    for params in pending
+                }
+                for future in as_completed(futures):
+                    params = futures[future]
+                    try:
+                        record = future.result()
+                    except Exception as e:
+                        record = {"trial_id": trial_id(params), "params": params, "status": "failed", "error": str(e)}
+                    self._append_log(record)
+                    print(f"Trial {record['trial_id']} {record['status']}: val_loss={record.get('val_loss')}")
+        finally:
+            mp_manager.shutdown()
+            for array in shared.values():
+                array.close()
+
+    def load_log(self) -> List[Dict[str, Any]]:
+        """Returns the logged trial records. A partially written last line is ignored."""
+        if not os.path.exists(self.log_path):
+            return []
+        records = []
+        with open(self.log_path) as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+        return records
+
+    def results(self) -> pd.DataFrame:
+        """Returns the latest record of every logged trial, best val_loss first, with params as columns."""
+        latest = {record["trial_id"]: record for record in self.load_log()}
+        rows = [dict(record["params"], **{k: v for k, v in record.items() if k not in ("params", "val_loss_curve")})
+                for record in latest.values()]
+        if not rows:
+            return pd.DataFrame()
+        return pd.DataFrame(rows).sort_values("val_loss", na_position="last").reset_index(drop=True)
+
+    def _append_log(self, record: Dict[str, Any]):
+        log_dir = os.path.dirname(self.log_path)
+        if log_dir:
+            os.makedirs(log_dir, exist_ok=True)
+        line = json.dumps(record, default=str) + "\n"
+        if os.path.exists(self.log_path) and os.path.getsize(self.log_path) > 0:
+            with open(self.log_path, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    # Start after a line left half-written by an interrupted run.
+                    line = "\n" + line
+        with open(self.log_path, "a") as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
@@ -1,47 +1,181 @@
 import os
 import sys
+import threading
+import time
 import pandas as pd
 import numpy as np
+from collections import OrderedDict
 from dotenv import load_dotenv
-from typing import Tuple
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
 
 # Add the project root to the Python path
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 sys.path.insert(0, project_root)
 
-from data.connector import AlphaVantageConnector
+from data.connector import AlphaVantageConnector, shared_session
 from data.extractor import DataExtractor
+from data.feature_store import FeatureSet, FeatureStore
+from data.loader import load_local_time_series
 from data.processor import DataProcessor
+from data.resampling import TradingCalendar, interval_minutes, resample_many
 
 # Load environment variables from .env file
 load_dotenv()
 
+class DerivedBarsCache:
+    """
+    A process-wide cache of base-interval bars and the coarser intervals derived from them.
+
+    A base series is reused until its next bar is due on the wall clock (or, for a local file, until the
+    file changes), and every interval requested for it so far is derived together, in one resample_many()
+    pass, whenever the base series is fetched again. Only completed buckets are derived, so a bar that is
+    still forming is never handed to the feature store.
+    """
+    def __init__(self, max_entries: int = 64, clock: Callable[[], float] = time.time):
+        self.max_entries = max_entries
+        self.clock = clock
+        # Per key: when the base series is due to be fetched again, and the derived bars per interval.
+        self._entries: 'OrderedDict[Hashable, Tuple[float, Dict[str, pd.DataFrame]]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, interval: str, base_interval: str, fetch: Callable[[], pd.DataFrame],
+            calendar: Optional[TradingCalendar] = None, expires: bool = True) -> pd.DataFrame:
+        """
+        Returns the bars of `interval` derived from the base series `fetch` returns.
+
+        Args:
+            key: Identifies the base series, e.g. its ticker, base interval and source.
+            interval: The interval to return.
+            base_interval: The interval of the base series.
+            fetch: Fetches the base series.
+            calendar: The trading calendar to resample along.
+            expires: Whether the base series is fetched again once its next bar is due.
+        """
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now < entry[0] and interval in entry[1]:
+                self._entries.move_to_end(key)
+                return entry[1][interval]
+            intervals = set(entry[1]) if entry is not None else set()
+        intervals.add(interval)
+
+        base = fetch()
+        base_seconds = interval_minutes(base_interval) * 60
+        # The base bars are complete up to the end of the last one.
+        complete_until = base.index[-1] + pd.Timedelta(seconds=base_seconds) if len(base) else None
+        print(f"Resampling {base_interval} bars to {', '.join(sorted(intervals))}...")
+        derived = resample_many(base, sorted(intervals), calendar, complete_until)
+        expires_at = (now // base_seconds + 1) * base_seconds if expires else float("inf")
+        with self._lock:
+            self._entries[key] = (expires_at, derived)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return derived[interval]
+
+
+derived_bars = DerivedBarsCache()
+
+
 class DataPipelineService:
-    def __init__(self, api_key: str, use_local_data: bool = False, local_data_path: str = None):
+    def __init__(self, api_key: str, use_local_data: bool = False, local_data_path: str = None,
+                 feature_store: Optional[FeatureStore] = None, feature_config: Optional[Dict[str, Any]] = None,
+                 base_interval: Optional[str] = None, calendar: Optional[TradingCalendar] = None):
         if not use_local_data and (not api_key or api_key == "YOUR_API_KEY"):
             raise ValueError("API key not found. Please set the ALPHA_VANTAGE_API_KEY in your .env file.")
-        self.connector = AlphaVantageConnector(api_key, use_local_data, local_data_path)
+        # Every pipeline shares one pooled HTTP session, so API connections stay open between runs.
+        self.connector = AlphaVantageConnector(api_key, use_local_data, local_data_path, session=shared_session())
+        self.feature_store = feature_store if feature_store is not None else FeatureStore.from_env()
+        self.feature_config = feature_config
+        # Local files and the live API are different histories, so they are stored apart.
+        self.source = local_data_path if use_local_data else None
+        # When set (or RESAMPLE_BASE_INTERVAL is), only this finest interval is fetched and cached, and
+        # coarser intervals are resampled from it along the trading calendar.
+        self.base_interval = base_interval or os.getenv("RESAMPLE_BASE_INTERVAL") or None
+        if self.base_interval and interval_minutes(self.base_interval) is None:
+            raise ValueError("The base interval must be an intraday interval, e.g. '5min'.")
+        self.calendar = calendar
 
     def run(self, ticker: str, interval: str, window_size: int) -> Tuple[np.ndarray, np.ndarray, pd.DataFrame]:
-        try:
-            print(f"Fetching raw data for {ticker}...")
-            raw_data_dict = self.connector.fetch_time_series_intraday(ticker, interval)
-            extractor = DataExtractor(raw_data_dict)
-            raw_df = extractor.extract_time_series_to_dataframe()
-            print("Raw data fetched and extracted successfully.")
-
-            print("Cleaning and processing data...")
-            processor = DataProcessor(raw_df)
-            cleaned_df = processor.clean_data()
-            print("Data cleaned successfully.")
-
-            print("Creating sequences...")
-            X, y = DataProcessor.create_sequences(cleaned_df, window_size)
-            print("Sequences created successfully.")
-
-            return X, y, cleaned_df
-        finally:
-            self.connector.close()
+        print(f"Fetching raw data for {ticker}...")
+        raw_df = self._fetch_raw_dataframe(ticker, interval)
+        print("Raw data fetched and extracted successfully.")
+
+        print("Cleaning and processing data...")
+        processor = DataProcessor(raw_df)
+        cleaned_df = processor.clean_data()
+        print("Data cleaned successfully.")
+
+        print("Creating sequences...")
+        X, y = DataProcessor.create_sequences(cleaned_df, window_size)
+        print("Sequences created successfully.")
+
+        return X, y, cleaned_df
+
+    def run_features(self, ticker: str, interval: str, window_size: int,
+                     feature_spec: Optional[Dict[str, Any]] = None) -> FeatureSet:
+        """
+        Fetches the data and brings the ticker's stored features up to date with it.
+
+        Only bars newer than the stored ones are cleaned and featurized, and the returned FeatureSet
+        memory-maps the stored arrays instead of loading them.
+
+        Args:
+            ticker: The ticker symbol.
+            interval: The bar interval, e.g. '60min'.
+            window_size: The number of rows per model input window.
+            feature_spec: The spec saved with a model (FinancialModel.load_feature_spec()). Its feature
+                config and fitted scaler are used instead of the pipeline's, so the inputs match what the
+                model was trained on.
+
+        Raises:
+            ValueError: If the stored features still do not have the columns the model was trained on.
+        """
+        config, scaler = self.feature_config, None
+        if feature_spec is not None:
+            config, scaler = feature_spec["config"], feature_spec.get("scaler")
+        print(f"Fetching raw data for {ticker}...")
+        raw_df = self._fetch_raw_dataframe(ticker, interval)
+        feature_set = self.feature_store.update(ticker, interval, window_size, raw_df, config, scaler, self.source)
+        if feature_spec is not None and feature_set.columns != feature_spec["columns"]:
+            raise ValueError(f"The features of {ticker} ({', '.join(feature_set.columns)}) do not match the columns "
+                             f"its model was trained on ({', '.join(feature_spec['columns'])}).")
+        return feature_set
+
+    def run_for_prediction(self, ticker: str, interval: str, window_size: int) -> np.ndarray:
+        """
+        Prepares only the most recent window, for making a single prediction.
+
+        Unlike run(), this only featurizes the bars added since the last call and builds no training
+        windows, so its cost does not grow with the length of the history.
+
+        Returns:
+            The model input, of shape (1, window_size, n_features), as a view of the stored features.
+        """
+        return self.run_features(ticker, interval, window_size).last_window()
+
+    def _fetch_raw_dataframe(self, ticker: str, interval: str) -> pd.DataFrame:
+        if self.base_interval and interval != self.base_interval:
+            source = self.source
+            if source is not None:
+                # A local file is re-read only when it changes.
+                source = (source, os.stat(source).st_mtime_ns)
+            key = (ticker, self.base_interval, source, self.calendar.key if self.calendar else None)
+            return derived_bars.get(key, interval, self.base_interval,
+                                    lambda: self._fetch_interval(ticker, self.base_interval), self.calendar,
+                                    expires=self.source is None)
+        return self._fetch_interval(ticker, interval)
+
+    def _fetch_interval(self, ticker: str, interval: str) -> pd.DataFrame:
+        if self.connector.use_local_data and self.connector.local_data_path:
+            # Local files are loaded column-wise, skipping the API-shaped dict round-trip.
+            print(f"--- Loading local data from: {self.connector.local_data_path} ---")
+            return load_local_time_series(self.connector.local_data_path)
+
+        raw_data_dict = self.connector.fetch_time_series_intraday(ticker, interval)
+        extractor = DataExtractor(raw_data_dict)
+        return extractor.extract_time_series_to_dataframe()
 
 if __name__ == '__main__':
     TICKER = "IBM"
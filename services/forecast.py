@@ -0,0 +1,128 @@
+from typing import Any, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from core.models.numpy_lstm import NumpyLSTM
+from infrastructure.metrics import span
+
+# The columns a forecast step writes its predicted price into. Other columns (volume, indicators) carry
+# their last value forward.
+PRICE_COLUMNS = ("open", "high", "low", "close")
+
+
+def recursive_forecast(model: Any, windows: np.ndarray, steps: int, columns: Sequence[str], target: str = "close",
+                       scale: Optional[np.ndarray] = None, offset: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Forecasts `steps` bars ahead by feeding each prediction back in as the next bar.
+
+    The windows are copied once into a buffer with room for every forecast bar, and each step runs the
+    model on a view of the latest `window_size` bars of the whole batch, so an N-step forecast is N
+    batched forward passes.
+
+    Args:
+        model: Any object with a `predict(batch)` method returning one row per input.
+        windows: The starting windows, of shape (batch_size, window_size, n_features).
+        steps: The number of bars to forecast.
+        columns: The feature column names.
+        target: The column the model predicts.
+        scale: Per row and column, the MinMaxScaler scale_ the features were scaled with; None if unscaled.
+        offset: Per row and column, the MinMaxScaler min_.
+
+    Returns:
+        The forecast target values, unscaled, of shape (batch_size, steps).
+    """
+    batch_size, window_size, n_features = windows.shape
+    columns = list(columns)
+    target_index = columns.index(target)
+    price_indices = [columns.index(c) for c in PRICE_COLUMNS if c in columns] or [target_index]
+    if scale is None:
+        scale = np.ones((batch_size, n_features), dtype=np.float32)
+        offset = np.zeros((batch_size, n_features), dtype=np.float32)
+
+    buffer = np.empty((batch_size, window_size + steps, n_features), dtype=np.float32)
+    buffer[:, :window_size] = windows
+    path = np.empty((batch_size, steps), dtype=np.float32)
+    with span("forecast") as s:
+        for step in range(steps):
+            prediction = np.asarray(model.predict(buffer[:, step:step + window_size])).reshape(batch_size, -1)[:, 0]
+            price = (prediction - offset[:, target_index]) / scale[:, target_index]
+            path[:, step] = price
+            row = window_size + step
+            buffer[:, row] = buffer[:, row - 1]
+            buffer[:, row, price_indices] = price[:, None] * scale[:, price_indices] + offset[:, price_indices]
+        s.record(rows=batch_size * steps, nbytes=buffer.nbytes)
+    return path
+
+
+def forecast_batch(jobs: List[Tuple[Any, np.ndarray]], steps: int, columns: Sequence[str], target: str = "close",
+                   scalers: Optional[List[Any]] = None) -> List[np.ndarray]:
+    """
+    Forecasts several models' windows together, e.g. several tickers each with several scenarios.
+
+    When every model is a NumpyLSTM of the same architecture they are stacked, so each step is a single
+    forward pass over all the jobs' windows. Otherwise each model forecasts its own windows as one batch.
+
+    Args:
+        jobs: Pairs of a model and its starting windows, of shape (n_windows, window_size, n_features).
+        steps: The number of bars to forecast.
+        columns: The feature column names, which must be the same for every job.
+        target: The column the models predict.
+        scalers: Per job, the fitted MinMaxScaler its features were scaled with, or None if unscaled.
+
+    Returns:
+        Per job, the forecast target values of shape (n_windows, steps).
+    """
+    scalers = scalers or [None] * len(jobs)
+    n_features = len(columns)
+
+    def scaling(index: int, rows: int) -> Tuple[np.ndarray, np.ndarray]:
+        scaler = scalers[index]
+        if scaler is None:
+            return np.ones((rows, n_features), dtype=np.float32), np.zeros((rows, n_features), dtype=np.float32)
+        return (np.broadcast_to(scaler.scale_.astype(np.float32), (rows, n_features)),
+                np.broadcast_to(scaler.min_.astype(np.float32), (rows, n_features)))
+
+    models = [model for model, _ in jobs]
+    if len(jobs) > 1 and all(isinstance(model, NumpyLSTM) for model in models):
+        model_index = np.concatenate([np.full(len(windows), i) for i, (_, windows) in enumerate(jobs)])
+        try:
+            stacked = NumpyLSTM.stack(models, model_index)
+        except ValueError:
+            stacked = None
+        if stacked is not None:
+            scale, offset = (np.concatenate(parts) for parts in zip(*(scaling(i, len(w)) for i, (_, w) in enumerate(jobs))))
+            path = recursive_forecast(stacked, np.concatenate([w for _, w in jobs]), steps, columns, target,
+                                      scale, offset)
+            return np.split(path, np.cumsum([len(w) for _, w in jobs])[:-1])
+
+    return [recursive_forecast(model, windows, steps, columns, target, *scaling(i, len(windows)))
+            for i, (model, windows) in enumerate(jobs)]
+
+
+def shocked_windows(window: np.ndarray, shocks: Sequence[float], columns: Sequence[str],
+                    scaler: Optional[Any] = None) -> np.ndarray:
+    """
+    Builds one scenario per shock from a single window by moving the last bar's prices by that fraction.
+
+    Args:
+        window: The window, of shape (1, window_size, n_features) or (window_size, n_features).
+        shocks: The relative price moves, e.g. 0.0 for the unchanged window and -0.05 for a 5% drop.
+        columns: The feature column names.
+        scaler: The fitted MinMaxScaler the features were scaled with, or None if unscaled.
+
+    Returns:
+        The scenario windows, of shape (len(shocks), window_size, n_features).
+    """
+    window = np.asarray(window, dtype=np.float32).reshape((1,) + np.shape(window)[-2:])
+    windows = np.repeat(window, len(shocks), axis=0)
+    columns = list(columns)
+    price_indices = [columns.index(c) for c in PRICE_COLUMNS if c in columns]
+    last = windows[:, -1, price_indices]
+    factors = 1.0 + np.asarray(shocks, dtype=np.float32)[:, None]
+    if scaler is None:
+        windows[:, -1, price_indices] = last * factors
+    else:
+        scale = scaler.scale_[price_indices].astype(np.float32)
+        offset = scaler.min_[price_indices].astype(np.float32)
+        windows[:, -1, price_indices] = ((last - offset) / scale * factors) * scale + offset
+    return windows
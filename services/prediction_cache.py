@@ -0,0 +1,140 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+# Alpha Vantage intraday intervals, e.g. '60min'.
+INTERVAL_PATTERN = re.compile(r"^(\d+)min$")
+
+
+def interval_seconds(interval: str) -> Optional[int]:
+    """Returns the length of an interval such as '60min' in seconds, or None if it is not a minute interval."""
+    match = INTERVAL_PATTERN.match(interval)
+    return int(match.group(1)) * 60 if match else None
+
+
+class PredictionCache:
+    """
+    Caches predictions by (ticker, interval, window_size, model version, source, input key), where the input
+    key identifies the input data, e.g. the last input bar's timestamp.
+
+    A prediction is served without fetching any data until the next bar is due: the next multiple of the
+    interval on the wall clock. After that the data is fetched again, and the model only runs if the fetch
+    brought a new input key, e.g. a new or revised last bar. If the new bar has not been published yet,
+    the data is rechecked after `recheck_seconds`, doubling while it stays unchanged. A retrained model
+    has a new version, so its predictions are never served from the old model's entries. Concurrent
+    misses for the same key share a single fetch and inference.
+    """
+    def __init__(self, max_entries: int = 4096, recheck_seconds: float = 30.0, default_ttl: float = 60.0,
+                 clock: Callable[[], float] = time.time):
+        """
+        Initializes the PredictionCache.
+
+        Args:
+            max_entries: The maximum number of cached predictions; the least recently used are evicted.
+            recheck_seconds: The first delay before re-fetching when the expected new bar was not there yet.
+            default_ttl: How long predictions for non-minute intervals are served before re-fetching.
+            clock: The wall clock, in seconds since the epoch.
+        """
+        self.max_entries = max_entries
+        self.recheck_seconds = recheck_seconds
+        self.default_ttl = default_ttl
+        self.clock = clock
+        self._entries: 'OrderedDict[Tuple, Any]' = OrderedDict()
+        # Per request key: the entry it currently resolves to, when that is due to be revalidated, and how
+        # many revalidations in a row found no new bar.
+        self._current: Dict[Tuple, Tuple[Tuple, float, int]] = {}
+        self._in_flight: Dict[Tuple, Future] = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "revalidated": 0, "misses": 0, "shared": 0}
+
+    def get_or_compute(self, ticker: str, interval: str, window_size: int, model_version: Hashable,
+                       fetch: Callable[[], Tuple[Hashable, Any]], infer: Callable[[Any], Any],
+                       source: Hashable = None) -> Any:
+        """
+        Returns the cached prediction, or computes it.
+
+        Args:
+            ticker: The ticker symbol.
+            interval: The bar interval, e.g. '60min'.
+            window_size: The model input window size.
+            model_version: The version of the model, e.g. ModelRegistry.version().
+            fetch: Fetches the data; returns the input key, e.g. the timestamp of the last input bar, and the model input.
+            infer: Runs the model on the input fetch() returned.
+            source: Anything else that changes the input data, such as a local data path.
+        """
+        key = (ticker, interval, window_size, model_version, source)
+        with self._lock:
+            current = self._current.get(key)
+            if current is not None and self.clock() < current[1] and current[0] in self._entries:
+                self._entries.move_to_end(current[0])
+                self._stats["hits"] += 1
+                return self._entries[current[0]]
+
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = self._in_flight[key] = Future()
+            else:
+                self._stats["shared"] += 1
+        if not owner:
+            return future.result()
+
+        try:
+            value = self._compute(key, current, fetch, infer)
+            future.set_result(value)
+            return value
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+    def _compute(self, key: Tuple, current: Optional[Tuple[Tuple, float, int]],
+                 fetch: Callable[[], Tuple[Hashable, Any]], infer: Callable[[Any], Any]) -> Any:
+        last_bar, inputs = fetch()
+        entry_key = key + (last_bar,)
+        with self._lock:
+            value = self._entries.get(entry_key)
+            if value is not None:
+                self._entries.move_to_end(entry_key)
+                self._stats["revalidated"] += 1
+        if value is None:
+            value = infer(inputs)
+            with self._lock:
+                self._stats["misses"] += 1
+                self._entries[entry_key] = value
+                while len(self._entries) > self.max_entries:
+                    evicted, _ = self._entries.popitem(last=False)
+                    if self._current.get(evicted[:-1], (None,))[0] == evicted:
+                        del self._current[evicted[:-1]]
+
+        now = self.clock()
+        unchanged = current[2] + 1 if current is not None and current[0] == entry_key else 0
+        bar_seconds = interval_seconds(key[1])
+        if bar_seconds is None:
+            expires_at = now + self.default_ttl
+        elif unchanged:
+            # The next bar is due but not published yet; check again soon, backing off while it stays late.
+            expires_at = now + min(bar_seconds, self.recheck_seconds * 2 ** (unchanged - 1))
+        else:
+            expires_at = (now // bar_seconds + 1) * bar_seconds
+        with self._lock:
+            self._current[key] = (entry_key, expires_at, unchanged)
+        return value
+
+    def invalidate(self, ticker: Optional[str] = None):
+        """Drops the cached predictions of a ticker, or of all tickers."""
+        with self._lock:
+            for key in [k for k in self._current if ticker is None or k[0] == ticker]:
+                del self._current[key]
+            for key in [k for k in self._entries if ticker is None or k[0] == ticker]:
+                del self._entries[key]
+
+    def stats(self) -> Dict[str, int]:
+        """Returns the hit, revalidation, miss and shared-computation counts and the number of entries."""
+        with self._lock:
+            return dict(self._stats, entries=len(self._entries))
@@ -0,0 +1,294 @@
+import os
+import sys
+import time
+import uuid
+import threading
+import multiprocessing
+from concurrent.futures import CancelledError, Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Add the project root to the Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from infrastructure.metrics import metrics
+
+ACTIVE_STATUSES = ("queued", "running")
+
+
+def run_training_job(job_id: str, params: Dict[str, Any], progress: Any) -> Dict[str, Any]:
+    """
+    Fetches data, trains and saves a model for one training request. Runs inside a worker process.
+
+    Args:
+        job_id: The id of the job, used as the key in `progress`.
+        params: The TickerRequest fields (ticker, interval, window_size, use_local_data, local_data_path, streaming).
+        progress: A shared dict the job reports its status and per-epoch progress into.
+
+    Returns:
+        A dict with the path of the saved model.
+    """
+    # The worker's spans are sent back through `progress` and merged into the API process's metrics.
+    metrics.reset()
+    try:
+        return _train(job_id, params, progress)
+    finally:
+        progress[job_id] = dict(progress.get(job_id, {}), spans=metrics.snapshot())
+
+
+def _train(job_id: str, params: Dict[str, Any], progress: Any) -> Dict[str, Any]:
+    # Imported here so that only worker processes pay for loading TensorFlow.
+    import tensorflow as tf
+    from services.data_pipeline_service import DataPipelineService
+    from models.model_trainer import FinancialModel
+    from infrastructure.shared_weights import SharedWeightStore
+
+    epochs = params.get("epochs", 20)
+    progress[job_id] = {"status": "running", "stage": "preparing data", "started_at": time.time()}
+
+    class ProgressCallback(tf.keras.callbacks.Callback):
+        def on_epoch_end(self, epoch, logs=None):
+            report = dict(progress[job_id])
+            report.update({
+                "stage": "training",
+                "epoch": epoch + 1,
+                "epochs": epochs,
+                "metrics": {name: float(value) for name, value in (logs or {}).items()}
+            })
+            progress[job_id] = report
+
+    api_key = os.getenv("ALPHA_VANTAGE_API_KEY")
+    pipeline = DataPipelineService(api_key, params.get("use_local_data", False), params.get("local_data_path"))
+    window_size = params["window_size"]
+    model_trainer = FinancialModel(ticker=params["ticker"])
+
+    feature_set = pipeline.run_features(params["ticker"], params["interval"], window_size)
+    if feature_set.n_rows <= window_size:
+        raise ValueError("Feature set is empty. Cannot train model.")
+    model_trainer.build((window_size, len(feature_set.columns)))
+    if params.get("streaming"):
+        # Windows are generated batch by batch from the memory-mapped features, so the full window
+        # tensor is never built.
+        model_trainer.train_on_arrays(feature_set.features, feature_set.targets, window_size, epochs=epochs,
+                                      callbacks=[ProgressCallback()])
+    else:
+        features, targets = feature_set.sequences()
+        model_trainer.train(features, targets, epochs=epochs, callbacks=[ProgressCallback()])
+
+    feature_spec = {key: feature_set.manifest[key] for key in ("config", "config_hash", "columns", "scaler", "version")}
+    feature_spec["path"] = feature_set.path
+    model_path = model_trainer.save(feature_spec=feature_spec)
+
+    shared_weights = SharedWeightStore.from_env()
+    if shared_weights is not None:
+        # Publish the new weights now, so serving workers swap to them on their next request.
+        progress[job_id] = dict(progress[job_id], stage="publishing weights")
+        shared_weights.publish(params["ticker"])
+    return {"model_path": model_path, "feature_version": feature_set.version}
+
+
+class TrainingJobManager:
+    """
+    Runs training requests as background jobs on a process pool and tracks their status.
+
+    Jobs for the same ticker never run concurrently: an identical request for a ticker that already has an
+    active job returns that job, and a different one is queued to start after the active job finishes.
+    Finished jobs are forgotten once they are older than `finished_ttl` or more than `max_finished_jobs`
+    of them are kept.
+    """
+    def __init__(self, max_workers: int = 1, target: Callable[[str, Dict[str, Any], Any], Dict[str, Any]] = run_training_job,
+                 finished_ttl: float = 3600.0, max_finished_jobs: int = 1000):
+        """
+        Initializes the TrainingJobManager. The process pool is started on the first submitted job.
+
+        Args:
+            max_workers: The number of training processes.
+            target: The function run in a worker process for each job.
+            finished_ttl: How long a finished job's status is kept, in seconds.
+            max_finished_jobs: The most finished jobs kept; the oldest are dropped first.
+        """
+        self.max_workers = max_workers
+        self.target = target
+        self.finished_ttl = finished_ttl
+        self.max_finished_jobs = max_finished_jobs
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._mp_manager = None
+        self._progress = None
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._ticker_queues: Dict[str, List[str]] = {}
+        self._lock = threading.Lock()
+        # Guards starting the process pool, which happens outside _lock.
+        self._pool_lock = threading.Lock()
+
+    def submit(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Queues a training job, or returns the active job for the same ticker and parameters.
+
+        Args:
+            params: The training request fields; must include 'ticker'.
+
+        Returns:
+            The job's status record.
+        """
+        ticker = params["ticker"]
+        with self._lock:
+            self._prune()
+            for job_id in self._ticker_queues.get(ticker, []):
+                if self._jobs[job_id]["params"] == params:
+                    return self._snapshot(job_id)
+
+            job_id = uuid.uuid4().hex
+            self._jobs[job_id] = {
+                "job_id": job_id,
+                "ticker": ticker,
+                "params": dict(params),
+                "status": "queued",
+                "submitted_at": time.time()
+            }
+            ticker_queue = self._ticker_queues.setdefault(ticker, [])
+            ticker_queue.append(job_id)
+            start = len(ticker_queue) == 1
+            snapshot = self._snapshot(job_id)
+        if start:
+            # Submitted outside the lock, so a slow pool start-up does not block status requests.
+            self._start(job_id, params)
+        return snapshot
+
+    def status(self, job_id: str) -> Dict[str, Any]:
+        """
+        Returns the status record of a job, including its latest training progress.
+
+        Raises:
+            KeyError: If the job id is unknown.
+        """
+        with self._lock:
+            if job_id not in self._jobs:
+                raise KeyError(f"Unknown training job '{job_id}'.")
+            return self._snapshot(job_id)
+
+    def list_jobs(self) -> List[Dict[str, Any]]:
+        """Returns the status records of all jobs, oldest first."""
+        with self._lock:
+            return [self._snapshot(job_id) for job_id in self._jobs]
+
+    def shutdown(self, wait: bool = True):
+        """Stops the process pool and the progress manager."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=not wait)
+            self._executor = None
+        if self._mp_manager is not None:
+            self._mp_manager.shutdown()
+            self._mp_manager = None
+            self._progress = None
+
+    def _start(self, job_id: str, params: Dict[str, Any]):
+        """
+        Submits a job to the process pool. Called without holding the lock.
+
+        If the job cannot be submitted, it fails and the next job queued for its ticker is started instead,
+        so one bad submit never leaves a ticker's queue stuck.
+        """
+        next_job = (job_id, params)
+        while next_job is not None:
+            job_id, params = next_job
+            executor = None
+            try:
+                with self._pool_lock:
+                    if self._executor is None:
+                        # TensorFlow is not fork-safe, so workers are spawned rather than forked.
+                        context = multiprocessing.get_context("spawn")
+                        if self._mp_manager is None:
+                            self._mp_manager = context.Manager()
+                            self._progress = self._mp_manager.dict()
+                        self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context)
+                    executor = self._executor
+                    future = executor.submit(self.target, job_id, params, self._progress)
+            except Exception as e:
+                print(f"Could not start training job {job_id}: {e!r}")
+                if isinstance(e, BrokenProcessPool):
+                    self._discard_pool(executor)
+                next_job = self._finish(job_id, error=e)
+                continue
+            future.add_done_callback(lambda f, job_id=job_id, executor=executor: self._on_done(job_id, f, executor))
+            return
+
+    def _discard_pool(self, executor: Optional[ProcessPoolExecutor]):
+        """Drops a broken process pool, e.g. after a worker was killed, so the next job starts a new one."""
+        with self._pool_lock:
+            if executor is None or executor is not self._executor:
+                return
+            self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _on_done(self, job_id: str, future: Future, executor: ProcessPoolExecutor):
+        try:
+            result, error = future.result(), None
+        except (Exception, CancelledError) as e:
+            result, error = None, e
+        if isinstance(error, BrokenProcessPool):
+            self._discard_pool(executor)
+        next_job = self._finish(job_id, result, error)
+        # This runs on the pool's callback thread, which must not block on the lock while submitting.
+        if next_job is not None:
+            self._start(*next_job)
+
+    def _finish(self, job_id: str, result: Optional[Dict[str, Any]] = None,
+                error: Optional[BaseException] = None) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """Records a job's outcome and returns the next job queued for its ticker, if any."""
+        with self._lock:
+            job = self._jobs[job_id]
+            report = self._progress_for(job_id)
+            self._discard_progress(job_id)
+            # Spans the job recorded in its worker process.
+            metrics.merge(report.pop("spans", {}))
+            job.update(report)
+            job["finished_at"] = time.time()
+            if error is None:
+                job["result"] = result
+                job["status"] = "succeeded"
+            else:
+                job["status"] = "failed"
+                job["error"] = str(error) or type(error).__name__
+
+            next_job = None
+            ticker_queue = self._ticker_queues[job["ticker"]]
+            ticker_queue.remove(job_id)
+            if ticker_queue:
+                next_job = (ticker_queue[0], self._jobs[ticker_queue[0]]["params"])
+            else:
+                del self._ticker_queues[job["ticker"]]
+            self._prune()
+        return next_job
+
+    def _prune(self):
+        """Forgets finished jobs past the TTL, then the oldest ones over the cap. Called with the lock held."""
+        expired_before = time.time() - self.finished_ttl
+        finished = [job_id for job_id, job in self._jobs.items() if job["status"] not in ACTIVE_STATUSES]
+        excess = len(finished) - self.max_finished_jobs
+        for n, job_id in enumerate(finished):
+            if n < excess or self._jobs[job_id]["finished_at"] < expired_before:
+                del self._jobs[job_id]
+
+    def _progress_for(self, job_id: str) -> Dict[str, Any]:
+        if self._progress is None:
+            return {}
+        try:
+            return dict(self._progress.get(job_id, {}))
+        except (EOFError, OSError):
+            return {}
+
+    def _discard_progress(self, job_id: str):
+        if self._progress is None:
+            return
+        try:
+            self._progress.pop(job_id, None)
+        except (EOFError, OSError):
+            pass
+
+    def _snapshot(self, job_id: str) -> Dict[str, Any]:
+        job = dict(self._jobs[job_id])
+        if job["status"] in ACTIVE_STATUSES:
+            job.update(self._progress_for(job_id))
+            job.pop("spans", None)
+        return job
@@ -16,9 +16,14 @@ def raw_data() -> pd.DataFrame:
     df.index.name = 'Date'
     return df
 
+@pytest.fixture(scope="session")
+def raw_ohlcv_data(raw_data) -> pd.DataFrame:
+    """The same bars in the column schema produced by DataExtractor."""
+    return raw_data.rename(columns=str.lower)
+
 @pytest.fixture(scope="session")
 def raw_data_with_nans(raw_ohlcv_data) -> pd.DataFrame:
     df = raw_ohlcv_data.copy()
-    df.loc[df.index[5], 'Close'] = None
-    df.loc[df.index[10], 'Close'] = None
-    return df
\ No newline at end of file
+    df.loc[df.index[5], 'close'] = None
+    df.loc[df.index[10], 'close'] = None
+    return df
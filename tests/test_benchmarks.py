@@ -0,0 +1,57 @@
+import sys
+import os
+
+# Add the project root to the Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+
+def test_load_test_summaries_and_thresholds():
+    from benchmarks.load_test import check_thresholds, parse_mix, summarize, thresholds_from_report
+
+    assert parse_mix("predict=3,train=1") == {"predict": 0.75, "train": 0.25}
+    summary = summarize([i / 1000 for i in range(1, 101)], errors=1, duration=10.0)
+    assert summary["requests"] == 101 and summary["throughput_rps"] == 10.0
+    assert 50 <= summary["p50_ms"] <= 51 and 99 <= summary["p99_ms"] <= 100
+
+    report = {"config": {}, "endpoints": {"predict": summary}, "server": {"peak_rss_mb": 500.0, "peak_pss_mb": 400.0}}
+    thresholds = thresholds_from_report(report, headroom=0.5)
+    assert check_thresholds(report, thresholds) == []
+
+    slower = dict(summary, p99_ms=summary["p99_ms"] * 2, throughput_rps=5.0)
+    failures = check_thresholds(dict(report, endpoints={"predict": slower}), thresholds)
+    assert [f.split(":")[0] for f in failures] == ["predict p99_ms", "predict throughput_rps"]
+
+
+def test_synthetic_bars_and_benchmark_regression_check(tmp_path):
+    import json
+    import pandas as pd
+    from benchmarks.run_benchmarks import compare_to_baseline, main
+    from benchmarks.synthetic import generate_ohlcv, to_api_response
+    from data.extractor import DataExtractor
+
+    bars = generate_ohlcv(500, seed=7)
+    pd.testing.assert_frame_equal(bars, generate_ohlcv(500, seed=7))
+    assert not bars.equals(generate_ohlcv(500, seed=8))
+    extracted = DataExtractor(to_api_response(bars)).extract_time_series_to_dataframe()
+    assert list(bars.columns) == list(extracted.columns)
+    assert (bars["high"] >= bars[["open", "close"]].max(axis=1)).all()
+    assert (bars["low"] <= bars[["open", "close"]].min(axis=1)).all()
+
+    output = tmp_path / "results.json"
+    assert main(["--sizes", "200", "--repeat", "1", "--skip-model", "--output", str(output)]) == 0
+    report = json.loads(output.read_text())
+    assert {result["name"] for result in report["results"]} >= {"DataProcessor.clean_data", "scale_features"}
+    assert all(result["n_bars"] == 200 and result["median_s"] > 0 for result in report["results"])
+
+    # A baseline far faster than any real run is a regression beyond the tolerance.
+    baseline = {"results": [dict(result, median_s=result["median_s"] / 100) for result in report["results"]]}
+    regressions = compare_to_baseline(report["results"], baseline, tolerance=0.25)
+    assert len(regressions) == len(report["results"])
+    assert regressions[0].startswith("DataProcessor.clean_data[n=200]")
+    assert compare_to_baseline(report["results"], report, tolerance=0.25) == []
+
+    baseline_path = tmp_path / "baseline.json"
+    baseline_path.write_text(json.dumps(baseline))
+    assert main(["--sizes", "200", "--repeat", "1", "--skip-model", "--output", str(tmp_path / "again.json"),
+                 "--baseline", str(baseline_path), "--tolerance", "0.25"]) == 1
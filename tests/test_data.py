@@ -1,18 +1,29 @@
 import sys
 import os
 
+import numpy as np
+
 # Add the project root to the Python path
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 sys.path.insert(0, project_root)
 
-from data.processor import clean_data, create_sequences
+from data.processor import DataProcessor
+from data.windowing import build_windows
+
+
+def _loop_sequences(df, window_size):
+    X, y = [], []
+    for i in range(len(df) - window_size):
+        X.append(df.iloc[i:i + window_size].values)
+        y.append(df['close'].iloc[i + window_size])
+    return np.array(X), np.array(y)
 
 
 def test_data_cleaning(raw_data_with_nans):
     original_nan_count = raw_data_with_nans.isnull().sum().sum()
     assert original_nan_count > 0
 
-    df_cleaned = clean_data(raw_data_with_nans)
+    df_cleaned = DataProcessor(raw_data_with_nans).clean_data()
 
     assert df_cleaned.isnull().sum().sum() == 0
     assert len(df_cleaned) <= len(raw_data_with_nans)
@@ -20,11 +31,344 @@ def test_data_cleaning(raw_data_with_nans):
 
 def test_sequence_creation(raw_ohlcv_data):
     WINDOW_SIZE = 5
-    X, y = create_sequences(raw_ohlcv_data, window_size=WINDOW_SIZE)
+    X, y = DataProcessor.create_sequences(raw_ohlcv_data, window_size=WINDOW_SIZE)
 
     expected_samples = len(raw_ohlcv_data) - WINDOW_SIZE
     assert len(X) == expected_samples
     assert len(y) == expected_samples
 
     n_features = len(raw_ohlcv_data.columns)
-    assert X.shape[1] == WINDOW_SIZE * n_features
\ No newline at end of file
+    assert X.shape[1:] == (WINDOW_SIZE, n_features)
+
+
+def test_sequence_creation_matches_loop(raw_ohlcv_data):
+    for window_size in (1, 5, 49, 50, 60):
+        X, y = DataProcessor.create_sequences(raw_ohlcv_data, window_size)
+        X_loop, y_loop = _loop_sequences(raw_ohlcv_data, window_size)
+        assert X.dtype == X_loop.dtype and y.dtype == y_loop.dtype
+        np.testing.assert_array_equal(X, X_loop)
+        np.testing.assert_array_equal(y, y_loop)
+
+
+def test_build_windows_from_array_view(raw_ohlcv_data):
+    values = raw_ohlcv_data.to_numpy(dtype=np.float64)
+    close_index = raw_ohlcv_data.columns.get_loc('close')
+    X, y = build_windows(values, 5, target=close_index, materialize=False)
+
+    assert np.shares_memory(X, values)
+    assert not X.flags.writeable
+    X_loop, y_loop = _loop_sequences(raw_ohlcv_data, 5)
+    np.testing.assert_array_equal(X, X_loop)
+    np.testing.assert_array_equal(y, y_loop)
+
+    X32, _ = build_windows(raw_ohlcv_data, 5, dtype=np.float32)
+    assert X32.dtype == np.float32 and X32.flags.c_contiguous
+
+
+def _api_response(timestamps, closes):
+    series = {
+        ts: {"1. open": str(c), "2. high": str(c + 1), "3. low": str(c - 1), "4. close": str(c), "5. volume": "1000"}
+        for ts, c in zip(timestamps, closes)
+    }
+    return {"Meta Data": {}, "Time Series (60min)": series}
+
+
+def test_connector_cache_tops_up_with_new_bars(tmp_path):
+    from data.cache import ResponseCache
+    from data.connector import AlphaVantageConnector
+    from data.extractor import DataExtractor
+
+    responses = [
+        _api_response(["2024-01-02 10:00:00", "2024-01-02 11:00:00", "2024-01-02 12:00:00"], [10, 11, 12]),
+        _api_response(["2024-01-02 12:00:00", "2024-01-02 13:00:00"], [12.5, 13]),
+    ]
+    requested = []
+
+    def fake_request(endpoint, params):
+        requested.append(params)
+        return responses[len(requested) - 1]
+
+    connector = AlphaVantageConnector("key", cache=ResponseCache(str(tmp_path)))
+    connector._make_request = fake_request
+
+    connector.fetch_time_series_intraday("IBM", "60min")
+    topped_up = connector.fetch_time_series_intraday("IBM", "60min")
+
+    assert requested[1]["outputsize"] == "compact"
+    df = DataExtractor(topped_up).extract_time_series_to_dataframe()
+    assert list(df["close"]) == [10, 11, 12.5, 13]
+    assert len(connector.cache.get("IBM", "60min")) == 4
+
+    # A top-up that starts after the cached bars end leaves a gap, so the full series is fetched again
+    # instead of the cache being replaced by the compact page.
+    responses.extend([
+        _api_response(["2024-01-03 10:00:00", "2024-01-03 11:00:00"], [20, 21]),
+        _api_response(["2024-01-02 10:00:00", "2024-01-02 11:00:00", "2024-01-02 12:00:00", "2024-01-02 13:00:00",
+                       "2024-01-03 09:00:00", "2024-01-03 10:00:00", "2024-01-03 11:00:00"], [10, 11, 12.5, 13, 19, 20, 21]),
+    ])
+    refetched = connector.fetch_time_series_intraday("IBM", "60min")
+    assert [params.get("outputsize") for params in requested[2:]] == ["compact", "full"]
+    assert list(DataExtractor(refetched).extract_time_series_to_dataframe()["close"]) == [10, 11, 12.5, 13, 19, 20, 21]
+    assert len(connector.cache.get("IBM", "60min")) == 7
+
+
+def test_response_cache_evicts_expired_and_oversized_entries(tmp_path):
+    from data.cache import ResponseCache, time_series_to_frame
+
+    bars = time_series_to_frame(_api_response(["2024-01-02 10:00:00"], [10])["Time Series (60min)"])
+    expired = ResponseCache(str(tmp_path), ttl_seconds=-1)
+    expired.put("IBM", "60min", bars)
+    assert expired.get("IBM", "60min") is None
+
+    small = ResponseCache(str(tmp_path), max_bytes=1)
+    small.put("IBM", "60min", bars)
+    assert small.get("IBM", "60min") is None
+
+
+def test_local_loader_matches_extractor_path(tmp_path):
+    from data.connector import AlphaVantageConnector
+    from data.extractor import DataExtractor
+    from data.loader import load_local_time_series
+
+    sample_path = os.path.join(project_root, 'data', 'sample_data.csv')
+    raw_dict = AlphaVantageConnector(None, True, sample_path).fetch_time_series_intraday("IBM", "60min")
+    expected = DataExtractor(raw_dict).extract_time_series_to_dataframe()
+
+    df = load_local_time_series(sample_path)
+    assert (df.dtypes == np.float64).all()
+    np.testing.assert_array_equal(df.index.values, expected.index.values)
+    np.testing.assert_array_equal(df.to_numpy(), expected.to_numpy(dtype=np.float64))
+
+    records = np.zeros(len(df), dtype=[('timestamp', 'datetime64[ns]')] + [(c, 'f8') for c in df.columns])
+    records['timestamp'] = df.index.values
+    for col in df.columns:
+        records[col] = df[col].to_numpy()
+    npy_path = str(tmp_path / 'bars.npy')
+    np.save(npy_path, records)
+    np.testing.assert_array_equal(load_local_time_series(npy_path).to_numpy(), df.to_numpy())
+
+
+def test_windowed_dataset_batches_match_sequences(raw_ohlcv_data):
+    from data.dataset import WindowedDataset
+
+    X_all, y_all = DataProcessor.create_sequences(raw_ohlcv_data, 5)
+    dataset = WindowedDataset.from_frame(raw_ohlcv_data, 5, batch_size=8, dtype=np.float64)
+    assert dataset.n_samples == len(X_all)
+    X = np.concatenate([dataset[i][0] for i in range(len(dataset))])
+    y = np.concatenate([dataset[i][1] for i in range(len(dataset))])
+    np.testing.assert_array_equal(X, X_all)
+    np.testing.assert_array_equal(y, y_all)
+
+    shuffled = WindowedDataset.from_frame(raw_ohlcv_data, 5, batch_size=8, shuffle=True, seed=1, dtype=np.float64)
+    train, validation = shuffled.split(0.1)
+    split_at = int(len(X_all) * 0.9)
+    assert sorted(train.indices) == list(range(split_at))
+    np.testing.assert_array_equal(validation[0][0], X_all[split_at:split_at + 8])
+    X_batch, y_batch = train[0]
+    first = train._order[0]
+    np.testing.assert_array_equal(X_batch[0], X_all[first])
+    assert y_batch[0] == y_all[first]
+
+
+def test_feature_store_appends_incrementally(tmp_path):
+    import pandas as pd
+    from benchmarks.synthetic import generate_ohlcv
+    from core.features.transforms import add_technical_features, scale_features
+    from data.feature_store import FeatureStore
+
+    raw = generate_ohlcv(300).rename(columns=str.lower)
+    raw.iloc[[50, 201, 202]] = np.nan
+    config = {"technical": True, "scale": True}
+    store = FeatureStore(str(tmp_path))
+
+    first = store.update("IBM", "60min", 10, raw.iloc[:200], config)
+    feature_set = store.update("IBM", "60min", 10, raw, config)
+    assert (first.version, feature_set.version) == (1, 2)
+    assert store.update("IBM", "60min", 10, raw, config).n_rows == feature_set.n_rows
+    assert store.open("IBM", "60min", 10, config, source="sample.csv") is None
+
+    def technical(df):
+        return add_technical_features(df.rename(columns={'close': 'Close'})).rename(columns={'Close': 'close'})
+
+    # The scaler is fitted on the first build and reused for appended bars.
+    _, scaler = scale_features(technical(DataProcessor(raw.iloc[:200]).clean_data()))
+    expected = technical(DataProcessor(raw).clean_data())
+    expected = pd.DataFrame(scaler.transform(expected), columns=expected.columns, index=expected.index)
+    np.testing.assert_array_equal(feature_set.features, expected.to_numpy(dtype=np.float32))
+    assert feature_set.index.equals(expected.index)
+    np.testing.assert_array_equal(feature_set.scaler().data_max_, scaler.data_max_)
+
+    X, y = feature_set.sequences()
+    expected_X, expected_y = build_windows(expected.astype(np.float32), 10)
+    np.testing.assert_array_equal(X, expected_X)
+    np.testing.assert_array_equal(y, expected_y)
+    assert np.shares_memory(X, feature_set.features)
+
+    rebuilt = store.update("IBM", "60min", 10, raw.iloc[:150], config)
+    assert rebuilt.version == 1 and rebuilt.n_rows < first.n_rows
+    np.testing.assert_array_equal(feature_set.last_window()[0], expected.to_numpy(dtype=np.float32)[-10:])
+
+    # The rebuild refitted the scaler; inference passes the one the model was trained with, and gets
+    # features scaled exactly as before.
+    assert rebuilt.manifest["scaler"] != feature_set.manifest["scaler"]
+    restored = store.update("IBM", "60min", 10, raw, config, scaler=feature_set.manifest["scaler"])
+    assert restored.manifest["scaler"] == feature_set.manifest["scaler"]
+    np.testing.assert_array_equal(restored.features, expected.to_numpy(dtype=np.float32))
+
+    # A last bar that was still forming when stored is featurized again once its final values arrive.
+    revised_raw = raw.copy()
+    revised_raw.iloc[-1, revised_raw.columns.get_loc("close")] *= 1.05
+    revised = store.update("IBM", "60min", 10, revised_raw, config, scaler=feature_set.manifest["scaler"])
+    expected_revised = technical(DataProcessor(revised_raw).clean_data())
+    expected_revised = pd.DataFrame(scaler.transform(expected_revised), columns=expected_revised.columns,
+                                    index=expected_revised.index)
+    assert revised.version == restored.version + 1 and revised.n_rows == restored.n_rows
+    np.testing.assert_array_equal(revised.features, expected_revised.to_numpy(dtype=np.float32))
+    assert not np.array_equal(revised.features[-1], expected.to_numpy(dtype=np.float32)[-1])
+    assert store.update("IBM", "60min", 10, revised_raw, config).version == revised.version
+
+
+def test_panel_matches_per_ticker_path():
+    import pandas as pd
+    from benchmarks.synthetic import generate_ohlcv, to_api_response
+    from core.features.transforms import add_technical_features, scale_features
+    from data.extractor import DataExtractor
+    from data.panel import Panel
+
+    rng = np.random.default_rng(0)
+    responses = {}
+    for k in range(4):
+        # Tickers of different lengths, each missing different bars and with a few unparseable closes.
+        df = generate_ohlcv(120 + 30 * k, seed=k)
+        df = df.iloc[np.sort(rng.permutation(len(df))[:len(df) - 10])].iloc[k * 5:]
+        response = to_api_response(df)
+        series = next(value for key, value in response.items() if "Time Series" in key)
+        for timestamp in rng.choice(list(series), 4, replace=False):
+            series[timestamp]['4. close'] = 'n/a'
+        responses[f"T{k}"] = response
+
+    def technical(df):
+        return add_technical_features(df.rename(columns={'close': 'Close'})).rename(columns={'Close': 'close'})
+
+    panel = Panel.from_time_series(responses)
+    cleaned = panel.clean()
+    scaled, params = cleaned.add_technical_features().scale()
+    X, y, ticker_ids = scaled.windows(10)
+
+    expected_X, expected_y = [], []
+    for n, (ticker, response) in enumerate(responses.items()):
+        expected_clean = DataProcessor(DataExtractor(response).extract_time_series_to_dataframe()).clean_data()
+        pd.testing.assert_frame_equal(cleaned.to_frame(ticker), expected_clean, check_freq=False,
+                                      check_names=False, check_index_type=False)
+        expected_scaled, scaler = scale_features(technical(expected_clean))
+        np.testing.assert_array_equal(scaled.to_frame(ticker).to_numpy(), expected_scaled.to_numpy())
+        np.testing.assert_array_equal(params["scale"][n], scaler.scale_)
+        ticker_X, ticker_y = DataProcessor.create_sequences(expected_scaled, 10)
+        expected_X.append(ticker_X)
+        expected_y.append(ticker_y)
+
+    np.testing.assert_array_equal(X, np.concatenate(expected_X))
+    np.testing.assert_array_equal(y, np.concatenate(expected_y))
+    assert np.array_equal(np.bincount(ticker_ids), [len(x) for x in expected_X])
+
+
+def test_async_connector_against_fake_server(tmp_path):
+    import asyncio
+    import time
+    from data.async_connector import AsyncAlphaVantageConnector, RateLimitedError
+    from data.cache import ResponseCache
+    from infrastructure.fake_alpha_vantage import FakeAlphaVantageServer
+
+    async def scenario(fake):
+        async with AsyncAlphaVantageConnector("key", base_url=fake.url, requests_per_minute=600,
+                                              cache=ResponseCache(str(tmp_path)), backoff_base=0.01) as connector:
+            started = time.monotonic()
+            responses = await connector.fetch_many(["IBM", "MSFT", "AAPL", "IBM"], "60min")
+            # Three distinct requests at 10 per second, one token at a time.
+            assert time.monotonic() - started >= 0.2
+            assert all(len(r["Time Series (60min)"]) == 100 for r in responses.values())
+
+            duplicates = await asyncio.gather(*(connector.fetch_time_series_intraday("TSLA", "60min") for _ in range(5)))
+            assert fake.request_counts[("TSLA", "60min")] == 1
+            assert all(d is duplicates[0] for d in duplicates)
+
+            fake.fail_next(2)
+            await connector.fetch_time_series_intraday("NVDA", "60min")
+            assert fake.request_counts[("NVDA", "60min")] == 3
+
+            fake.requests_per_minute = 5
+            connector.max_retries = 0
+            results = await connector.fetch_many([f"T{i}" for i in range(8)], "60min")
+            assert sum(isinstance(r, RateLimitedError) for r in results.values()) == 3
+
+    with FakeAlphaVantageServer() as fake:
+        asyncio.run(scenario(fake))
+
+
+def test_pipelines_share_one_http_session(tmp_path):
+    from data.feature_store import FeatureStore
+    from infrastructure.fake_alpha_vantage import FakeAlphaVantageServer
+    from services.data_pipeline_service import DataPipelineService
+
+    with FakeAlphaVantageServer(synthetic_bars=200) as fake:
+        pipelines = [DataPipelineService("key", feature_store=FeatureStore(str(tmp_path / "features"))) for _ in range(2)]
+        for pipeline, ticker in zip(pipelines, ["IBM", "MSFT"]):
+            pipeline.connector.base_url = fake.url
+            pipeline.connector.cache = None
+            pipeline.run_features(ticker, "60min", 10)
+        assert pipelines[0].connector.session is pipelines[1].connector.session
+        # The shared session is still open after both runs and keeps serving requests.
+        response = pipelines[0].connector.session.get(f"{fake.url}/query", params={"function": "TIME_SERIES_INTRADAY",
+                                                                                  "symbol": "IBM", "interval": "60min"})
+        assert response.status_code == 200 and fake.request_count == 3
+
+
+def test_resampling_follows_trading_sessions():
+    import pandas as pd
+    from benchmarks.synthetic import generate_ohlcv
+    from data.resampling import TradingCalendar, resample_many
+
+    # Round-the-clock 5min bars over a week with the July 4th holiday and a weekend, one missing close.
+    bars = generate_ohlcv(12 * 24 * 7, start="2024-07-02 00:00:00", freq="5min")
+    bars.iloc[12 * 10, 3] = np.nan
+    calendar = TradingCalendar.regular_hours()
+    assert list(calendar.sessions("2024-07-02", "2024-07-08").day) == [2, 3, 5, 8]
+
+    resampled = resample_many(bars, ["60min", "daily"], calendar)
+
+    minutes = bars.index.hour * 60 + bars.index.minute
+    in_session = bars[(minutes >= 570) & (minutes < 960) & bars.index.normalize().isin(calendar.sessions("2024-07-01", "2024-07-09"))]
+    in_session = in_session.dropna()
+    aggregations = {"open": "first", "high": "max", "low": "min", "close": "last", "volume": "sum"}
+    expected_hourly = in_session.resample("60min", offset="30min").agg(aggregations).dropna()
+    expected_daily = in_session.resample("1D").agg(aggregations).dropna()
+
+    pd.testing.assert_frame_equal(resampled["60min"], expected_hourly, check_freq=False, check_index_type=False)
+    pd.testing.assert_frame_equal(resampled["daily"], expected_daily, check_freq=False, check_index_type=False)
+    # Sessions close at 16:00, so the last hourly bar of each day only spans 15:30-16:00.
+    assert resampled["60min"].index[6] == pd.Timestamp("2024-07-02 15:30") and len(resampled["60min"]) == 4 * 7
+
+
+def test_resampled_features_never_store_a_forming_bar(tmp_path):
+    import pandas as pd
+    from benchmarks.synthetic import generate_ohlcv
+    from data.feature_store import FeatureStore
+    from data.resampling import resample
+    from services.data_pipeline_service import DataPipelineService
+
+    bars = generate_ohlcv(12 * 16 * 2, start="2024-07-08 04:00:00", freq="5min")
+    csv_path = tmp_path / "bars.csv"
+    store = FeatureStore(str(tmp_path / "features"))
+
+    def run(until):
+        bars[bars.index <= until].rename_axis("timestamp").to_csv(csv_path)
+        pipeline = DataPipelineService(None, True, str(csv_path), feature_store=store, base_interval="5min")
+        return pipeline.run_features("IBM", "60min", 3)
+
+    # Cut at 12:10, the 12:00 bar is still forming and is not stored yet.
+    partial = run("2024-07-08 12:10")
+    assert partial.index[-1] == pd.Timestamp("2024-07-08 11:00")
+    complete = run("2024-07-09 19:55")
+    expected = resample(bars, "60min")
+    np.testing.assert_array_equal(complete.features, expected.to_numpy(dtype=np.float32))
+    assert resample(bars.iloc[:-1], "daily", complete_until=bars.index[-1]).index[-1] == pd.Timestamp("2024-07-08")
@@ -0,0 +1,39 @@
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+
+# Add the project root to the Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from core.features.transforms import add_technical_features
+from core.features.incremental import IncrementalIndicators
+
+
+def _random_walk(n=300, seed=0):
+    rng = np.random.default_rng(seed)
+    close = np.round(100 + np.cumsum(rng.normal(0, 1, n)), 1)
+    close[50:80] = close[50]
+    close[[10, 120]] = np.nan
+    return pd.DataFrame({'Close': close, 'Volume': rng.integers(1000, 2000, n)},
+                        index=pd.date_range('2024-01-01', periods=n, freq='h'))
+
+
+def test_incremental_indicators_match_batch_features(tmp_path, raw_data):
+    for df in (raw_data, _random_walk()):
+        expected = add_technical_features(df)
+
+        engine = IncrementalIndicators()
+        first = engine.update_frame('IBM', df.iloc[:len(df) // 2])
+        checkpoint = str(tmp_path / 'indicators.json')
+        engine.save(checkpoint)
+
+        restored = IncrementalIndicators.load(checkpoint)
+        second = restored.update_frame('IBM', df.iloc[len(df) // 2:len(df) - 1])
+        rsi, ma = restored.update('IBM', df['Close'].iloc[-1])
+
+        streamed = pd.concat([first, second])
+        pd.testing.assert_frame_equal(streamed, expected.iloc[:len(streamed)], check_exact=True)
+        assert (rsi, ma) == (expected['RSI'].iloc[-1], expected['MA'].iloc[-1])
@@ -0,0 +1,196 @@
+import sys
+import os
+import time
+
+# Add the project root to the Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from models.model_trainer import FinancialModel
+from models.registry import ModelRegistry
+
+
+def _touch_model(models_dir, ticker):
+    path = FinancialModel.model_path(ticker, str(models_dir))
+    with open(path, 'w') as f:
+        f.write(ticker)
+    return path
+
+
+def _random_numpy_lstm(seed, n_features=5):
+    import numpy as np
+    from core.models.numpy_lstm import NumpyLSTM
+
+    rng = np.random.default_rng(seed)
+    weights = lambda *shape: rng.normal(scale=0.3, size=shape).astype(np.float32)
+    return NumpyLSTM([
+        {'type': 'lstm', 'units': 4, 'return_sequences': False, 'activation': 'tanh',
+         'recurrent_activation': 'sigmoid', 'kernel': weights(n_features, 16), 'recurrent_kernel': weights(4, 16),
+         'bias': weights(16)},
+        {'type': 'dense', 'activation': 'linear', 'kernel': weights(4, 1), 'bias': weights(1)}
+    ])
+
+
+def test_registry_caches_evicts_and_reloads(tmp_path):
+    loads = []
+
+    def fake_loader(ticker, models_dir):
+        loads.append(ticker)
+        return FinancialModel(ticker=ticker)
+
+    for ticker in ("IBM", "MSFT", "AAPL"):
+        _touch_model(tmp_path, ticker)
+    registry = ModelRegistry(str(tmp_path), max_models=2, loader=fake_loader)
+
+    assert registry.preload(["IBM", "MSFT", "MISSING"]) == ["IBM", "MSFT"]
+    first = registry.get("IBM")
+    assert registry.get("IBM") is first
+    assert loads == ["IBM", "MSFT"]
+
+    registry.get("AAPL")
+    assert registry.cached_tickers() == ["IBM", "AAPL"]
+
+    path = _touch_model(tmp_path, "IBM")
+    os.utime(path, ns=(time.time_ns(), time.time_ns() + 10 ** 9))
+    assert registry.get("IBM") is not first
+    assert loads == ["IBM", "MSFT", "AAPL", "IBM"]
+
+
+def test_inference_scheduler_batches_concurrent_requests():
+    import threading
+    import numpy as np
+    from models.inference import InferenceScheduler
+
+    class SumModel:
+        def __init__(self):
+            self.batch_sizes = []
+
+        def predict(self, X):
+            self.batch_sizes.append(len(X))
+            return X.sum(axis=(1, 2))[:, None]
+
+    model = SumModel()
+    scheduler = InferenceScheduler(max_batch_size=8, max_wait_ms=50)
+    inputs = [np.full((3, 2), i, dtype=float) for i in range(16)]
+    results = [None] * len(inputs)
+
+    def call(i):
+        results[i] = scheduler.predict("IBM", model, inputs[i], timeout=5)
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(len(inputs))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert [float(r[0]) for r in results] == [6.0 * i for i in range(16)]
+    assert max(model.batch_sizes) > 1 and max(model.batch_sizes) <= 8
+    stats = scheduler.stats()
+    assert stats["totals"]["requests"] == 16
+    assert stats["totals"]["batches"] == len(model.batch_sizes)
+
+
+def test_api_import_does_not_load_tensorflow():
+    import subprocess
+    code = "import sys; import api.main; print('tensorflow' in sys.modules or 'keras' in sys.modules)"
+    result = subprocess.run([sys.executable, "-c", code], cwd=project_root, capture_output=True, text=True)
+    assert result.stdout.strip().splitlines()[-1] == "False"
+
+
+def test_numpy_lstm_matches_keras(tmp_path):
+    import numpy as np
+    from core.models.numpy_lstm import NumpyLSTM
+    from models.registry import load_inference_model
+
+    model = FinancialModel(ticker="IBM")
+    model.build((10, 5))
+    model.save(str(tmp_path))
+
+    engine = load_inference_model("IBM", str(tmp_path))
+    assert isinstance(engine, NumpyLSTM)
+
+    X = np.random.default_rng(0).normal(size=(7, 10, 5)).astype(np.float32)
+    np.testing.assert_allclose(engine.predict(X), model.predict(X), rtol=1e-4, atol=1e-5)
+
+
+def test_feature_spec_is_saved_with_its_model_version(tmp_path):
+    from models.registry import ModelRegistry
+
+    model = FinancialModel(ticker="IBM")
+    model.build((10, 5))
+    registry = ModelRegistry(str(tmp_path))
+    model.save(str(tmp_path), feature_spec={"columns": ["old"]})
+    old_version = registry.version("IBM")
+    model.save(str(tmp_path), feature_spec={"columns": ["new"]})
+    _, new_version = registry.get_versioned("IBM")
+
+    assert new_version != old_version
+    # Requests still serving the previous model get its spec, never the one saved with the next.
+    assert FinancialModel.load_feature_spec("IBM", str(tmp_path), old_version) == {"columns": ["old"]}
+    assert FinancialModel.load_feature_spec("IBM", str(tmp_path), new_version) == {"columns": ["new"]}
+    assert FinancialModel.load_feature_spec("IBM", str(tmp_path)) == {"columns": ["new"]}
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+
+def test_forecast_batches_stacked_models_like_separate_forecasts():
+    import numpy as np
+    from core.models.numpy_lstm import NumpyLSTM
+    from services.forecast import forecast_batch, recursive_forecast, shocked_windows
+
+    columns = ["open", "high", "low", "close", "volume"]
+    window = np.random.default_rng(2).uniform(1, 2, size=(1, 6, 5)).astype(np.float32)
+    models = [_random_numpy_lstm(0), _random_numpy_lstm(1)]
+    jobs = [(model, shocked_windows(window, [0.0, -0.1], columns)) for model in models]
+    assert np.allclose(jobs[0][1][1, -1, :4], window[0, -1, :4] * 0.9)
+    assert np.array_equal(jobs[0][1][1, -1, 4], window[0, -1, 4])
+
+    paths = forecast_batch(jobs, 3, columns)
+    for (model, windows), path in zip(jobs, paths):
+        assert path.shape == (2, 3)
+        np.testing.assert_allclose(path, recursive_forecast(model, windows, 3, columns), rtol=1e-5, atol=1e-6)
+        # The first step is the model's plain prediction; later steps see the predicted bars.
+        np.testing.assert_allclose(path[:, 0], model.predict(windows)[:, 0], rtol=1e-5, atol=1e-6)
+        rolled = np.concatenate([windows[:, 1:], windows[:, -1:]], axis=1)
+        rolled[:, -1, :4] = path[:, :1]
+        np.testing.assert_allclose(path[:, 1], model.predict(rolled)[:, 0], rtol=1e-5, atol=1e-6)
+
+
+def test_shared_weight_store_publishes_and_hot_swaps(tmp_path):
+    import numpy as np
+    from infrastructure.shared_weights import SharedWeightStore
+
+    models_dir = tmp_path / "models"
+    models_dir.mkdir()
+    store = SharedWeightStore(str(tmp_path / "shm"), str(models_dir), keep_versions=1)
+    X = np.random.default_rng(3).normal(size=(4, 6, 5)).astype(np.float32)
+
+    def save(seed, mtime_ns):
+        path = _touch_model(models_dir, "IBM")
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+        model = _random_numpy_lstm(seed)
+        model.save(FinancialModel.weights_path("IBM", str(models_dir)))
+        return model
+
+    first = save(0, 10 ** 18)
+    registry = ModelRegistry(str(models_dir), loader=store.load)
+    shared = registry.get("IBM")
+    np.testing.assert_allclose(shared.predict(X), first.predict(X), rtol=1e-6)
+    assert store.version("IBM") == registry.version("IBM")
+    assert not shared.layers[0]['kernel'].flags.writeable
+    assert store.attach("IBM")[1].layers[0]['kernel'].base is not shared.layers[0]['kernel'].base
+
+    # A retrained model is published as a new version and the old file is removed, while the old
+    # mapping stays usable for requests still holding it.
+    second = save(1, 15 * 10 ** 17)
+    swapped = registry.get("IBM")
+    np.testing.assert_allclose(swapped.predict(X), second.predict(X), rtol=1e-6)
+    np.testing.assert_allclose(shared.predict(X), first.predict(X), rtol=1e-6)
+    assert [name for name in os.listdir(store.root) if name.endswith(".bin")] == [f"IBM.{15 * 10 ** 17}.bin"]
+
+    # If the weights still cannot be attached after publishing, loading fails with a clear error.
+    store.attach = lambda ticker: None
+    try:
+        store.load("IBM")
+        assert False, "Loading should fail when the published weights cannot be attached."
+    except RuntimeError as e:
+        assert "IBM" in str(e)
@@ -0,0 +1,243 @@
+import sys
+import os
+import time
+
+# Add the project root to the Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+import numpy as np
+import pandas as pd
+
+from core.models.base_model import BaseModel
+from pipelines.backtest import WalkForwardBacktester, walk_forward_folds
+from pipelines.sweep import SweepRunner, grid_space, random_space
+from services.training_jobs import TrainingJobManager
+
+
+def _fake_training_job(job_id, params, progress):
+    progress[job_id] = {"status": "running", "started_at": time.time(), "epoch": 1, "epochs": 1}
+    time.sleep(0.3)
+    if params.get("fail"):
+        raise ValueError("Feature set is empty. Cannot train model.")
+    return {"model_path": f"{params['ticker']}_model.keras"}
+
+
+def _crashing_training_job(job_id, params, progress):
+    if params.get("crash"):
+        # Dies the way an OOM-killed worker does, which breaks the whole process pool.
+        os._exit(1)
+    return _fake_training_job(job_id, params, progress)
+
+
+class _LastValueModel(BaseModel):
+    """Predicts each target as the sample's own close plus the mean training drift."""
+    def train(self, X_train, y_train):
+        self.model = float(np.mean(y_train.values - X_train['close'].values))
+
+    def predict(self, X_test):
+        return X_test['close'] + self.model
+
+    def save(self, file_path):
+        pass
+
+    def load(self, file_path):
+        pass
+
+
+def _wait_for(manager, job_id, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = manager.status(job_id)
+        if job["status"] not in ("queued", "running"):
+            return job
+        time.sleep(0.05)
+    raise TimeoutError(job_id)
+
+
+def test_training_jobs_dedupe_and_serialize_per_ticker():
+    manager = TrainingJobManager(max_workers=2, target=_fake_training_job)
+    try:
+        first = manager.submit({"ticker": "IBM", "window_size": 10})
+        duplicate = manager.submit({"ticker": "IBM", "window_size": 10})
+        second = manager.submit({"ticker": "IBM", "window_size": 20})
+        failing = manager.submit({"ticker": "MSFT", "fail": True})
+
+        assert duplicate["job_id"] == first["job_id"]
+        assert manager.status(second["job_id"])["status"] == "queued"
+
+        first_done = _wait_for(manager, first["job_id"])
+        second_done = _wait_for(manager, second["job_id"])
+        assert first_done["status"] == "succeeded"
+        assert first_done["result"] == {"model_path": "IBM_model.keras"}
+        assert second_done["started_at"] >= first_done["finished_at"] - 0.05
+        assert _wait_for(manager, failing["job_id"])["error"] == "Feature set is empty. Cannot train model."
+    finally:
+        manager.shutdown()
+
+
+def test_training_jobs_forget_finished_jobs():
+    manager = TrainingJobManager(max_workers=2, target=_fake_training_job, max_finished_jobs=1)
+    try:
+        first = manager.submit({"ticker": "IBM"})
+        _wait_for(manager, first["job_id"])
+        second = manager.submit({"ticker": "MSFT"})
+        _wait_for(manager, second["job_id"])
+        # Only the most recently submitted finished job is kept.
+        assert [job["job_id"] for job in manager.list_jobs()] == [second["job_id"]]
+
+        manager.finished_ttl = 0
+        third = manager.submit({"ticker": "IBM"})
+        assert [job["job_id"] for job in manager.list_jobs()] == [third["job_id"]]
+        try:
+            manager.status(second["job_id"])
+            assert False, "An expired job should be forgotten."
+        except KeyError:
+            pass
+    finally:
+        manager.shutdown()
+
+
+def test_training_jobs_recover_from_a_killed_worker():
+    manager = TrainingJobManager(max_workers=1, target=_crashing_training_job)
+    try:
+        crashed = manager.submit({"ticker": "IBM", "crash": True})
+        queued = manager.submit({"ticker": "IBM"})
+        assert _wait_for(manager, crashed["job_id"])["status"] == "failed"
+        # The broken pool is replaced, so the job queued behind the crash still runs.
+        assert _wait_for(manager, queued["job_id"])["status"] == "succeeded"
+        assert manager.submit({"ticker": "IBM", "window_size": 5})["status"] in ("queued", "running")
+    finally:
+        manager.shutdown()
+
+
+def test_metrics_spans_render_prometheus_text(raw_data_with_nans):
+    from data.processor import DataProcessor
+    from infrastructure.metrics import MetricsRegistry, metrics
+
+    metrics.reset()
+    cleaned = DataProcessor(raw_data_with_nans).clean_data()
+    DataProcessor.create_sequences(cleaned, 5)
+    text = metrics.render_prometheus()
+
+    assert 'pipeline_stage_duration_seconds_count{stage="clean"} 1' in text
+    assert f'pipeline_stage_rows_total{{stage="create_sequences"}} {len(cleaned) - 5}' in text
+    assert 'pipeline_stage_duration_seconds_bucket{stage="clean",le="+Inf"} 1' in text
+
+    disabled = MetricsRegistry(enabled=False)
+    with disabled.span("clean") as s:
+        s.record(rows=1)
+    assert "stage=" not in disabled.render_prometheus()
+
+    # Spans recorded in a training worker are merged into the API process's registry.
+    worker = MetricsRegistry()
+    worker.observe("train", 2.0, rows=100)
+    parent = MetricsRegistry()
+    parent.observe("train", 1.0)
+    parent.merge(worker.snapshot())
+    text = parent.render_prometheus()
+    assert 'pipeline_stage_duration_seconds_count{stage="train"} 2' in text
+    assert 'pipeline_stage_rows_total{stage="train"} 100' in text
+
+
+def test_walk_forward_folds():
+    assert walk_forward_folds(12, 3, test_size=2, mode='expanding') == [(0, 6, 6, 8), (0, 8, 8, 10), (0, 10, 10, 12)]
+    assert walk_forward_folds(12, 3, test_size=2, mode='rolling', train_size=4) == [(2, 6, 6, 8), (4, 8, 8, 10), (6, 10, 10, 12)]
+
+
+def test_backtester_reports_folds_and_reuses_cache(raw_ohlcv_data, tmp_path):
+    backtester = WalkForwardBacktester(_LastValueModel, {}, n_folds=3, max_workers=2, cache_dir=str(tmp_path))
+    report = backtester.run(raw_ohlcv_data)
+
+    # Close rises by exactly 1.1 per bar, so the drift model is exact.
+    assert list(report["fold"]) == [0, 1, 2]
+    assert not report["cached"].any()
+    assert np.allclose(report["mae"], 0) and np.allclose(report["rmse"], 0)
+    assert list(report["test_samples"]) == [12, 12, 12]
+    assert report["test_end"].iloc[-1] == raw_ohlcv_data.index[-2]
+
+    rerun = backtester.run(raw_ohlcv_data)
+    assert rerun["cached"].all()
+    pd.testing.assert_frame_equal(rerun.drop(columns="cached"), report.drop(columns="cached"))
+
+
+def test_search_spaces():
+    assert grid_space({'lstm_units': [4, 8], 'epochs': [1]}) == [
+        {'epochs': 1, 'lstm_units': 4}, {'epochs': 1, 'lstm_units': 8}]
+    trials = random_space({'lstm_units': (4, 8), 'learning_rate': (0.001, 0.01), 'batch_size': [16]}, 5, seed=0)
+    assert trials == random_space({'lstm_units': (4, 8), 'learning_rate': (0.001, 0.01), 'batch_size': [16]}, 5, seed=0)
+    assert all(4 <= t['lstm_units'] <= 8 and 0.001 <= t['learning_rate'] <= 0.01 for t in trials)
+
+
+def test_sweep_runs_trials_and_resumes_from_log(raw_ohlcv_data, tmp_path):
+    X = raw_ohlcv_data / raw_ohlcv_data.max()
+    y = X['close'].shift(-1).ffill()
+    trials = grid_space({'lstm_units': [2, 4], 'epochs': [3], 'batch_size': [16]})
+    runner = SweepRunner(str(tmp_path / "sweep.jsonl"), max_workers=2, tf_threads=1, validation_split=0.2)
+
+    results = runner.run(X, y, trials)
+    assert len(results) == 2
+    assert set(results["status"]) <= {"completed", "pruned"}
+    assert results["val_loss"].is_monotonic_increasing
+    assert (results["epochs_run"] <= 3).all()
+
+    with open(tmp_path / "sweep.jsonl", "a") as f:
+        f.write('{"trial_id": "trunc')
+    extra = trials + [{'lstm_units': 2, 'epochs': 1, 'batch_size': 16}]
+    resumed = runner.run(X, y, extra)
+    assert len(resumed) == 3
+    assert len(runner.load_log()) == 3
+
+
+def test_prediction_cache_expires_on_new_bar_and_shares_misses():
+    import threading
+    from services.prediction_cache import PredictionCache
+
+    now = [3600.0 * 100 + 10]
+    bars = [1]
+    calls = {"fetch": 0, "infer": 0}
+    release = threading.Event()
+
+    def fetch():
+        calls["fetch"] += 1
+        release.wait(5)
+        return bars[0], bars[0] * 10.0
+
+    def infer(inputs):
+        calls["infer"] += 1
+        return inputs + 0.5
+
+    cache = PredictionCache(recheck_seconds=30, clock=lambda: now[0])
+
+    def predict(version=1):
+        return cache.get_or_compute("IBM", "60min", 10, version, fetch, infer)
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(predict())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert results == [10.5] * 8 and calls == {"fetch": 1, "infer": 1}
+
+    started = time.perf_counter()
+    for _ in range(1000):
+        assert predict() == 10.5
+    assert (time.perf_counter() - started) / 1000 < 0.001
+    assert calls["fetch"] == 1
+
+    # The next bar is due at the top of the hour, but it has not been published yet.
+    now[0] = 3600.0 * 101 + 1
+    assert predict() == 10.5 and calls == {"fetch": 2, "infer": 1}
+    now[0] += 29
+    predict()
+    assert calls["fetch"] == 2
+    bars[0] = 2
+    now[0] += 2
+    assert predict() == 20.5 and calls == {"fetch": 3, "infer": 2}
+
+    # A retrained model has a new version and is never served the old predictions.
+    assert predict(version=2) == 20.5 and calls["infer"] == 3
+    assert cache.stats()["shared"] == 7